@@ -0,0 +1,89 @@
+"""
+GetAll on org.mpris.MediaPlayer2.Player from many concurrent clients, served from the
+precomputed values versus by dbus_next calling every property getter. The clients share the
+player's process, so ``server_us`` also reports what building and marshaling one reply costs.
+
+    python benchmarks/bench_get_all.py [--clients 1 10 50] [--calls 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from common import per_call, report
+from dbus_next import Message
+from dbus_next.aio import MessageBus
+
+from aionowplaying.interface.base import PlaybackPropertyName, PlaybackStatus
+from aionowplaying.interface.models import PlaybackProperties
+from aionowplaying.interface.mpris2 import Mpris2Interface
+from aionowplaying.testing import PrivateBus
+
+GET_ALL = dict(destination='org.mpris.MediaPlayer2.benchmark', path='/org/mpris/MediaPlayer2',
+               interface='org.freedesktop.DBus.Properties', member='GetAll', signature='s',
+               body=['org.mpris.MediaPlayer2.Player'])
+
+
+async def client_loop(client: MessageBus, calls: int, samples: list):
+    for _ in range(calls):
+        start = time.perf_counter()
+        await client.call(Message(**GET_ALL))
+        samples.append(time.perf_counter() - start)
+
+
+async def measure(clients, calls: int) -> dict:
+    samples = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(client, calls, samples) for client in clients))
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        'calls_per_second': round(len(samples) / elapsed),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 1),
+    }
+
+
+async def run(counts, calls: int) -> dict:
+    results = dict()
+    async with PrivateBus() as bus:
+        player = Mpris2Interface('benchmark', bus_address=bus.address)
+        player.set_playback_properties({
+            PlaybackPropertyName.PlaybackStatus: PlaybackStatus.Playing,
+            PlaybackPropertyName.Metadata: PlaybackProperties.MetadataBean(
+                id_='/benchmark/1', title='Title', artist=['Artist'], album='Album', duration=180_000_000),
+        })
+        await player.connect()
+        request = Message(**GET_ALL, serial=1)
+        player.dbus.send = lambda reply: reply._marshall()  # marshal replies, don't send them
+        results['server_us'] = {
+            'precomputed': round(per_call(lambda: player._answer_handler(request)._marshall(), 2000), 2),
+            'getters': round(per_call(lambda: player.dbus._default_properties_handler(
+                request, player.dbus.send), 2000), 2),
+        }
+        del player.dbus.send
+        clients = [await MessageBus(bus_address=bus.address).connect() for _ in range(max(counts))]
+        for count in counts:
+            await measure(clients[:count], 10)  # warm-up
+            precomputed = await measure(clients[:count], calls)
+            player.dbus.remove_message_handler(player._answer_handler)
+            getters = await measure(clients[:count], calls)
+            player.dbus.add_message_handler(player._answer_handler)
+            results[str(count)] = {'precomputed': precomputed, 'getters': getters}
+        for client in clients:
+            client.disconnect()
+        await player.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--calls', type=int, default=200, help='GetAll calls per client')
+    args = parser.parse_args()
+    report('get_all', asyncio.run(run(args.clients, args.calls)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Import time of the package, measured with ``python -X importtime`` in fresh interpreters.
+
+Reports the cumulative import time of ``aionowplaying`` alone, with the models and with
+the platform backend resolved, and whether heavy dependencies were loaded.
+
+    python benchmarks/bench_import.py
+"""
+import os
+import subprocess
+import sys
+
+from common import report
+
+CASES = {
+    'package': 'import aionowplaying',
+    'models': 'from aionowplaying import PlaybackProperties',
+    'backend': 'from aionowplaying import NowPlayingInterface',
+}
+HEAVY = ('pydantic', 'dbus_next')
+
+
+def _top_level_imports(code: str):
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, check=True, env=dict(os.environ))
+    imports = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[0].strip().split(':')[-1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        if not name.startswith(' '):
+            imports[name.strip()] = int(parts[1])
+    return imports, proc.stdout.split()
+
+
+def importtime(code: str, repeat: int = 5) -> dict:
+    """Best cumulative time of the top-level imports triggered by ``code``, in microseconds."""
+    startup, _ = _top_level_imports('pass')
+    probe = f'{code}\nimport sys\nprint(" ".join(m for m in {HEAVY!r} if m in sys.modules))'
+    best = None
+    loaded = []
+    for _ in range(repeat):
+        imports, loaded = _top_level_imports(probe)
+        total = sum(us for name, us in imports.items() if name not in startup and name != 'sys')
+        best = total if best is None else min(best, total)
+    return {'cumulative_us': best, 'heavy_modules_loaded': loaded}
+
+
+def main():
+    report('import_time', {name: importtime(code) for name, code in CASES.items()})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Cost of serving the Player ``Metadata`` property, as done for every Get/GetAll.
+
+Compares mapping the MetadataBean to D-Bus variants on every read (the previous
+behaviour) with the cached mapping held by the player service interface.
+
+    python benchmarks/bench_metadata.py
+"""
+from common import per_call, report
+
+from aionowplaying.interface.base import PlaybackProperties, PlaybackPropertyName
+from aionowplaying.interface.mpris2 import DBusBeanMapper, Mpris2Interface
+
+
+def main():
+    player = Mpris2Interface('benchmark')
+    metadata = PlaybackProperties.MetadataBean(
+        id_='/org/mpris/MediaPlayer2/Track/1', title='Title', album='Album', artist=['Artist A', 'Artist B'],
+        albumArtist=['Artist A'], genre=['Rock'], duration=240_000_000, cover='file:///tmp/cover.jpg',
+    )
+    player.set_playback_property(PlaybackPropertyName.Metadata, metadata)
+    service = player._player_bus
+
+    uncached = per_call(lambda: DBusBeanMapper.metadata(service._properties.Metadata))
+    cached = per_call(lambda: service.metadata)
+    report('metadata_getter', {
+        'uncached_us_per_get': round(uncached, 3),
+        'cached_us_per_get': round(cached, 3),
+        'speedup': round(uncached / cached, 1),
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Overhead of the metrics instrumentation: property sets that emit PropertiesChanged
+(with the bus send stubbed out) and dispatched commands. ``uninstrumented`` bypasses the
+instrumented code paths, ``disabled`` is the default, ``enabled`` collects metrics.
+
+    python benchmarks/bench_metrics.py
+"""
+import asyncio
+
+from common import per_call, report
+
+from aionowplaying.interface.base import PlaybackPropertyName
+from aionowplaying.interface.mpris2 import Mpris2Interface
+
+
+def player(mode: str) -> Mpris2Interface:
+    iface = Mpris2Interface('benchmark', compact=True)
+    bus = iface._player_bus
+    bus.emit_properties_changed = lambda changed, invalidated=(): None
+    if mode == 'uninstrumented':
+        bus._emit_changed = bus.emit_properties_changed
+        iface.dispatcher._call = iface.dispatcher._invoke
+    elif mode == 'enabled':
+        iface.enable_metrics()
+    return iface
+
+
+def dispatch_us(iface: Mpris2Interface, number: int = 20000) -> float:
+    async def run():
+        loop = asyncio.get_running_loop()
+        best = float('inf')
+        for _ in range(5):
+            start = loop.time()
+            for _ in range(number):
+                await iface._dispatch('on_next')
+            best = min(best, loop.time() - start)
+        return best / number * 1e6
+
+    return asyncio.run(run())
+
+
+def main():
+    results = dict()
+    for mode in ('uninstrumented', 'disabled', 'enabled'):
+        iface = player(mode)
+        results[mode] = {
+            'set_us': round(per_call(lambda: iface.set_playback_property(PlaybackPropertyName.Volume, 0.5),
+                                     number=100000), 4),
+            'dispatch_us': round(dispatch_us(iface), 3),
+        }
+    report('metrics_overhead', results)
+
+
+if __name__ == '__main__':
+    main()
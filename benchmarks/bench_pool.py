@@ -0,0 +1,57 @@
+"""
+Cost of each additional player hosted by a PlayerPool on a private dbus-daemon:
+startup time (players connected concurrently), traced Python memory and open file descriptors.
+
+    python benchmarks/bench_pool.py [--players 10 100 300]
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+from common import report
+
+from aionowplaying.interface.pool import PlayerPool
+from aionowplaying.testing import PrivateBus
+
+
+def open_fds() -> int:
+    return len(os.listdir('/proc/self/fd'))
+
+
+async def measure(address: str, count: int) -> dict:
+    pool = PlayerPool('benchmark', bus_address=address)
+    fds = open_fds()
+    tracemalloc.start()
+    memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    await pool.add_many(range(count))
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] - memory
+    tracemalloc.stop()
+    fds = open_fds() - fds
+    await pool.close()
+    return {
+        'startup_seconds': round(elapsed, 4),
+        'startup_ms_per_player': round(elapsed / count * 1e3, 3),
+        'bytes_per_player': round(memory / count),
+        'fds_per_player': round(fds / count, 2),
+    }
+
+
+async def run(counts) -> dict:
+    async with PrivateBus() as bus:
+        await measure(bus.address, 1)  # imports and per-class setup are not per-player costs
+        return {str(count): await measure(bus.address, count) for count in counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, nargs='+', default=[10, 100, 300])
+    args = parser.parse_args()
+    report('player_pool', asyncio.run(run(args.players)))
+
+
+if __name__ == '__main__':
+    main()
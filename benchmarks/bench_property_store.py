@@ -0,0 +1,40 @@
+"""
+Memory per instance and attribute set/get throughput of the pydantic property models
+compared with the ``__slots__`` classes of :mod:`aionowplaying.interface.compact`.
+
+    python benchmarks/bench_property_store.py
+"""
+import tracemalloc
+
+from common import per_call, report
+
+from aionowplaying.interface.base import property_models
+
+
+def memory_per_instance(cls, count: int = 10000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [cls() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return (after - before) / count
+
+
+def measure(compact: bool) -> dict:
+    _, playback_model, _ = property_models(compact)
+    properties = playback_model()
+    return {
+        'bytes_per_instance': round(memory_per_instance(playback_model)),
+        'create_us': round(per_call(playback_model, number=2000), 3),
+        'set_us': round(per_call(lambda: setattr(properties, 'Volume', 0.5), number=100000), 4),
+        'get_us': round(per_call(lambda: getattr(properties, 'Volume'), number=100000), 4),
+    }
+
+
+def main():
+    report('property_store', {'pydantic': measure(False), 'compact': measure(True)})
+
+
+if __name__ == '__main__':
+    main()
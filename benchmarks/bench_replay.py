@@ -0,0 +1,76 @@
+"""
+Replays a recorded session into the MPRIS backend on a private dbus-daemon, with and without
+a flush interval, and reports replay throughput, command latency and the signals sent.
+Without a recording a synthetic one is made: track changes with a burst of property sets each,
+volume ramps and media key presses.
+
+    python benchmarks/bench_replay.py [--recording session.rec] [--speed 1] [--tracks 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from common import report
+
+from aionowplaying.interface.base import PlaybackPropertyName, PlaybackStatus
+from aionowplaying.interface.headless import HeadlessInterface
+from aionowplaying.interface.models import PlaybackProperties
+from aionowplaying.interface.mpris2 import Mpris2Interface
+from aionowplaying.interface.recording import Recorder, Replayer
+from aionowplaying.testing import PrivateBus
+
+
+async def synthetic_session(path: str, tracks: int):
+    player = HeadlessInterface('benchmark')
+    with Recorder(player, path):
+        for number in range(tracks):
+            player.set_playback_properties({
+                PlaybackPropertyName.Metadata: PlaybackProperties.MetadataBean(
+                    id_=f'/benchmark/{number}', title=f'Title {number}', artist=['Artist'], duration=180_000_000),
+                PlaybackPropertyName.PlaybackStatus: PlaybackStatus.Playing,
+                PlaybackPropertyName.Position: 0,
+            })
+            for step in range(20):
+                player.set_playback_property(PlaybackPropertyName.Volume, step / 20)
+            for _ in range(3):
+                await player._dispatch('on_next')
+            await asyncio.sleep(0.001)
+
+
+async def replay(path: str, speed, flush_interval) -> dict:
+    async with PrivateBus() as bus:
+        player = Mpris2Interface('benchmark', bus_address=bus.address, flush_interval=flush_interval)
+        metrics = player.enable_metrics()
+        await player.connect()
+        results = await Replayer(path, speed).replay(player)
+        await player.flush()
+        results['signals'] = sum(metrics.counters['signals_total'].values())
+        results['properties_changed'] = sum(metrics.counters['properties_changed_total'].values())
+        await player.stop()
+    return results
+
+
+async def run(recording, speed, tracks: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        if recording is None:
+            recording = os.path.join(directory, 'session.rec')
+            await synthetic_session(recording, tracks)
+        return {
+            'immediate': await replay(recording, speed, None),
+            'flush_interval_16ms': await replay(recording, speed, 0.016),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--recording', help='a file written by aionowplaying.interface.recording.Recorder')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='times the recorded pace, as fast as possible if unset')
+    parser.add_argument('--tracks', type=int, default=200, help='track changes in the synthetic session')
+    args = parser.parse_args()
+    report('replay', asyncio.run(run(args.recording, args.speed, args.tracks)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Writing and restoring a state snapshot with a large tracklist: the time to encode and write the
+file, to write it again after a property change (tracks reused), and to restore it into a new player.
+
+    python benchmarks/bench_snapshot.py [--tracks 50000] [--compact]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from common import report
+
+from aionowplaying.interface.base import PlaybackPropertyName, PlaybackStatus, property_models
+from aionowplaying.interface.mpris2 import Mpris2Interface
+
+
+def best_ms(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def run(count: int, compact: bool) -> dict:
+    bean = type(property_models(compact)[1]().Metadata)
+    tracks = [bean(id_=f'/org/aionowplaying/Track/{number}', title=f'Title {number}', album=f'Album {number // 12}',
+                   artist=[f'Artist {number % 800}'], genre=['Rock'], duration=200_000_000, trackNumber=number % 12,
+                   url=f'file:///music/{number}.flac') for number in range(count)]
+    player = Mpris2Interface('benchmark', compact=compact)
+    player.set_playback_property(PlaybackPropertyName.PlaybackStatus, PlaybackStatus.Playing)
+    player.set_tracks(tracks)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'player.snapshot')
+        snapshot = player.enable_snapshots(path)
+        start = time.perf_counter()
+        await snapshot.save()
+        first_ms = (time.perf_counter() - start) * 1000
+        player.set_playback_property(PlaybackPropertyName.Volume, 0.5)
+        start = time.perf_counter()
+        await snapshot.save()
+        again_ms = (time.perf_counter() - start) * 1000
+
+        def restore():
+            restored = Mpris2Interface('benchmark', compact=compact)
+            restored.enable_snapshots(path).restore()
+            assert len(restored._tracklist_bus._tracks) == count
+
+        return {
+            'tracks': count,
+            'file_bytes': os.path.getsize(path),
+            'first_write_ms': round(first_ms, 2),
+            'write_after_change_ms': round(again_ms, 2),
+            'restore_ms': round(best_ms(restore), 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=50000)
+    parser.add_argument('--compact', action='store_true', help='keep state in the __slots__ classes')
+    args = parser.parse_args()
+    report('snapshot', asyncio.run(run(args.tracks, args.compact)))
+
+
+if __name__ == '__main__':
+    main()
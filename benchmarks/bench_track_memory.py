@@ -0,0 +1,80 @@
+"""
+Memory held by a large tracklist with each metadata class: pydantic MetadataBean, CompactMetadataBean
+and FrozenMetadataBean (interned strings, shared tuples). Tracks come from a library with a few hundred
+artists and are built from freshly decoded strings, as when reading tags or D-Bus messages.
+
+    python benchmarks/bench_track_memory.py [--tracks 100000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from common import report
+
+from aionowplaying.interface.compact import CompactMetadataBean, FrozenMetadataBean, shared_interner
+from aionowplaying.interface.models import PlaybackProperties
+from aionowplaying.interface.tracklist import TrackStore
+
+ARTISTS = 400
+ALBUMS = 4000
+GENRES = 25
+
+
+def make_track(bean: type, number: int):
+    album = number // 25 % ALBUMS
+    artist = album % ARTISTS
+    # str() of fresh parts, not constants, so no two tracks share a string object
+    return bean(id_=f'/org/aionowplaying/Track/{number}', title=f'Title {number}', album=f'Album {album}',
+                artist=[f'Artist {artist}', *([f'Artist {artist + 1}'] if number % 7 == 0 else [])],
+                albumArtist=[f'Artist {artist}'], genre=[f'Genre {album % GENRES}'],
+                composer=[f'Composer {artist % 150}'], cover=f'file:///music/{album}/cover.jpg',
+                duration=200_000_000, trackNumber=number % 25, url=f'file:///music/{album}/{number}.flac')
+
+
+def measure(bean: type, count: int) -> dict:
+    shared_interner.clear()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = TrackStore(make_track(bean, number) for number in range(count))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(store) == count
+    return {
+        'bytes_per_track': round(memory / count),
+        'megabytes': round(memory / 2 ** 20, 1),
+        'build_us_per_track': round(elapsed / count * 1e6, 2),
+    }
+
+
+def conversion(count: int) -> dict:
+    beans = [make_track(PlaybackProperties.MetadataBean, number) for number in range(count)]
+    start = time.perf_counter()
+    frozen = [FrozenMetadataBean.freeze(bean) for bean in beans]
+    freeze = time.perf_counter() - start
+    start = time.perf_counter()
+    for bean in frozen:
+        bean.to_model()
+    thaw = time.perf_counter() - start
+    return {'freeze_us_per_track': round(freeze / count * 1e6, 2),
+            'to_model_us_per_track': round(thaw / count * 1e6, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=100_000)
+    args = parser.parse_args()
+    results = {name: measure(bean, args.tracks) for name, bean in (
+        ('pydantic', PlaybackProperties.MetadataBean), ('compact', CompactMetadataBean),
+        ('frozen', FrozenMetadataBean))}
+    results['frozen']['saving_vs_pydantic'] = round(
+        1 - results['frozen']['bytes_per_track'] / results['pydantic']['bytes_per_track'], 2)
+    results['conversion'] = conversion(min(args.tracks, 20_000))
+    report('track_memory', results)
+
+
+if __name__ == '__main__':
+    main()
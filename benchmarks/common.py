@@ -0,0 +1,22 @@
+"""Helpers shared by the benchmark scripts in this directory."""
+import json
+import sys
+import time
+from typing import Callable, Dict
+
+
+def per_call(fn: Callable[[], object], number: int = 10000, repeat: int = 5) -> float:
+    """Best time of ``repeat`` runs of ``number`` calls, in microseconds per call."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+
+def report(name: str, results: Dict[str, object]):
+    """Print benchmark results as one JSON document on stdout."""
+    json.dump({'benchmark': name, 'python': sys.version.split()[0], 'results': results}, sys.stdout, indent=2)
+    sys.stdout.write('\n')
@@ -0,0 +1,178 @@
+"""
+End-to-end benchmark suite for the MPRIS backend, run against a private dbus-daemon.
+
+Measures property-set throughput, PropertiesChanged latency seen by a subscribed client,
+Get/GetAll latency on the Player interface, Play/Pause/Seek round trips, memory per player
+and import time, and prints the results as JSON so versions can be compared.
+
+    python benchmarks/suite.py [--iterations 2000] [--players 50] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from dbus_next import Message, MessageType
+from dbus_next.aio import MessageBus
+
+from bench_import import CASES, importtime
+from common import report
+
+from aionowplaying.interface.base import PlaybackPropertyName, PlaybackStatus
+from aionowplaying.interface.mpris2 import Mpris2Interface
+from aionowplaying.testing import PrivateBus
+
+PLAYER_NAME = 'org.mpris.MediaPlayer2.benchmark'
+OBJECT_PATH = '/org/mpris/MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+
+
+class BenchmarkPlayer(Mpris2Interface):
+    async def on_play(self):
+        self.set_playback_property(PlaybackPropertyName.PlaybackStatus, PlaybackStatus.Playing)
+
+    async def on_pause(self):
+        self.set_playback_property(PlaybackPropertyName.PlaybackStatus, PlaybackStatus.Paused)
+
+    async def on_seek(self, offset: int):
+        self.set_playback_property(PlaybackPropertyName.Position,
+                                   self.get_playback_property(PlaybackPropertyName.Position) + offset)
+
+
+def summarize(samples) -> dict:
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 1),
+    }
+
+
+async def start_player(address: str, name: str = 'benchmark') -> BenchmarkPlayer:
+    player = BenchmarkPlayer(name, bus_address=address)
+    player.set_playback_properties({
+        PlaybackPropertyName.CanPlay: True,
+        PlaybackPropertyName.CanPause: True,
+        PlaybackPropertyName.CanSeek: True,
+        PlaybackPropertyName.CanControl: True,
+    })
+    player.task = asyncio.ensure_future(player.start())
+    await player.ready.wait()
+    return player
+
+
+async def drain(bus: MessageBus):
+    # Replies come back in order, so once this returns everything queued before was written.
+    await bus.call(Message(destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+                           interface='org.freedesktop.DBus.Peer', member='Ping'))
+
+
+async def bench_set_throughput(player: BenchmarkPlayer, iterations: int, burst: int = 100) -> dict:
+    # dbus_next gives up on the connection when the socket buffer fills up,
+    # so sets are timed in bursts with the queue drained in between.
+    elapsed = 0.0
+    for offset in range(0, iterations, burst):
+        start = time.perf_counter()
+        for i in range(offset, min(offset + burst, iterations)):
+            player.set_playback_property(PlaybackPropertyName.Volume, i / iterations)
+        elapsed += time.perf_counter() - start
+        await drain(player.dbus)
+    return {'sets_per_second': round(iterations / elapsed)}
+
+
+async def bench_signal_latency(player: BenchmarkPlayer, client: MessageBus, iterations: int) -> dict:
+    await client.call(Message(destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+                              interface='org.freedesktop.DBus', member='AddMatch', signature='s',
+                              body=[f"type='signal',interface='org.freedesktop.DBus.Properties',"
+                                    f"member='PropertiesChanged',path='{OBJECT_PATH}'"]))
+    received = asyncio.Queue()
+
+    def on_message(msg: Message):
+        if msg.message_type == MessageType.SIGNAL and msg.member == 'PropertiesChanged':
+            received.put_nowait(time.perf_counter())
+
+    client.add_message_handler(on_message)
+    samples = []
+    for i in range(iterations):
+        sent = time.perf_counter()
+        player.set_playback_property(PlaybackPropertyName.Rate, 1.0 + i % 2)
+        samples.append(await received.get() - sent)
+    client.remove_message_handler(on_message)
+    return summarize(samples)
+
+
+async def bench_calls(client: MessageBus, iterations: int, make_message) -> dict:
+    samples = []
+    for _ in range(iterations):
+        msg = make_message()
+        start = time.perf_counter()
+        reply = await client.call(msg)
+        samples.append(time.perf_counter() - start)
+        if reply.message_type == MessageType.ERROR:
+            raise RuntimeError(f'{msg.member} failed: {reply.body}')
+    return summarize(samples)
+
+
+def properties_call(member: str, *body) -> Message:
+    signature = {'Get': 'ss', 'GetAll': 's'}[member]
+    return Message(destination=PLAYER_NAME, path=OBJECT_PATH, interface='org.freedesktop.DBus.Properties',
+                   member=member, signature=signature, body=[PLAYER_INTERFACE, *body])
+
+
+def player_call(member: str, signature: str = '', body=()) -> Message:
+    return Message(destination=PLAYER_NAME, path=OBJECT_PATH, interface=PLAYER_INTERFACE,
+                   member=member, signature=signature, body=list(body))
+
+
+async def bench_memory_per_player(address: str, count: int) -> dict:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    players = [await start_player(address, f'memory.instance{i}') for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for player in players:
+        await player.stop()
+    return {'players': count, 'bytes_per_player': round((after - before) / count)}
+
+
+async def run(args) -> dict:
+    results = dict()
+    async with PrivateBus() as bus:
+        player = await start_player(bus.address)
+        client = await MessageBus(bus_address=bus.address).connect()
+
+        results['set_property_throughput'] = await bench_set_throughput(player, args.iterations)
+        results['properties_changed_latency'] = await bench_signal_latency(player, client, args.iterations)
+        results['get_latency'] = await bench_calls(
+            client, args.iterations, lambda: properties_call('Get', 'PlaybackStatus'))
+        results['get_all_latency'] = await bench_calls(client, args.iterations, lambda: properties_call('GetAll'))
+        for member, signature, body in (('Play', '', ()), ('Pause', '', ()), ('Seek', 'x', (1000,))):
+            results[f'{member.lower()}_round_trip'] = await bench_calls(
+                client, args.iterations, lambda: player_call(member, signature, body))
+
+        client.disconnect()
+        await player.stop()
+        results['memory_per_player'] = await bench_memory_per_player(bus.address, args.players)
+    results['import_time'] = {name: importtime(code) for name, code in CASES.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--output', help='also write the JSON results to this file')
+    args = parser.parse_args()
+    results = asyncio.run(run(args))
+    report('suite', results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'benchmark': 'suite', 'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
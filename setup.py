@@ -13,7 +13,7 @@ install_requires = \
 extras_require = \
 {':sys_platform == "darwin"': ['pyobjc-framework-MediaPlayer',
                                'pyobjc-framework-Cocoa'],
- ':sys_platform == "linux"': ['dbus-next'],
+ ':sys_platform == "linux"': ['dbus-next==0.2.3'],
  ':sys_platform == "win32"': ['winsdk']}
 
 setup_kwargs = {
@@ -1,12 +1,36 @@
 __all__ = ['select_interface', 'BaseInterface', 'PropertyName', 'LoopStatus', 'PlaybackPropertyName',
            'PlaybackProperties', 'PlaybackStatus', 'NowPlayingInterface']
 
-from typing import Type
+import importlib
+from typing import Type, TYPE_CHECKING
 
-from aionowplaying.interface import select_interface, BaseInterface
-from aionowplaying.interface.base import PropertyName, LoopStatus, PlaybackPropertyName, PlaybackProperties, \
-    PlaybackStatus
+from aionowplaying.interface import select_interface
+from aionowplaying.interface.enums import PropertyName, LoopStatus, PlaybackPropertyName, PlaybackStatus
 
-NowPlayingInterface: Type[BaseInterface] = select_interface()
-if NowPlayingInterface is None:
-    raise NotImplemented()
+if TYPE_CHECKING:
+    from aionowplaying.interface.base import BaseInterface
+    from aionowplaying.interface.models import PlaybackProperties
+
+    NowPlayingInterface: Type[BaseInterface]
+
+# Resolved on first access, so importing the package for the enums does not load
+# pydantic or the platform backend (dbus_next, winrt, pyobjc).
+_LAZY_ATTRIBUTES = {
+    'BaseInterface': 'aionowplaying.interface.base',
+    'PlaybackProperties': 'aionowplaying.interface.models',
+}
+
+
+def __getattr__(name: str):
+    if name == 'NowPlayingInterface':
+        value = select_interface()
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,294 @@
+"""
+Client side of MPRIS: a local mirror of every player on the bus.
+
+::
+
+    client = MprisClient()
+    await client.connect()
+    for name, player in client.players.items():
+        print(name, player.get_playback_property(PlaybackPropertyName.Metadata).title)
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from dbus_next import Message, MessageType, Variant
+from dbus_next.aio import MessageBus
+
+from aionowplaying.interface.base import property_models
+from aionowplaying.interface.clock import PlaybackClock
+from aionowplaying.interface.enums import LoopStatus, PlaybackPropertyName, PlaybackStatus, PropertyName
+from aionowplaying.interface.mpris2 import DBusBeanMapper
+
+logger = logging.getLogger(__name__)
+
+MPRIS_PREFIX = 'org.mpris.MediaPlayer2.'
+MPRIS_PATH = '/org/mpris/MediaPlayer2'
+ROOT_INTERFACE = 'org.mpris.MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+PROPERTIES_INTERFACE = 'org.freedesktop.DBus.Properties'
+
+_MATCH_RULES = (
+    f"type='signal',sender='org.freedesktop.DBus',interface='org.freedesktop.DBus',"
+    f"member='NameOwnerChanged',arg0namespace='{ROOT_INTERFACE}'",
+    f"type='signal',interface='{PROPERTIES_INTERFACE}',member='PropertiesChanged',path='{MPRIS_PATH}'",
+    f"type='signal',interface='{PLAYER_INTERFACE}',member='Seeked',path='{MPRIS_PATH}'",
+)
+_PROPERTY_NAMES = {
+    ROOT_INTERFACE: frozenset(name.value for name in PropertyName),
+    PLAYER_INTERFACE: frozenset(name.value for name in PlaybackPropertyName),
+}
+
+
+class RemotePlayer:
+    """
+    Mirrored state of one player on the bus, reads never touch the bus.
+    ``properties`` and ``playback`` hold the root and Player interface properties in the
+    same models the publishing side uses, Position is extrapolated by a :class:`PlaybackClock`.
+    """
+
+    def __init__(self, name: str, owner: Optional[str], compact: bool = False):
+        player_model, playback_model, _ = property_models(compact)
+        self.name = name
+        self.owner = owner
+        self.properties = player_model()
+        self.playback = playback_model()
+        self.ready = False
+        self._clock = PlaybackClock()
+
+    def __repr__(self) -> str:
+        return f'RemotePlayer({self.name!r}, owner={self.owner!r})'
+
+    @property
+    def position(self) -> int:
+        return self._clock.position
+
+    def get_property(self, name: PropertyName) -> Any:
+        return getattr(self.properties, name.value)
+
+    def get_playback_property(self, name: PlaybackPropertyName) -> Any:
+        if name == PlaybackPropertyName.Position:
+            return self._clock.position
+        return getattr(self.playback, name.value)
+
+    def apply(self, interface: str, changed: Dict[str, Any]) -> List[str]:
+        """Store the changed values (a PropertiesChanged or GetAll body), return the names that were stored."""
+        names = _PROPERTY_NAMES.get(interface)
+        if names is None:
+            return []
+        target = self.properties if interface == ROOT_INTERFACE else self.playback
+        applied = []
+        for name, variant in changed.items():
+            if name not in names:
+                continue
+            try:
+                value = self._convert(name, variant.value)
+            except ValueError:
+                continue
+            setattr(target, name, value)
+            if target is self.playback:
+                self._update_clock(name, value)
+            applied.append(name)
+        return applied
+
+    def _convert(self, name: str, value: Any) -> Any:
+        if name == PlaybackPropertyName.Metadata:
+            return DBusBeanMapper.parse_metadata(value, type(self.playback).MetadataBean)
+        if name == PlaybackPropertyName.PlaybackStatus:
+            return PlaybackStatus(value)
+        if name == PlaybackPropertyName.LoopStatus:
+            return LoopStatus(value)
+        return value
+
+    def _update_clock(self, name: str, value: Any):
+        if name == PlaybackPropertyName.Position:
+            self._clock.seek(value)
+        elif name == PlaybackPropertyName.PlaybackStatus:
+            self._clock.set_playing(value == PlaybackStatus.Playing)
+        elif name == PlaybackPropertyName.Rate:
+            self._clock.set_rate(value)
+        elif name == PlaybackPropertyName.Metadata:
+            self._clock.duration = value.duration
+
+
+class MprisClient:
+    """
+    Discovers the ``org.mpris.MediaPlayer2.*`` players on a bus and mirrors their root and
+    Player properties. Every player is read with one GetAll per interface when it appears,
+    afterwards the mirror is only updated from its PropertiesChanged and Seeked signals.
+
+    Override the ``on_*`` methods to be told about changes, they are called on the event loop.
+    """
+
+    def __init__(self, bus_address: Optional[str] = None, compact: bool = False, concurrency: int = 32,
+                 call_timeout: float = 5.0):
+        """
+        :param bus_address: Connect to this D-Bus address instead of the session bus.
+        :type bus_address: str
+        :param compact: Mirror into the ``__slots__`` classes of :mod:`aionowplaying.interface.compact`
+            instead of pydantic models.
+        :type compact: bool
+        :param concurrency: At most this many GetAll calls are in flight at a time.
+        :type concurrency: int
+        :param call_timeout: Seconds to wait for a player to answer a call. A player that doesn't answer
+            GetAll in time is added with default values, its signals fill them in.
+        :type call_timeout: float
+        """
+        self.dbus: Optional[MessageBus] = None
+        self.players: Dict[str, RemotePlayer] = dict()
+        self._bus_address = bus_address
+        self._compact = compact
+        self._limit = asyncio.Semaphore(concurrency)
+        self._call_timeout = call_timeout
+        self._by_owner: Dict[str, Dict[str, RemotePlayer]] = dict()
+        self._tasks = set()
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.players
+
+    def __getitem__(self, name: str) -> RemotePlayer:
+        return self.players[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.players)
+
+    def on_player_added(self, player: RemotePlayer):
+        pass
+
+    def on_player_removed(self, player: RemotePlayer):
+        pass
+
+    def on_properties_changed(self, player: RemotePlayer, interface: str, names: List[str]):
+        pass
+
+    def on_seeked(self, player: RemotePlayer, position: int):
+        pass
+
+    async def connect(self):
+        """Connect, subscribe to the signals and load every player already on the bus."""
+        self.dbus = await MessageBus(bus_address=self._bus_address).connect()
+        self.dbus.add_message_handler(self._on_message)
+        # subscribe before listing, a player appearing in between is reported by NameOwnerChanged
+        await asyncio.gather(*(self._bus_call('AddMatch', 's', [rule]) for rule in _MATCH_RULES))
+        reply = await self._bus_call('ListNames')
+        names = [name for name in reply.body[0] if name.startswith(MPRIS_PREFIX)]
+        await self._load_players(names)
+
+    async def close(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.dbus is not None:
+            self.dbus.disconnect()
+            self.dbus = None
+
+    async def _bus_call(self, member: str, signature: str = '', body: Iterable[Any] = ()) -> Message:
+        return await self.dbus.call(Message(destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+                                            interface='org.freedesktop.DBus', member=member,
+                                            signature=signature, body=list(body)))
+
+    async def _player_call(self, player: RemotePlayer, member: str, signature: str, body: list) -> Message:
+        return await asyncio.wait_for(self.dbus.call(Message(
+            destination=player.name, path=MPRIS_PATH, interface=PROPERTIES_INTERFACE, member=member,
+            signature=signature, body=body)), self._call_timeout)
+
+    async def _load_players(self, names: List[str]):
+        names = [name for name in names if name not in self.players]
+        # owners first, so signals are matched to the players while their GetAll replies are pending
+        replies = await asyncio.gather(*(self._bus_call('GetNameOwner', 's', [name]) for name in names))
+        players = [self._add_player(name, reply.body[0] if reply.message_type == MessageType.METHOD_RETURN else None)
+                   for name, reply in zip(names, replies) if name not in self.players]
+        await asyncio.gather(*(self._load(player) for player in players))
+
+    def _add_player(self, name: str, owner: Optional[str]) -> RemotePlayer:
+        player = RemotePlayer(name, owner, self._compact)
+        self.players[name] = player
+        if owner is not None:
+            self._by_owner.setdefault(owner, dict())[name] = player
+        return player
+
+    def _remove_player(self, name: str):
+        player = self.players.pop(name, None)
+        if player is None:
+            return
+        owned = self._by_owner.get(player.owner)
+        if owned is not None:
+            owned.pop(name, None)
+            if not owned:
+                del self._by_owner[player.owner]
+        if player.ready:
+            self.on_player_removed(player)
+
+    async def _load(self, player: RemotePlayer):
+        # Signals received before a GetAll reply were sent before it, so the reply supersedes them
+        # and is applied over whatever they stored.
+        async with self._limit:
+            try:
+                replies = await asyncio.gather(*(self._player_call(player, 'GetAll', 's', [interface])
+                                                 for interface in (ROOT_INTERFACE, PLAYER_INTERFACE)))
+            except Exception as e:
+                # don't hold up the other players, this one keeps its defaults until it signals changes
+                logger.warning('loading %s failed: %r', player.name, e)
+                replies = ()
+        if self.players.get(player.name) is not player:
+            return  # left the bus while loading
+        for interface, reply in zip((ROOT_INTERFACE, PLAYER_INTERFACE), replies):
+            if reply.message_type == MessageType.METHOD_RETURN:
+                player.apply(interface, reply.body[0])
+            if player.owner is None and reply.sender:
+                player.owner = reply.sender
+                self._by_owner.setdefault(reply.sender, dict())[player.name] = player
+        player.ready = True
+        self.on_player_added(player)
+
+    def _on_message(self, message: Message):
+        if message.message_type != MessageType.SIGNAL:
+            return
+        if message.member == 'NameOwnerChanged' and message.interface == 'org.freedesktop.DBus':
+            name, old_owner, new_owner = message.body
+            if not name.startswith(MPRIS_PREFIX):
+                return
+            if old_owner:
+                self._remove_player(name)
+            if new_owner:
+                self._spawn(self._load(self._add_player(name, new_owner)))
+            return
+        if message.path != MPRIS_PATH:
+            return
+        for player in self._by_owner.get(message.sender, dict()).values():
+            if message.member == 'PropertiesChanged':
+                interface, changed, invalidated = message.body
+                names = player.apply(interface, changed)
+                if invalidated:
+                    self._spawn(self._refresh(player, interface, invalidated))
+                if names and player.ready:
+                    self.on_properties_changed(player, interface, names)
+            elif message.member == 'Seeked':
+                player.apply(PLAYER_INTERFACE, {PlaybackPropertyName.Position.value: Variant('x', message.body[0])})
+                if player.ready:
+                    self.on_seeked(player, message.body[0])
+
+    async def _refresh(self, player: RemotePlayer, interface: str, names: List[str]):
+        # invalidated properties are announced without their values, read them once
+        changed = dict()
+        for name in names:
+            reply = await self._player_call(player, 'Get', 'ss', [interface, name])
+            if reply.message_type == MessageType.METHOD_RETURN:
+                changed[name] = reply.body[0]
+        names = player.apply(interface, changed)
+        if names and player.ready:
+            self.on_properties_changed(player, interface, names)
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning('updating a player failed: %r', task.exception())
@@ -1,19 +1,39 @@
 import importlib
 import sys
-from typing import Type
+from functools import lru_cache
+from typing import Type, TYPE_CHECKING
 
-from aionowplaying.interface.base import BaseInterface
+if TYPE_CHECKING:
+    from aionowplaying.interface.base import BaseInterface
 
 INTERFACES_BY_SYSTEM = {
     'linux': 'aionowplaying.interface.mpris2.Mpris2Interface',
     'win32': 'aionowplaying.interface.windows.WindowsInterface',
     'darwin': 'aionowplaying.interface.macos.MacOSInterface',
+    # not a platform, for consumers on the same machine; only selected by name
+    'unix-socket': 'aionowplaying.interface.unixsocket.UnixSocketInterface',
 }
+FALLBACK_INTERFACE = 'aionowplaying.interface.headless.HeadlessInterface'
 
 
-def select_interface(system: str = None) -> Type[BaseInterface]:
+@lru_cache(maxsize=None)
+def select_interface(system: str = None) -> Type['BaseInterface']:
+    """
+    Import and return the backend class for ``system`` (defaults to the running platform),
+    or ``'unix-socket'`` for :class:`~aionowplaying.interface.unixsocket.UnixSocketInterface`.
+    Unknown platforms get :class:`~aionowplaying.interface.headless.HeadlessInterface`.
+    The result is cached, the backend module is only imported on the first call.
+    """
     if system is None:
         system = sys.platform
-    name = INTERFACES_BY_SYSTEM.get(system, 'aionowplaying.interface.base.BaseInterface')
+    name = INTERFACES_BY_SYSTEM.get(system, FALLBACK_INTERFACE)
     mod = name.rsplit('.', 1)
     return getattr(importlib.import_module(mod[0]), mod[1])
+
+
+def __getattr__(name: str):
+    # BaseInterface pulls in pydantic, keep it off the import path of this package.
+    if name == 'BaseInterface':
+        from aionowplaying.interface.base import BaseInterface
+        return BaseInterface
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,141 @@
+"""
+Content-addressed cache for cover art, so artwork can be published as a ``file://`` URL.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+Image = Union[bytes, bytearray, memoryview, str, os.PathLike]
+
+# leading bytes of the image formats clients commonly decode, for the file extension
+_SIGNATURES = (
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'BM', '.bmp'),
+)
+
+
+def image_extension(data: bytes) -> str:
+    for signature, extension in _SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    return ''
+
+
+def default_directory() -> Path:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache_home, 'aionowplaying', 'covers')
+
+
+class CoverArtCache:
+    """
+    Stores images once under the hash of their content, identical album art of many tracks
+    shares one file. The least recently stored files are removed once the cache grows
+    beyond ``max_bytes``. :meth:`store` hashes and writes in the default executor,
+    so large embedded images do not hold up the event loop.
+
+    ::
+
+        url = await cache.store(track.embedded_picture)
+        player.set_playback_property(PlaybackPropertyName.Metadata, metadata.model_copy(update={'cover': url}))
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike, None] = None, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory) if directory is not None else default_directory()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Optional['OrderedDict[str, int]'] = None  # file name -> size, oldest first
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached files in bytes."""
+        with self._lock:
+            self._load_entries()
+            return self._size
+
+    async def store(self, image: Image) -> str:
+        """
+        Cache ``image``, given as its bytes or the path of an image file, and return its ``file://`` URL.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.store_sync, image)
+
+    def store_sync(self, image: Image) -> str:
+        """Blocking version of :meth:`store`."""
+        if isinstance(image, (str, os.PathLike)):
+            image = Path(image).read_bytes()
+        image = bytes(image)
+        name = hashlib.blake2b(image, digest_size=16).hexdigest() + image_extension(image)
+        path = self.directory / name
+        with self._lock:
+            self._load_entries()
+            cached = name in self._entries
+            if cached:
+                self._entries.move_to_end(name)
+        if cached:
+            try:
+                os.utime(path)  # keeps the recency order across restarts
+                return path.as_uri()
+            except FileNotFoundError:
+                pass  # removed behind our back, write it again
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # written to a temporary file first, clients never see a partial image
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(image)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = len(image)
+                self._size += len(image)
+            self._entries.move_to_end(name)
+            self._evict(keep=name)
+        return path.as_uri()
+
+    def clear(self):
+        with self._lock:
+            self._load_entries()
+            for name in list(self._entries):
+                self._remove(name)
+
+    def _load_entries(self):
+        # files left by earlier runs, oldest modification first
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        self._size = 0
+        if not self.directory.is_dir():
+            return
+        files = [entry for entry in os.scandir(self.directory)
+                 if entry.is_file() and not entry.name.startswith('.tmp-')]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            size = entry.stat().st_size
+            self._entries[entry.name] = size
+            self._size += size
+
+    def _evict(self, keep: str):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            name = next(iter(self._entries))
+            if name == keep:
+                break
+            self._remove(name)
+
+    def _remove(self, name: str):
+        self._size -= self._entries.pop(name)
+        try:
+            os.unlink(self.directory / name)
+        except FileNotFoundError:
+            pass
@@ -1,116 +1,74 @@
-from enum import Enum
-from typing import Any, List
-from pydantic import BaseModel
-
-
-class TrackListPropertyName(str, Enum):
-    Tracks = 'Tracks'
-    CanEditTracks = 'CanEditTracks'
-
-
-class PropertyName(str, Enum):
-    CanQuit = "CanQuit"
-    CanSetFullscreen = "CanSetFullscreen"
-    CanRaise = "CanRaise"
-    HasTrackList = "HasTrackList"
-    Identity = "Identity"
-    DesktopEntry = "DesktopEntry"
-    SupportedUriSchemes = "SupportedUriSchemes"
-    SupportedMimeTypes = "SupportedMimeTypes"
-    Fullscreen = "Fullscreen"
-
-
-class PlaybackPropertyName(str, Enum):
-    PlaybackStatus = "PlaybackStatus"
-    LoopStatus = "LoopStatus"
-    Rate = "Rate"
-    Shuffle = "Shuffle"
-    Metadata = "Metadata"
-    Volume = "Volume"
-    Position = "Position"
-    Duration = "Duration"
-    MinimumRate = "MinimumRate"
-    MaximumRate = "MaximumRate"
-    CanGoNext = "CanGoNext"
-    CanGoPrevious = "CanGoPrevious"
-    CanPlay = "CanPlay"
-    CanPause = "CanPause"
-    CanSeek = "CanSeek"
-    CanControl = "CanControl"
-
-
-class PlaybackStatus(str, Enum):
-    Playing = "Playing"
-    Paused = "Paused"
-    Stopped = "Stopped"
-
-
-class LoopStatus(str, Enum):
-    None_ = "None"
-    Track = "Track"
-    Playlist = "Playlist"
-
-
-class MediaType(str, Enum):
-    Music = "Music"
-    Video = "Video"
-    Image = "Image"
-
-
-class TrackListProperties(BaseModel):
-    Tracks: List[str] = []
-    CanEditTracks: bool = False
-
-
-class PlayerProperties(BaseModel):
-    Fullscreen: bool = False
-    CanQuit: bool = False
-    CanSetFullscreen: bool = False
-    CanRaise: bool = False
-    HasTrackList: bool = False
-    Identity: str = ""
-    DesktopEntry: str = ""
-    SupportedUriSchemes: List[str] = []
-    SupportedMimeTypes: List[str] = []
-
-
-class PlaybackProperties(BaseModel):
-    class MetadataBean(BaseModel):
-        id_: str = ''
-        media_type: 'MediaType' = MediaType.Music
-        duration: int = 0  # in microseconds
-        cover: str = ''
-        album: str = ''
-        albumArtist: List[str] = []
-        artist: List[str] = []
-        lyrics: str = ''
-        comments: List[str] = []
-        composer: List[str] = []
-        genre: List[str] = []
-        lyricist: List[str] = []
-        title: str = "Unknown"
-        trackNumber: int = 0
-        url: str = ''
-
-    PlaybackStatus: 'PlaybackStatus' = PlaybackStatus.Stopped
-    LoopStatus: 'LoopStatus' = LoopStatus.None_
-    Rate: float = 1.0
-    Shuffle: bool = False
-    Metadata: MetadataBean = MetadataBean()
-    Volume: float = 1.0
-    Position: int = 0  # in microseconds
-    Duration: int = 0  # in microseconds
-    MinimumRate: float = 1.0
-    MaximumRate: float = 1.0
-    CanGoNext: bool = False
-    CanGoPrevious: bool = False
-    CanPlay: bool = False
-    CanPause: bool = False
-    CanSeek: bool = False
-    CanControl: bool = False
+import asyncio
+import functools
+import importlib
+import inspect
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple, Union, TYPE_CHECKING
+
+from aionowplaying.interface.dispatch import CommandDispatcher
+from aionowplaying.interface.enums import TrackListPropertyName, PropertyName, PlaybackPropertyName, PlaybackStatus, \
+    LoopStatus, MediaType, PlaylistOrdering
+from aionowplaying.interface.tracklist import NO_TRACK, TrackStore
+
+if TYPE_CHECKING:
+    from aionowplaying.interface.artcache import CoverArtCache, Image
+    from aionowplaying.interface.metrics import Metrics
+    from aionowplaying.interface.models import TrackListProperties, PlayerProperties, PlaybackProperties
+    from aionowplaying.interface.playlists import Playlist
+    from aionowplaying.interface.service_thread import ServiceThread
+    from aionowplaying.interface.snapshot import StateSnapshot
+    from aionowplaying.interface.tracing import CallTrace, Tracer
+
+# The pydantic models are imported on first access, see property_models().
+_MODELS = ('TrackListProperties', 'PlayerProperties', 'PlaybackProperties')
+
+
+def __getattr__(name: str):
+    if name in _MODELS:
+        return getattr(importlib.import_module('aionowplaying.interface.models'), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def property_models(compact: bool = False) -> Tuple[type, type, type]:
+    """
+    Return the classes backends keep their state in, as
+    ``(PlayerProperties, PlaybackProperties, TrackListProperties)``.
+    With ``compact`` the ``__slots__`` based classes from :mod:`aionowplaying.interface.compact`
+    are returned, which do not need pydantic; validation is then an explicit step,
+    see :meth:`~aionowplaying.interface.compact.SlotsModel.validate`.
+    """
+    if compact:
+        from aionowplaying.interface.compact import CompactPlayerProperties, CompactPlaybackProperties, \
+            CompactTrackListProperties
+        return CompactPlayerProperties, CompactPlaybackProperties, CompactTrackListProperties
+    from aionowplaying.interface.models import PlayerProperties, PlaybackProperties, TrackListProperties
+    return PlayerProperties, PlaybackProperties, TrackListProperties
+
+
+async def _invoke(handler: Callable, args: tuple) -> Any:
+    result = handler(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
 
 
 class BaseInterface:
+    # Per player, created on first use of set_cover_art() unless one is assigned; assign the same
+    # cache to several players to share it.
+    cover_art_cache: Optional['CoverArtCache'] = None
+    # Where on_* handlers run, see _call_handler().
+    callback_executor: Union[Executor, asyncio.AbstractEventLoop, None] = None
+    # Set while the backend runs in a ServiceThread, setters called from other threads are queued to it.
+    _service_thread: Optional['ServiceThread'] = None
+    _dispatcher: Optional[CommandDispatcher] = None
+    # None unless enable_metrics() was called, instrumented code checks this first.
+    metrics: Optional['Metrics'] = None
+    # None unless enable_tracing() was called, incoming calls are not wrapped until then.
+    tracer: Optional['Tracer'] = None
+    # None unless enable_snapshots() was called.
+    snapshot: Optional['StateSnapshot'] = None
+
     def __init__(self, name: str):
         pass
 
@@ -211,9 +169,9 @@ class BaseInterface:
         This will only be called if you set :attr:`PlaybackProperties.CanPause` to True.
         """
         if self.get_playback_property(PlaybackPropertyName.PlaybackStatus) == PlaybackStatus.Playing:
-            await self.on_pause()
+            await self._call_handler(self.on_pause)
         else:
-            await self.on_play()
+            await self._call_handler(self.on_play)
 
     async def on_play(self):
         """
@@ -234,9 +192,166 @@ class BaseInterface:
     async def on_set_position(self, track_id: str, position: int):
         pass
 
+    async def on_add_track(self, uri: str, after_track: str, set_as_current: bool):
+        """
+        This will be called when nowplaying backend want to add a track to the tracklist.
+        This will only be called if you set :attr:`TrackListProperties.CanEditTracks` to True.
+        :param uri: The uri of the item to add.
+        :type uri: str
+        :param after_track: The track id to insert after, or
+            :data:`~aionowplaying.interface.tracklist.NO_TRACK` to insert at the start.
+        :type after_track: str
+        :param set_as_current: Whether the new track should become the current track.
+        :type set_as_current: bool
+        """
+        pass
+
+    async def on_remove_track(self, track_id: str):
+        """
+        This will be called when nowplaying backend want to remove a track from the tracklist.
+        This will only be called if you set :attr:`TrackListProperties.CanEditTracks` to True.
+        :param track_id: The id of the track to remove.
+        :type track_id: str
+        """
+        pass
+
+    async def on_go_to(self, track_id: str):
+        """
+        This will be called when nowplaying backend want to skip to a track in the tracklist.
+        :param track_id: The id of the track to play.
+        :type track_id: str
+        """
+        pass
+
+    async def on_activate_playlist(self, playlist_id: str):
+        """
+        This will be called when nowplaying backend want to start playing a playlist.
+        :param playlist_id: The id of the playlist to activate.
+        :type playlist_id: str
+        """
+        pass
+
     async def seeked(self, position: int):
         pass
 
+    def enable_metrics(self, labels: Optional[Mapping[str, str]] = None) -> 'Metrics':
+        """
+        Start collecting metrics, see :meth:`get_stats` and :class:`~aionowplaying.interface.metrics.Metrics`
+        for the Prometheus exposition. Until this is called the backends only maintain the
+        :attr:`dispatcher` counters.
+        :param labels: Labels added to every exported sample, e.g. ``{'player': 'kitchen'}``.
+        :type labels: Mapping[str, str]
+        """
+        if self.metrics is None:
+            from aionowplaying.interface.metrics import Metrics
+            self.metrics = Metrics(labels=labels)
+            self.metrics.gauge('queue_depth', 'dispatcher', lambda: self.dispatcher.pending())
+            self.metrics.gauge('queue_depth', 'service_thread',
+                               lambda: len(self._service_thread._pending) if self._service_thread else 0)
+            self._install_metrics()
+        return self.metrics
+
+    def _install_metrics(self):
+        """Hook :attr:`metrics` into the backend's transport, called when metrics get enabled."""
+        pass
+
+    def enable_tracing(self, slow_threshold: float = 0.05, capacity: int = 64,
+                       hook: Optional[Callable[['CallTrace'], None]] = None) -> 'Tracer':
+        """
+        Time every incoming method call and property write, stage by stage, see
+        :class:`~aionowplaying.interface.tracing.CallTrace`. Until this is called nothing is wrapped.
+        :param slow_threshold: Calls taking this many seconds or longer are logged and kept.
+        :param capacity: How many of the latest slow calls :meth:`Tracer.slow_calls` returns.
+        :param hook: Called with every finished trace, more can be added with :meth:`Tracer.add_hook`.
+        """
+        if self.tracer is None:
+            from aionowplaying.interface.tracing import Tracer
+            self.tracer = Tracer(slow_threshold, capacity, hook)
+            self._install_tracing()
+        elif hook is not None:
+            self.tracer.add_hook(hook)
+        return self.tracer
+
+    def disable_tracing(self):
+        """Stop tracing, the backend's calls are no longer wrapped."""
+        if self.tracer is not None:
+            self._uninstall_tracing()
+            self.tracer = None
+
+    def _install_tracing(self):
+        """Wrap the backend's incoming calls with :attr:`tracer`, called when tracing gets enabled."""
+        pass
+
+    def _uninstall_tracing(self):
+        pass
+
+    def enable_snapshots(self, path: str, interval: float = 1.0) -> 'StateSnapshot':
+        """
+        Keep the player's state in the file ``path``, see :class:`~aionowplaying.interface.snapshot.StateSnapshot`.
+        :meth:`start` restores the state in the file, if there is one, before the player shows up on the
+        bus; values set before that are replaced. Changes are written at most once per ``interval`` seconds.
+        """
+        if self.snapshot is None:
+            from aionowplaying.interface.snapshot import StateSnapshot
+            self.snapshot = StateSnapshot(self, path, interval)
+        return self.snapshot
+
+    def _snapshot_tracks(self) -> Optional[TrackStore]:
+        """The tracks :attr:`snapshot` saves, None if the backend keeps no tracklist."""
+        return None
+
+    def _restore_tracks(self, track_ids: List[str], encoded: List[Any], decode: Callable[[Any], Any]):
+        """Replace the tracklist with tracks from :attr:`snapshot`, backends may defer ``decode``."""
+        self.set_tracks([decode(metadata) for metadata in encoded])
+
+    def get_stats(self) -> dict:
+        """Command dispatcher counters and, if enabled, a snapshot of :attr:`metrics`."""
+        stats = {'dispatcher': self.dispatcher.stats()}
+        if self.metrics is not None:
+            stats.update(self.metrics.snapshot())
+        return stats
+
+    @property
+    def dispatcher(self) -> CommandDispatcher:
+        """The :class:`CommandDispatcher` backends route incoming commands through."""
+        if self._dispatcher is None:
+            self._dispatcher = CommandDispatcher(self)
+        return self._dispatcher
+
+    def _dispatch(self, handler: str, *args) -> 'asyncio.Future':
+        """
+        Hand a command to the ``on_*`` handler named ``handler`` through :attr:`dispatcher`.
+        Backends call this instead of the handlers, on the event loop.
+        """
+        return self.dispatcher.dispatch(handler, *args)
+
+    def _queued(self, key: Any, function: Callable, *args) -> bool:
+        """
+        Queue ``function(*args)`` to the :class:`ServiceThread` the backend runs in when called from
+        another thread, calls with the same ``key`` are merged. Returns False if the caller should
+        run it right away.
+        """
+        thread = self._service_thread
+        if thread is None or not thread.foreign():
+            return False
+        return thread.enqueue(key, function, *args)
+
+    async def _call_handler(self, handler: Callable, *args) -> Any:
+        """
+        Call an ``on_*`` handler from a backend, it may be a plain function or a coroutine function.
+        Where it runs depends on :attr:`callback_executor`: on the backend's event loop if that is None,
+        on the given event loop if it is one (e.g. the loop of the application's main thread),
+        otherwise plain functions are submitted to the executor and coroutines stay on the backend's loop.
+        """
+        target = self.callback_executor
+        if target is None:
+            return await _invoke(handler, args)
+        if isinstance(target, asyncio.AbstractEventLoop):
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_invoke(handler, args), target))
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(*args)
+        return await asyncio.get_running_loop().run_in_executor(target, functools.partial(handler, *args))
+
     def set_property(self, name: PropertyName, value: Any):
         pass
 
@@ -246,6 +361,141 @@ class BaseInterface:
     def set_tracklist_property(self, name: TrackListPropertyName, value: Any):
         pass
 
+    def set_properties(self, properties: Mapping[PropertyName, Any]):
+        """
+        Set several player properties at once.
+        Backends publish all of the changes together, as if set inside :meth:`batch`.
+        :param properties: Mapping of property name to new value.
+        :type properties: Mapping[PropertyName, Any]
+        """
+        self._begin_batch()
+        try:
+            for name, value in properties.items():
+                self.set_property(name, value)
+        finally:
+            self._end_batch()
+
+    def set_playback_properties(self, properties: Mapping[PlaybackPropertyName, Any]):
+        """
+        Set several playback properties at once, e.g. everything that changes on a track change.
+        Backends publish all of the changes together, as if set inside :meth:`batch`.
+        :param properties: Mapping of playback property name to new value.
+        :type properties: Mapping[PlaybackPropertyName, Any]
+        """
+        self._begin_batch()
+        try:
+            for name, value in properties.items():
+                self.set_playback_property(name, value)
+        finally:
+            self._end_batch()
+
+    @asynccontextmanager
+    async def batch(self):
+        """
+        Group the property changes made inside the block.
+        Changes are applied immediately but only published when the outermost block exits,
+        with one notification per changed interface.
+
+        ::
+
+            async with player.batch():
+                player.set_playback_property(PlaybackPropertyName.Metadata, metadata)
+                player.set_playback_property(PlaybackPropertyName.PlaybackStatus, PlaybackStatus.Playing)
+        """
+        self._begin_batch()
+        try:
+            yield self
+        finally:
+            self._end_batch()
+
+    async def flush(self):
+        """
+        Publish property changes still held back by the backend, e.g. when it coalesces
+        changes over a time window, without waiting for the next scheduled flush.
+        """
+        pass
+
+    def _begin_batch(self):
+        pass
+
+    def _end_batch(self):
+        pass
+
+    def set_tracks(self, tracks: Iterable[Any], current_track: str = NO_TRACK):
+        """
+        Replace the whole tracklist.
+        :param tracks: Metadata of the tracks in order, :attr:`MetadataBean.id_` is the track id.
+        :param current_track: Id of the current track.
+        :type current_track: str
+        """
+        pass
+
+    def add_track(self, metadata: Any, after_track: Optional[str] = None):
+        """
+        Insert a track after ``after_track``, at the start of the tracklist if it is None.
+        """
+        pass
+
+    def update_track(self, metadata: Any):
+        """
+        Replace the metadata of the track with id :attr:`MetadataBean.id_`.
+        """
+        pass
+
+    def remove_track(self, track_id: str):
+        pass
+
+    def set_playlists(self, playlists: Iterable['Playlist'], orderings: Optional[Iterable[PlaylistOrdering]] = None):
+        """
+        Replace all playlists.
+        :param playlists: The playlists, in user defined order.
+        :param orderings: Orderings clients may request, defaults to all of :class:`PlaylistOrdering`.
+        """
+        pass
+
+    def update_playlist(self, playlist: 'Playlist'):
+        """
+        Add a playlist or update the one with the same :attr:`Playlist.id_`.
+        """
+        pass
+
+    def remove_playlist(self, playlist_id: str):
+        pass
+
+    def set_active_playlist(self, playlist_id: Optional[str]):
+        """
+        Set the currently active playlist, None if there is none.
+        """
+        pass
+
+    async def set_cover_art(self, image: 'Image', metadata: Any = None) -> str:
+        """
+        Store cover art in :attr:`cover_art_cache` and publish it as the ``file://`` cover of a track.
+        The image is written off the event loop, identical images are stored once.
+        :param image: Image file content, or the path of an image file.
+        :type image: bytes | str | os.PathLike
+        :param metadata: The track to set the cover of, defaults to the current
+            :attr:`PlaybackProperties.Metadata`. The updated copy is set as the current metadata if it is
+            the current track, otherwise its tracklist entry is updated with :meth:`update_track`.
+        :return: The cover URL.
+        :raises ValueError: If no ``metadata`` is given and the backend has no current metadata.
+        """
+        current = self.get_playback_property(PlaybackPropertyName.Metadata)
+        if metadata is None:
+            if current is None:
+                raise ValueError(f'{type(self).__name__} has no current metadata, pass the track to set the cover of')
+            metadata = current
+        if self.cover_art_cache is None:
+            from aionowplaying.interface.artcache import CoverArtCache
+            self.cover_art_cache = CoverArtCache()
+        url = await self.cover_art_cache.store(image)
+        updated = metadata.model_copy(update={'cover': url})
+        if current is not None and updated.id_ == current.id_:
+            self.set_playback_property(PlaybackPropertyName.Metadata, updated)
+        else:
+            self.update_track(updated)
+        return url
+
     def get_property(self, name: PropertyName) -> Any:
         pass
 
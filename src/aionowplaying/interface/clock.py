@@ -0,0 +1,40 @@
+import time
+from typing import Callable
+
+
+class PlaybackClock:
+    """
+    Extrapolates the playback position from the last reported one.
+    The position is stored as an anchor plus the monotonic time it was taken at, and is
+    computed on read from the playback rate while playing, frozen otherwise.
+    Hosts only need to report the position on seeks and state changes.
+    """
+
+    def __init__(self, time_source: Callable[[], float] = time.monotonic):
+        self._time = time_source
+        self._anchor = 0  # in microseconds
+        self._anchor_time = time_source()
+        self._rate = 1.0
+        self._playing = False
+        self.duration = 0  # in microseconds, position is clamped to it if set
+
+    @property
+    def position(self) -> int:
+        if not self._playing:
+            return self._anchor
+        position = self._anchor + int((self._time() - self._anchor_time) * self._rate * 1_000_000)
+        if 0 < self.duration < position:
+            return self.duration
+        return position
+
+    def seek(self, position: int):
+        self._anchor = position
+        self._anchor_time = self._time()
+
+    def set_rate(self, rate: float):
+        self.seek(self.position)
+        self._rate = rate
+
+    def set_playing(self, playing: bool):
+        self.seek(self.position)
+        self._playing = playing
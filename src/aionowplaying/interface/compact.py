@@ -0,0 +1,255 @@
+"""
+Compact, pydantic-free state classes.
+
+They mirror the field names and defaults of the models in :mod:`aionowplaying.interface.models`
+but are plain ``__slots__`` classes: no per-instance ``__dict__``, plain attribute get/set and
+no pydantic import. Values are not validated on assignment; call :meth:`SlotsModel.validate`
+where input crosses an API boundary.
+
+:class:`FrozenMetadataBean` is an immutable variant for large tracklists: list fields are tuples
+shared between tracks through an :class:`Interner`, and their strings are interned.
+"""
+import importlib
+import sys
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from aionowplaying.interface.enums import PlaybackStatus, LoopStatus, MediaType
+
+
+class SlotsModel:
+    __slots__ = ()
+    _defaults: Dict[str, Any] = {}
+    _model: str = ''  # name of the matching class in aionowplaying.interface.models
+
+    def __init__(self, **values):
+        for name, default in self._defaults.items():
+            if name in values:
+                value = values.pop(name)
+            elif type(default) is list:
+                value = []
+            elif isinstance(default, SlotsModel):
+                value = type(default)()
+            else:
+                value = default
+            setattr(self, name, value)
+        if values:
+            raise TypeError(f'{type(self).__name__} got unexpected fields: {", ".join(values)}')
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def model_dump(self) -> Dict[str, Any]:
+        result = dict()
+        for name in self.__slots__:
+            value = getattr(self, name)
+            result[name] = value.model_dump() if isinstance(value, SlotsModel) else value
+        return result
+
+    def model_copy(self, update: Optional[Dict[str, Any]] = None) -> 'SlotsModel':
+        """Shallow copy with the values in ``update`` replaced, like :meth:`pydantic.BaseModel.model_copy`."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        if update:
+            values.update(update)
+        return type(self)(**values)
+
+    @classmethod
+    def model_class(cls) -> type:
+        model = importlib.import_module('aionowplaying.interface.models')
+        for part in cls._model.split('.'):
+            model = getattr(model, part)
+        return model
+
+    def to_model(self):
+        """Convert to the matching pydantic model, validating all values."""
+        return self.model_class().model_validate(self.model_dump())
+
+    @classmethod
+    def from_model(cls, model) -> 'SlotsModel':
+        values = dict()
+        for name, default in cls._defaults.items():
+            value = getattr(model, name)
+            if isinstance(default, SlotsModel):
+                value = type(default).from_model(value)
+            values[name] = value
+        return cls(**values)
+
+    def validate(self) -> 'SlotsModel':
+        """
+        Validate and coerce the current values with pydantic, e.g. ``'Playing'`` becomes
+        :attr:`PlaybackStatus.Playing`. Returns a new instance and raises
+        :class:`pydantic.ValidationError` on invalid values.
+        """
+        return self.from_model(self.to_model())
+
+
+class CompactTrackListProperties(SlotsModel):
+    _model = 'TrackListProperties'
+    _defaults = {
+        'Tracks': [],
+        'CanEditTracks': False,
+    }
+    __slots__ = tuple(_defaults)
+
+
+class CompactPlayerProperties(SlotsModel):
+    _model = 'PlayerProperties'
+    _defaults = {
+        'Fullscreen': False,
+        'CanQuit': False,
+        'CanSetFullscreen': False,
+        'CanRaise': False,
+        'HasTrackList': False,
+        'Identity': '',
+        'DesktopEntry': '',
+        'SupportedUriSchemes': [],
+        'SupportedMimeTypes': [],
+    }
+    __slots__ = tuple(_defaults)
+
+
+class CompactMetadataBean(SlotsModel):
+    _model = 'PlaybackProperties.MetadataBean'
+    _defaults = {
+        'id_': '',
+        'media_type': MediaType.Music,
+        'duration': 0,  # in microseconds
+        'cover': '',
+        'album': '',
+        'albumArtist': [],
+        'artist': [],
+        'lyrics': '',
+        'comments': [],
+        'composer': [],
+        'genre': [],
+        'lyricist': [],
+        'title': 'Unknown',
+        'trackNumber': 0,
+        'url': '',
+    }
+    __slots__ = tuple(_defaults)
+
+
+class CompactPlaybackProperties(SlotsModel):
+    MetadataBean = CompactMetadataBean
+
+    _model = 'PlaybackProperties'
+    _defaults = {
+        'PlaybackStatus': PlaybackStatus.Stopped,
+        'LoopStatus': LoopStatus.None_,
+        'Rate': 1.0,
+        'Shuffle': False,
+        'Metadata': CompactMetadataBean(),
+        'Volume': 1.0,
+        'Position': 0,  # in microseconds
+        'Duration': 0,  # in microseconds
+        'MinimumRate': 1.0,
+        'MaximumRate': 1.0,
+        'CanGoNext': False,
+        'CanGoPrevious': False,
+        'CanPlay': False,
+        'CanPause': False,
+        'CanSeek': False,
+        'CanControl': False,
+    }
+    __slots__ = tuple(_defaults)
+
+
+class Interner:
+    """
+    Canonical copies of strings and tuples of strings, so equal values held by many tracks are
+    stored once. Entries are kept until :meth:`clear`, which suits the bounded vocabulary of artist,
+    album and genre names in a library; unique values such as titles are better left alone.
+    """
+
+    def __init__(self):
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tuples)
+
+    @staticmethod
+    def string(value: str) -> str:
+        return sys.intern(value) if type(value) is str else value
+
+    def strings(self, values: Iterable[str]) -> Tuple[str, ...]:
+        if isinstance(values, (str, bytes)):
+            # tuple() would split it into characters
+            raise TypeError(f'expected an iterable of strings, got {type(values).__name__} {values!r}')
+        key = values if type(values) is tuple else tuple(values)
+        shared = self._tuples.get(key)
+        if shared is None:
+            shared = tuple(sys.intern(value) if type(value) is str else value for value in key)
+            self._tuples[shared] = shared
+        return shared
+
+    def clear(self):
+        self._tuples.clear()
+
+
+shared_interner = Interner()
+
+
+def _rebuild(cls: type, values: Dict[str, Any]) -> 'FrozenMetadataBean':
+    return cls(**values)
+
+
+class FrozenMetadataBean(SlotsModel):
+    """
+    Immutable track metadata with the fields of :class:`CompactMetadataBean`. List fields are tuples
+    shared through :attr:`interner` and the strings that repeat between tracks are interned; use
+    :meth:`model_copy` to change a value. Instances are hashable and can be held by the tracklist and
+    set as the ``Metadata`` property of any backend. Snapshots decode tracks into the class of the
+    current ``Metadata``, set a frozen one before restoring to get frozen tracks back.
+    """
+    _model = 'PlaybackProperties.MetadataBean'
+    _defaults = dict(CompactMetadataBean._defaults,
+                     albumArtist=(), artist=(), comments=(), composer=(), genre=(), lyricist=())
+    __slots__ = tuple(_defaults)
+    _tuple_fields = frozenset(name for name, default in _defaults.items() if type(default) is tuple)
+    # shared by many tracks, unlike id_, title, url or lyrics
+    _interned_fields = frozenset(('album', 'cover'))
+    interner = shared_interner
+
+    def __init__(self, **values):
+        interner = self.interner
+        for name, default in self._defaults.items():
+            value = values.pop(name, default)
+            if name in self._tuple_fields:
+                value = interner.strings(value)
+            elif name in self._interned_fields:
+                value = interner.string(value)
+            object.__setattr__(self, name, value)
+        if values:
+            raise TypeError(f'{type(self).__name__} got unexpected fields: {", ".join(values)}')
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{type(self).__name__} is immutable, use model_copy(update=...)')
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __reduce__(self):
+        return _rebuild, (type(self), {name: getattr(self, name) for name in self.__slots__})
+
+    @classmethod
+    def freeze(cls, metadata: Any) -> 'FrozenMetadataBean':
+        """``metadata`` as a frozen bean: a pydantic or compact bean is converted, a frozen one returned as is."""
+        if type(metadata) is cls:
+            return metadata
+        return cls.from_model(metadata)
+
+    def thaw(self, bean_class: type = CompactMetadataBean) -> Any:
+        """A mutable copy as a ``bean_class``, e.g. :class:`PlaybackProperties.MetadataBean`, with lists again."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        for name in self._tuple_fields:
+            values[name] = list(values[name])
+        return bean_class(**values)
@@ -0,0 +1,249 @@
+"""
+Routing of playback commands from the platform (D-Bus method calls, media keys,
+system transport controls) to the ``on_*`` handlers of a :class:`BaseInterface`.
+"""
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from aionowplaying.interface.tracing import current_trace
+
+if TYPE_CHECKING:
+    from aionowplaying.interface.tracing import CallTrace
+    from aionowplaying.interface.base import BaseInterface
+
+# How a command that arrives while others of its lane are still pending is treated.
+ORDERED = 'ordered'  # always run, in arrival order
+IDEMPOTENT = 'idempotent'  # merged into an identical command right before it
+LATEST = 'latest'  # replaces the pending command of its lane, only the latest value is applied
+SKIP = 'skip'  # like ORDERED, but at most max_pending_skips of them wait at a time
+
+# handler name -> (lane, policy). Commands of a lane run one at a time.
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    'on_play': ('transport', IDEMPOTENT),
+    'on_pause': ('transport', IDEMPOTENT),
+    'on_stop': ('transport', IDEMPOTENT),
+    'on_play_pause': ('transport', ORDERED),
+    'on_next': ('transport', SKIP),
+    'on_previous': ('transport', SKIP),
+    'on_open_uri': ('transport', ORDERED),
+    'on_go_to': ('transport', ORDERED),
+    'on_activate_playlist': ('transport', ORDERED),
+    'on_seek': ('position', ORDERED),
+    'on_set_position': ('position', ORDERED),
+    'on_volume': ('volume', LATEST),
+    'on_rate': ('rate', LATEST),
+    'on_loop_status': ('loop_status', LATEST),
+    'on_shuffle': ('shuffle', LATEST),
+    'on_fullscreen': ('fullscreen', LATEST),
+    'on_raise': ('window', IDEMPOTENT),
+    'on_quit': ('window', ORDERED),
+    'on_add_track': ('tracklist', ORDERED),
+    'on_remove_track': ('tracklist', ORDERED),
+}
+
+
+class _Command:
+    __slots__ = ('name', 'args', 'futures', 'traces')
+
+    def __init__(self, name: str, args: tuple, future: asyncio.Future, trace: Optional['CallTrace'] = None):
+        self.name = name
+        self.args = args
+        self.futures: List[asyncio.Future] = [future]
+        self.traces: Optional[List['CallTrace']] = None if trace is None else [trace]
+
+
+class _Lane:
+    __slots__ = ('pending', 'task')
+
+    def __init__(self):
+        self.pending: Deque[_Command] = deque()
+        self.task: Optional[asyncio.Task] = None
+
+
+class CommandDispatcher:
+    """
+    Runs the ``on_*`` handlers of a player for incoming commands.
+
+    Commands are grouped into lanes (transport, position, volume, ...), a lane runs one handler
+    at a time and queues the rest, so a burst of media key presses does not start overlapping
+    handler runs. While a command waits, newer ones may supersede it: only the latest
+    Volume/Rate/LoopStatus/Shuffle/Fullscreen value is applied, identical Play/Pause/Stop commands
+    in a row run once, and with ``max_pending_skips`` set further Next/Previous presses are dropped
+    once that many are waiting. Play, Pause and PlayPause keep their relative order.
+
+    :meth:`dispatch` returns a future that resolves once the command was handled; for a collapsed
+    command that is when the command that superseded it was handled, futures of merged commands
+    resolve in the order the commands arrived. Dropped skips resolve right away.
+
+    Handlers are looked up, and whether they are coroutine functions checked, on first use.
+    With tracing enabled, the :data:`~aionowplaying.interface.tracing.current_trace` of the caller
+    gets the times the command was queued and its handler started and finished.
+    """
+
+    def __init__(self, it: 'BaseInterface', max_pending_skips: Optional[int] = None):
+        self._it = it
+        self.max_pending_skips = max_pending_skips
+        self._lanes: Dict[str, _Lane] = dict()
+        self._handlers: Dict[str, Tuple[Callable, bool]] = dict()
+        self.received = 0
+        self.handled = 0
+        self.collapsed: Counter = Counter()  # handler name -> commands merged into another one or dropped
+
+    def dispatch(self, name: str, *args) -> asyncio.Future:
+        """Queue a command for the handler ``name`` (e.g. ``'on_next'``), must be called on the event loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.received += 1
+        trace = current_trace.get() if self._it.tracer is not None else None
+        if trace is not None:
+            trace.dispatched = time.perf_counter()
+            trace.handler = name
+        lane_name, policy = COMMANDS.get(name, (name, ORDERED))
+        lane = self._lanes.get(lane_name)
+        if lane is None:
+            lane = self._lanes[lane_name] = _Lane()
+        pending = lane.pending
+        last = pending[-1] if pending else None
+        if last is not None and last.name == name and (
+                policy == LATEST or (policy == IDEMPOTENT and last.args == args)):
+            last.args = args
+            last.futures.append(future)
+            if trace is not None:
+                if last.traces is None:
+                    last.traces = []
+                last.traces.append(trace)
+            self.collapsed[name] += 1
+        elif policy == SKIP and self.max_pending_skips is not None \
+                and sum(command.name == name for command in pending) >= self.max_pending_skips:
+            self.collapsed[name] += 1
+            future.set_result(None)
+        else:
+            pending.append(_Command(name, args, future, trace))
+        if lane.task is None:
+            lane.task = loop.create_task(self._run(lane))
+        return future
+
+    def pending(self) -> int:
+        return sum(len(lane.pending) for lane in self._lanes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'received': self.received,
+            'handled': self.handled,
+            'collapsed': sum(self.collapsed.values()),
+            'collapsed_by_handler': dict(self.collapsed),
+        }
+
+    def _handler(self, name: str) -> Tuple[Callable, bool]:
+        handler = self._handlers.get(name)
+        if handler is None:
+            function = getattr(self._it, name)
+            handler = self._handlers[name] = (function, asyncio.iscoroutinefunction(function))
+        return handler
+
+    async def _run(self, lane: _Lane):
+        # the task inherited the context of the command that started it, later commands are not part of that call
+        current_trace.set(None)
+        try:
+            while lane.pending:
+                command = lane.pending.popleft()
+                try:
+                    result = await self._call(command)
+                except Exception as e:
+                    for future in command.futures:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in command.futures:
+                        if not future.done():
+                            future.set_result(result)
+                self.handled += 1
+        finally:
+            lane.task = None
+
+    async def _call(self, command: _Command) -> Any:
+        metrics = self._it.metrics
+        traces = command.traces
+        if metrics is None and traces is None:
+            return await self._invoke(command)
+        start = time.perf_counter()
+        if traces is not None:
+            for trace in traces:
+                trace.handler_started = start
+        try:
+            return await self._invoke(command)
+        finally:
+            end = time.perf_counter()
+            if metrics is not None:
+                metrics.observe('handler_seconds', end - start, command.name)
+            if traces is not None:
+                for trace in traces:
+                    trace.handler_finished = end
+
+    async def _invoke(self, command: _Command) -> Any:
+        handler, is_coroutine = self._handler(command.name)
+        if self._it.callback_executor is not None:
+            return await self._it._call_handler(handler, *command.args)
+        if is_coroutine:
+            return await handler(*command.args)
+        result = handler(*command.args)
+        if asyncio.isfuture(result) or asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+
+class ScrubCoalescer:
+    """
+    Merges the Seek/SetPosition requests a client sends while the user drags a progress bar.
+    Relative offsets are summed, an absolute position replaces everything before it (later offsets
+    are added to it), and the result is delivered at most once per ``window`` seconds with
+    ``deliver(track_id, position, offset)``; ``track_id`` and ``position`` are None if only
+    relative seeks arrived. Merged requests are counted in the dispatcher's ``collapsed`` counter.
+    """
+
+    def __init__(self, dispatcher: CommandDispatcher, window: float,
+                 deliver: Callable[[Optional[str], Optional[int], int], Awaitable]):
+        self.window = window
+        self._dispatcher = dispatcher
+        self._deliver = deliver
+        self._track_id: Optional[str] = None
+        self._position: Optional[int] = None
+        self._offset = 0
+        self._requests: Counter = Counter()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    def seek(self, offset: int):
+        self._offset += offset
+        self._arm('on_seek')
+
+    def set_position(self, track_id: str, position: int):
+        self._track_id, self._position, self._offset = track_id, position, 0
+        self._arm('on_set_position')
+
+    def _arm(self, name: str):
+        self._requests[name] += 1
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._settle)
+
+    def _settle(self):
+        self._timer = None
+        track_id, position, offset = self._track_id, self._position, self._offset
+        self._track_id, self._position, self._offset = None, None, 0
+        # everything but the request that is delivered was merged into it
+        delivered = 'on_seek' if position is None else 'on_set_position'
+        self._requests[delivered] -= 1
+        self._dispatcher.received += sum(self._requests.values())
+        self._dispatcher.collapsed.update(+self._requests)
+        self._requests.clear()
+        task = asyncio.ensure_future(self._deliver(track_id, position, offset))
+        self._tasks.add(task)
+        task.add_done_callback(self._delivered)
+
+    def _delivered(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            task.get_loop().call_exception_handler({'message': 'scrub delivery failed', 'exception': task.exception(),
+                                                    'task': task})
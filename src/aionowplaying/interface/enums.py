@@ -0,0 +1,63 @@
+from enum import Enum
+
+
+class TrackListPropertyName(str, Enum):
+    Tracks = 'Tracks'
+    CanEditTracks = 'CanEditTracks'
+
+
+class PropertyName(str, Enum):
+    CanQuit = "CanQuit"
+    CanSetFullscreen = "CanSetFullscreen"
+    CanRaise = "CanRaise"
+    HasTrackList = "HasTrackList"
+    Identity = "Identity"
+    DesktopEntry = "DesktopEntry"
+    SupportedUriSchemes = "SupportedUriSchemes"
+    SupportedMimeTypes = "SupportedMimeTypes"
+    Fullscreen = "Fullscreen"
+
+
+class PlaybackPropertyName(str, Enum):
+    PlaybackStatus = "PlaybackStatus"
+    LoopStatus = "LoopStatus"
+    Rate = "Rate"
+    Shuffle = "Shuffle"
+    Metadata = "Metadata"
+    Volume = "Volume"
+    Position = "Position"
+    Duration = "Duration"
+    MinimumRate = "MinimumRate"
+    MaximumRate = "MaximumRate"
+    CanGoNext = "CanGoNext"
+    CanGoPrevious = "CanGoPrevious"
+    CanPlay = "CanPlay"
+    CanPause = "CanPause"
+    CanSeek = "CanSeek"
+    CanControl = "CanControl"
+
+
+class PlaybackStatus(str, Enum):
+    Playing = "Playing"
+    Paused = "Paused"
+    Stopped = "Stopped"
+
+
+class LoopStatus(str, Enum):
+    None_ = "None"
+    Track = "Track"
+    Playlist = "Playlist"
+
+
+class MediaType(str, Enum):
+    Music = "Music"
+    Video = "Video"
+    Image = "Image"
+
+
+class PlaylistOrdering(str, Enum):
+    Alphabetical = "Alphabetical"
+    CreationDate = "CreationDate"
+    ModifiedDate = "ModifiedDate"
+    LastPlayDate = "LastPlayDate"
+    UserDefined = "UserDefined"
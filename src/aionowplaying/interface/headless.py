@@ -0,0 +1,36 @@
+from typing import Any
+
+from aionowplaying.interface.base import BaseInterface, PropertyName, PlaybackPropertyName, TrackListPropertyName, \
+    property_models
+
+
+class HeadlessInterface(BaseInterface):
+    """
+    Backend for systems without a supported now playing service.
+    Properties are kept in memory so the player code runs unchanged, nothing is published.
+    """
+
+    def __init__(self, name: str, compact: bool = False):
+        super().__init__(name)
+        player_model, playback_model, tracklist_model = property_models(compact)
+        self._properties = player_model()
+        self._playback_properties = playback_model()
+        self._tracklist_properties = tracklist_model()
+
+    def set_property(self, name: PropertyName, value: Any):
+        setattr(self._properties, name.value, value)
+
+    def set_playback_property(self, name: PlaybackPropertyName, value: Any):
+        setattr(self._playback_properties, name.value, value)
+
+    def set_tracklist_property(self, name: TrackListPropertyName, value: Any):
+        setattr(self._tracklist_properties, name.value, value)
+
+    def get_property(self, name: PropertyName) -> Any:
+        return getattr(self._properties, name.value)
+
+    def get_playback_property(self, name: PlaybackPropertyName) -> Any:
+        return getattr(self._playback_properties, name.value)
+
+    def get_tracklist_property(self, name: TrackListPropertyName) -> Any:
+        return getattr(self._tracklist_properties, name.value)
@@ -1,4 +1,3 @@
-import asyncio
 from typing import Any
 
 from Foundation import NSMutableDictionary
@@ -22,9 +21,9 @@ PlaybackStatusStateMapping = {
 }
 
 
-def create_handler(_, handler):
+def create_handler(it: BaseInterface, handler: str):
     def handle(_):
-        asyncio.create_task(handler())
+        it._dispatch(handler)
         return MPRemoteCommandHandlerStatusSuccess
     return handle
 
@@ -36,14 +35,14 @@ class MacOSInterface(BaseInterface):
         self.info_center = MPNowPlayingInfoCenter.defaultCenter()
 
         self._cmds = [
-            (self.cmd_center.togglePlayPauseCommand(), self.on_play_pause),
-            (self.cmd_center.playCommand(), self.on_play),
-            (self.cmd_center.pauseCommand(), self.on_pause),
-            (self.cmd_center.nextTrackCommand(), self.on_next),
-            (self.cmd_center.previousTrackCommand(), self.on_previous),
+            (self.cmd_center.togglePlayPauseCommand(), 'on_play_pause'),
+            (self.cmd_center.playCommand(), 'on_play'),
+            (self.cmd_center.pauseCommand(), 'on_pause'),
+            (self.cmd_center.nextTrackCommand(), 'on_next'),
+            (self.cmd_center.previousTrackCommand(), 'on_previous'),
         ]
         for cmd, handler in self._cmds:
-            cmd.addTargetWithHandler_(create_handler(cmd, handler))
+            cmd.addTargetWithHandler_(create_handler(self, handler))
 
     def get_playback_property(self, name: PlaybackPropertyName) -> Any:
         if name == PlaybackPropertyName.Position:
@@ -52,6 +51,8 @@ class MacOSInterface(BaseInterface):
             return self._get_property(MPNowPlayingInfoPropertyPlaybackRate)
 
     def set_playback_property(self, name: PlaybackPropertyName, value: Any):
+        if self._queued((PlaybackPropertyName, name), self.set_playback_property, name, value):
+            return
         if name == PlaybackPropertyName.Metadata:
             value: PlaybackProperties.MetadataBean
             nowplaying_info = self._get_or_create_nowplaying_info()
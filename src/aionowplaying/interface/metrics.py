@@ -0,0 +1,178 @@
+"""
+Counters, gauges and histograms maintained by the backends once metrics are enabled
+with :meth:`BaseInterface.enable_metrics`, and their Prometheus text exposition.
+"""
+import asyncio
+import bisect
+import os
+import tempfile
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# metric name -> (type, label name, help text)
+METRICS: Dict[str, Tuple[str, Optional[str], str]] = {
+    'properties_changed_total': ('counter', 'property', 'Properties announced with PropertiesChanged.'),
+    'signals_total': ('counter', 'signal', 'Signals emitted.'),
+    'messages_sent_total': ('counter', None, 'Messages sent on the bus or written to Unix-socket subscribers.'),
+    'bytes_sent_total': ('counter', None, 'Bytes marshaled for the bus or written to Unix-socket subscribers.'),
+    'method_calls_total': ('counter', 'method', 'Incoming method calls, including property Get/GetAll/Set.'),
+    'handler_seconds': ('histogram', 'handler', 'Time spent in on_* handlers.'),
+    'queue_depth': ('gauge', 'queue', 'Items waiting in internal queues.'),
+}
+
+# seconds, roughly a media key press from instant to noticeably laggy
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        return {'count': self.count, 'sum': self.sum,
+                'buckets': dict(zip(BUCKETS + (float('inf'),), self.cumulative()))}
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    """
+    Metrics of one player. Counters and histograms are keyed by metric name and label value,
+    gauges are read from callbacks when a snapshot is taken.
+    """
+
+    def __init__(self, prefix: str = 'aionowplaying', labels: Optional[Dict[str, str]] = None):
+        self.prefix = prefix
+        self.labels = dict(labels or {})
+        self.counters: Dict[str, Counter] = defaultdict(Counter)
+        self.histograms: Dict[str, Dict[str, Histogram]] = defaultdict(dict)
+        self._gauges: Dict[str, Dict[str, Callable[[], float]]] = defaultdict(dict)
+        self._export_handle: Optional[asyncio.TimerHandle] = None
+
+    def inc(self, name: str, label: str = '', amount: float = 1):
+        self.counters[name][label] += amount
+
+    def inc_each(self, name: str, labels: Iterable[str]):
+        counter = self.counters[name]
+        for label in labels:
+            counter[label] += 1
+
+    def observe(self, name: str, value: float, label: str = ''):
+        histograms = self.histograms[name]
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = Histogram()
+        histogram.observe(value)
+
+    def gauge(self, name: str, label: str, read: Callable[[], float]):
+        """Register a gauge, ``read`` is called for every snapshot. Registering a name and label again replaces it."""
+        self._gauges[name][label] = read
+
+    def snapshot(self) -> dict:
+        return {
+            'counters': {name: dict(values) for name, values in self.counters.items()},
+            'gauges': {name: {label: read() for label, read in gauges.items()}
+                       for name, gauges in self._gauges.items()},
+            'histograms': {name: {label: histogram.snapshot() for label, histogram in histograms.items()}
+                           for name, histograms in self.histograms.items()},
+        }
+
+    def prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        names = sorted(set(self.counters) | set(self.histograms) | set(self._gauges))
+        for name in names:
+            kind, label_name, help_text = METRICS.get(name, ('untyped', 'label', ''))
+            full_name = f'{self.prefix}_{name}'
+            if help_text:
+                lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            if kind == 'histogram':
+                for label, histogram in sorted(self.histograms[name].items()):
+                    for bound, count in zip(BUCKETS + (float('inf'),), histogram.cumulative()):
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{full_name}_bucket{self._labels(label_name, label, le=le)} {count}')
+                    lines.append(f'{full_name}_sum{self._labels(label_name, label)} {histogram.sum!r}')
+                    lines.append(f'{full_name}_count{self._labels(label_name, label)} {histogram.count}')
+                continue
+            values = self._gauges[name].items() if kind == 'gauge' else self.counters[name].items()
+            for label, value in sorted(values):
+                value = value() if callable(value) else value
+                lines.append(f'{full_name}{self._labels(label_name, label)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def _labels(self, label_name: Optional[str], label: str, **extra) -> str:
+        pairs = dict(self.labels)
+        if label_name and label:
+            pairs[label_name] = label
+        pairs.update(extra)
+        if not pairs:
+            return ''
+        escaped = (f'{key}="{_escape(str(value))}"' for key, value in pairs.items())
+        return '{' + ','.join(escaped) + '}'
+
+    def write_prometheus(self, path: str):
+        """Write the exposition to ``path`` atomically, e.g. for the node_exporter textfile collector."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.prom')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.write(self.prometheus())
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def export_file(self, path: str, interval: float = 15):
+        """Rewrite ``path`` every ``interval`` seconds on the running event loop until :meth:`close`."""
+        self.write_prometheus(path)
+        self._export_handle = asyncio.get_running_loop().call_later(interval, self.export_file, path, interval)
+
+    async def serve_unix(self, path: str) -> asyncio.AbstractServer:
+        """
+        Serve the exposition on a Unix socket, answering each connection with a minimal HTTP
+        response so it can be scraped with ``curl --unix-socket`` as well as read with ``socat``.
+        A stale socket at ``path`` is replaced, anything else there raises, see
+        :func:`~aionowplaying.interface.unixsocket.remove_stale_socket`.
+        """
+        from aionowplaying.interface.unixsocket import remove_stale_socket
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                # an HTTP client sends its request first, plain readers send nothing
+                await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 0.2)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            body = self.prometheus().encode()
+            writer.write(b'HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n'
+                         b'Content-Length: %d\r\n\r\n' % len(body) + body)
+            try:
+                await writer.drain()
+            finally:
+                writer.close()
+
+        remove_stale_socket(path)
+        return await asyncio.start_unix_server(handle, path)
+
+    def close(self):
+        if self._export_handle is not None:
+            self._export_handle.cancel()
+            self._export_handle = None
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,60 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from aionowplaying.interface import enums
+from aionowplaying.interface.enums import MediaType
+
+
+class TrackListProperties(BaseModel):
+    Tracks: List[str] = []
+    CanEditTracks: bool = False
+
+
+class PlayerProperties(BaseModel):
+    Fullscreen: bool = False
+    CanQuit: bool = False
+    CanSetFullscreen: bool = False
+    CanRaise: bool = False
+    HasTrackList: bool = False
+    Identity: str = ""
+    DesktopEntry: str = ""
+    SupportedUriSchemes: List[str] = []
+    SupportedMimeTypes: List[str] = []
+
+
+class PlaybackProperties(BaseModel):
+    class MetadataBean(BaseModel):
+        id_: str = ''
+        media_type: MediaType = MediaType.Music
+        duration: int = 0  # in microseconds
+        cover: str = ''
+        album: str = ''
+        albumArtist: List[str] = []
+        artist: List[str] = []
+        lyrics: str = ''
+        comments: List[str] = []
+        composer: List[str] = []
+        genre: List[str] = []
+        lyricist: List[str] = []
+        title: str = "Unknown"
+        trackNumber: int = 0
+        url: str = ''
+
+    # Qualified annotations, the field names shadow the enum names in the class body.
+    PlaybackStatus: enums.PlaybackStatus = enums.PlaybackStatus.Stopped
+    LoopStatus: enums.LoopStatus = enums.LoopStatus.None_
+    Rate: float = 1.0
+    Shuffle: bool = False
+    Metadata: MetadataBean = MetadataBean()
+    Volume: float = 1.0
+    Position: int = 0  # in microseconds
+    Duration: int = 0  # in microseconds
+    MinimumRate: float = 1.0
+    MaximumRate: float = 1.0
+    CanGoNext: bool = False
+    CanGoPrevious: bool = False
+    CanPlay: bool = False
+    CanPause: bool = False
+    CanSeek: bool = False
+    CanControl: bool = False
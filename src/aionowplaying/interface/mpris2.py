@@ -1,47 +1,463 @@
-from typing import Any
-
-from dbus_next import PropertyAccess, Variant
+import asyncio
+import functools
+import logging
+from copy import copy
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from dbus_next import DBusError, ErrorType, Message, MessageFlag, MessageType, NameFlag, PropertyAccess, \
+    RequestNameReply, Variant
+from dbus_next import introspection as intr
 from dbus_next.aio import MessageBus
 from dbus_next.service import ServiceInterface, dbus_property, method, signal
 
-from aionowplaying.interface.base import BaseInterface, PropertyName, PlayerProperties, PlaybackProperties, \
-    PlaybackPropertyName, LoopStatus, TrackListPropertyName, TrackListProperties
+from aionowplaying.interface.base import BaseInterface, PropertyName, PlaybackPropertyName, LoopStatus, \
+    TrackListPropertyName, PlaybackStatus, property_models
+from aionowplaying.interface.clock import PlaybackClock
+from aionowplaying.interface.dispatch import ScrubCoalescer
+from aionowplaying.interface.enums import PlaylistOrdering
+from aionowplaying.interface.playlists import Playlist, PlaylistStore
+from aionowplaying.interface.tracing import current_trace
+from aionowplaying.interface.tracklist import NO_TRACK, TrackStore
+
+if TYPE_CHECKING:
+    from aionowplaying.interface.metrics import Metrics
+    from aionowplaying.interface.models import PlaybackProperties
+    from aionowplaying.interface.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+
+def _list(value) -> list:
+    # dbus_next only marshals lists as arrays, frozen metadata holds tuples
+    return value if type(value) is list else list(value)
 
 
 class DBusBeanMapper:
     @staticmethod
-    def metadata(metadata: PlaybackProperties.MetadataBean) -> dict:
+    def metadata(metadata: 'PlaybackProperties.MetadataBean') -> dict:
         metadata_map = dict()
         metadata_map['mpris:trackid'] = Variant('s', metadata.id_)
         metadata_map['mpris:length'] = Variant('x', metadata.duration)
         metadata_map['mpris:artUrl'] = Variant('s', metadata.cover)
         metadata_map['xesam:album'] = Variant('s', metadata.album)
-        metadata_map['xesam:albumArtist'] = Variant('as', metadata.albumArtist)
-        metadata_map['xesam:artist'] = Variant('as', metadata.artist)
+        metadata_map['xesam:albumArtist'] = Variant('as', _list(metadata.albumArtist))
+        metadata_map['xesam:artist'] = Variant('as', _list(metadata.artist))
         metadata_map['xesam:asText'] = Variant('s', metadata.lyrics)
-        metadata_map['xesam:comment'] = Variant('as', metadata.comments)
-        metadata_map['xesam:composer'] = Variant('as', metadata.composer)
-        metadata_map['xesam:genre'] = Variant('as', metadata.genre)
-        metadata_map['xesam:lyricist'] = Variant('as', metadata.lyricist)
+        metadata_map['xesam:comment'] = Variant('as', _list(metadata.comments))
+        metadata_map['xesam:composer'] = Variant('as', _list(metadata.composer))
+        metadata_map['xesam:genre'] = Variant('as', _list(metadata.genre))
+        metadata_map['xesam:lyricist'] = Variant('as', _list(metadata.lyricist))
         metadata_map['xesam:title'] = Variant('s', metadata.title)
         metadata_map['xesam:trackNumber'] = Variant('i', metadata.trackNumber)
         metadata_map['xesam:url'] = Variant('s', metadata.url)
         return metadata_map
 
+    # metadata key -> (MetadataBean field, value type), the reverse of metadata()
+    METADATA_FIELDS = {
+        'mpris:trackid': ('id_', str),
+        'mpris:length': ('duration', int),
+        'mpris:artUrl': ('cover', str),
+        'xesam:album': ('album', str),
+        'xesam:albumArtist': ('albumArtist', list),
+        'xesam:artist': ('artist', list),
+        'xesam:asText': ('lyrics', str),
+        'xesam:comment': ('comments', list),
+        'xesam:composer': ('composer', list),
+        'xesam:genre': ('genre', list),
+        'xesam:lyricist': ('lyricist', list),
+        'xesam:title': ('title', str),
+        'xesam:trackNumber': ('trackNumber', int),
+        'xesam:url': ('url', str),
+    }
 
-class MprisPlayerServiceInterface(ServiceInterface):
-    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None):
-        super().__init__(bus_name)
-        self._properties = PlaybackProperties()
+    @staticmethod
+    def parse_metadata(metadata_map: dict, bean_class: type) -> 'PlaybackProperties.MetadataBean':
+        """
+        Build a ``bean_class`` instance from a Metadata map sent by any player.
+        Unknown keys are ignored, values of the wrong type are coerced where it is
+        unambiguous (e.g. a single artist string) and dropped otherwise.
+        """
+        values = dict()
+        for key, variant in metadata_map.items():
+            field = DBusBeanMapper.METADATA_FIELDS.get(key)
+            if field is None:
+                continue
+            name, kind = field
+            value = variant.value if isinstance(variant, Variant) else variant
+            if kind is list:
+                value = [value] if isinstance(value, str) else [str(item) for item in value]
+            else:
+                try:
+                    value = kind(value)
+                except (TypeError, ValueError):
+                    continue
+            values[name] = value
+        return bean_class(**values)
+
+
+# The dbus-next release whose private ServiceInterface tables are shared between instances and
+# replaced for tracing, see MprisBaseServiceInterface; pyproject.toml pins it. Everything that
+# touches those internals is in the functions below, _check_dbus_next() runs them on import.
+DBUS_NEXT_VERSION = '0.2.3'
+_MEMBER_TABLES = ('_ServiceInterface__methods', '_ServiceInterface__properties', '_ServiceInterface__signals')
+_BUSES = '_ServiceInterface__buses'
+
+
+def _member_tables(interface: ServiceInterface) -> tuple:
+    """The method, property and signal lists ServiceInterface.__init__ built for ``interface``."""
+    return tuple(vars(interface)[attribute] for attribute in _MEMBER_TABLES)
+
+
+def _set_member_tables(interface: ServiceInterface, tables: tuple):
+    """What ServiceInterface.__init__ sets up, with the given method, property and signal lists."""
+    for attribute, value in zip(_MEMBER_TABLES, tables):
+        setattr(interface, attribute, value)
+    if _BUSES not in vars(interface):
+        setattr(interface, _BUSES, set())
+
+
+def _with_setter(prop: Any, setter: Callable) -> Any:
+    """A copy of a dbus_next property with another setter, they can't be copied otherwise."""
+    changed = property.__new__(type(prop))
+    changed.__dict__.update(vars(prop))
+    changed.prop_setter = setter
+    return changed
+
+
+def _check_dbus_next():
+    """Raise ImportError unless dbus_next's internals are laid out as the functions above expect."""
+    class Probe(ServiceInterface):
+        @method()
+        def probe_method(self) -> 's':
+            return ''
+
+        @dbus_property()
+        def probe_property(self) -> 's':
+            return ''
+
+        @probe_property.setter
+        def probe_property(self, value: 's'):
+            pass
+
+        @signal()
+        def probe_signal(self) -> 's':
+            return ''
+
+    def setter(interface: ServiceInterface, value: Any):
+        pass
+
+    try:
+        probe = Probe('org.aionowplaying.Probe')
+        tables = _member_tables(probe)
+        methods, properties, _ = tables
+        prop = _with_setter(properties[0], setter)
+        expected = all(type(table) is list and len(table) == 1 for table in tables) \
+            and type(vars(probe)[_BUSES]) is set \
+            and ServiceInterface._get_methods(probe) is methods \
+            and ServiceInterface._get_properties(probe) is properties \
+            and methods[0].name == 'probe_method' and callable(methods[0].fn) \
+            and type(prop) is type(properties[0]) and prop.name == 'probe_property' \
+            and prop.prop_setter is setter and prop.prop_getter is properties[0].prop_getter \
+            and callable(getattr(Message, '_marshall', None))
+        problem = None if expected else 'members are not where expected'
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+        problem = repr(e)
+    if problem is not None:
+        raise ImportError(f'aionowplaying needs dbus-next {DBUS_NEXT_VERSION}, the installed one has '
+                          f'different ServiceInterface internals: {problem}')
+
+
+_check_dbus_next()
+
+
+class _MeteredMessageBus(MessageBus):
+    """
+    The backend's connection, counting the messages it sends and their size while :attr:`metrics` is set,
+    and telling :attr:`tracer` about calls answered with an error.
+    """
+    metrics: Optional['Metrics'] = None
+    tracer: Optional['Tracer'] = None
+
+    def send(self, msg: Message) -> asyncio.Future:
+        future = super().send(msg)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.inc('messages_sent_total')
+            # marshaled a second time, by the writer, only while metrics are enabled
+            metrics.inc('bytes_sent_total', amount=len(msg._marshall()))
+        if self.tracer is not None and msg.message_type == MessageType.ERROR:
+            # e.g. an unknown member or a bad signature, the method never starts to take the receive time
+            self.tracer.rejected((msg.destination, msg.reply_serial))
+        return future
+
+
+class NameTakenError(RuntimeError):
+    """The player's bus name is owned by another connection."""
+
+
+def _traced(tracer: 'Tracer', member: str, fn):
+    """Wrap a method or property setter of a service interface so every call is traced as ``member``."""
+    tracer.expect(member)
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def traced(interface, *args):
+            trace = tracer.begin(member)
+            token = current_trace.set(trace)
+            try:
+                return await fn(interface, *args)
+            finally:
+                current_trace.reset(token)
+                tracer.end(trace)
+    else:
+        @functools.wraps(fn)
+        def traced(interface, *args):
+            trace = tracer.begin(member)
+            token = current_trace.set(trace)
+            try:
+                return fn(interface, *args)
+            finally:
+                current_trace.reset(token)
+                tracer.end(trace)
+    return traced
+
+
+class MprisBaseServiceInterface(ServiceInterface):
+    """
+    Common property handling of the MPRIS service interfaces.
+    Changed properties are announced with PropertiesChanged, either right away
+    or, while a batch is open, merged and announced once when it closes.
+    With a flush interval set, changes are marked dirty and announced at most once
+    per interval with their latest values.
+    The values of a GetAll reply are kept ready: each property is read once and again only after
+    it changed, except for :attr:`_uncached_properties`.
+    """
+
+    # Properties whose value changes without mark_changed(), read for every GetAll.
+    _uncached_properties: frozenset = frozenset()
+    # The section of the state snapshot the properties are saved in, None if they are not saved.
+    _snapshot_section: Optional[str] = None
+
+    # Methods, properties and signals found by ServiceInterface.__init__ and the introspection
+    # data only depend on the class, they are collected once and shared by all instances.
+    # This sets ServiceInterface's private tables through _set_member_tables(), dbus-next is pinned for it.
+    _class_members: Dict[type, tuple] = dict()
+    _class_introspection: Dict[Tuple[type, str], intr.Interface] = dict()
+    # (name, signature, getter) of the readable properties, cached and uncached, by class
+    _class_readable: Dict[type, Tuple[list, list]] = dict()
+
+    def __init__(self, bus_name: str, properties: Any, it: 'Mpris2Interface' = None,
+                 flush_interval: Optional[float] = None):
+        members = self._class_members.get(type(self))
+        if members is None:
+            super().__init__(bus_name)
+            self._class_members[type(self)] = _member_tables(self)
+        else:
+            # what ServiceInterface.__init__ sets up, without inspecting the class again
+            self.name = bus_name
+            _set_member_tables(self, members)
+        self._properties = properties
         self._it = it
+        self._batch_depth = 0
+        self._changed = dict()
+        self._flush_interval = flush_interval
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # GetAll values read so far
+        self._values: Dict[str, Variant] = dict()
+
+    def introspect(self) -> intr.Interface:
+        key = (type(self), self.name)
+        introspection = self._class_introspection.get(key)
+        if introspection is None:
+            introspection = self._class_introspection[key] = super().introspect()
+        return introspection
+
+    def trace(self, tracer: 'Tracer'):
+        """
+        Give this instance its own method and property tables, with every method and property setter
+        wrapped to be traced as ``{interface}.{member}``. The shared tables stay untouched.
+        """
+        methods, properties, signals = self._class_members[type(self)]
+        traced_methods = []
+        for method_ in methods:
+            method_ = copy(method_)
+            method_.fn = _traced(tracer, f'{self.name}.{method_.name}', method_.fn)
+            traced_methods.append(method_)
+        traced_properties = []
+        for prop in properties:
+            if prop.prop_setter is not None:
+                prop = _with_setter(prop, _traced(tracer, f'{self.name}.{prop.name}', prop.prop_setter))
+            traced_properties.append(prop)
+        _set_member_tables(self, (traced_methods, traced_properties, signals))
+
+    def untrace(self):
+        _set_member_tables(self, self._class_members[type(self)])
+
+    def set_property(self, name: str, value: Any):
+        setattr(self._properties, name, value)
+        self.mark_changed(name)
+
+    def get_property(self, key):
+        return getattr(self._properties, key)
+
+    def _readable(self) -> Tuple[list, list]:
+        readable = self._class_readable.get(type(self))
+        if readable is None:
+            readable = self._class_readable[type(self)] = ([], [])
+            for prop in ServiceInterface._get_properties(self):
+                if prop.access.readable() and not prop.disabled:
+                    uncached = prop.name in self._uncached_properties
+                    readable[uncached].append((prop.name, prop.signature, prop.prop_getter))
+        return readable
+
+    def _fill(self) -> list:
+        cached, uncached = self._readable()
+        values = self._values
+        if len(values) != len(cached):
+            for name, signature, getter in cached:
+                if name not in values:
+                    values[name] = Variant(signature, getter(self))
+        return uncached
+
+    def get_all(self) -> Dict[str, Variant]:
+        """The values of a GetAll reply for this interface."""
+        uncached = self._fill()
+        values = self._values
+        if not uncached:
+            return values
+        values = dict(values)
+        for name, signature, getter in uncached:
+            values[name] = Variant(signature, getter(self))
+        return values
+
+    def republish(self):
+        """Announce all properties in one PropertiesChanged, except :attr:`_uncached_properties`."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._changed.clear()
+        self._fill()
+        if self._values:
+            self._emit_changed({name: value.value for name, value in self._values.items()})
+
+    def _invalidate(self, name: str):
+        """Read ``name`` again for the next GetAll, for changes that don't go through mark_changed()."""
+        self._values.pop(name, None)
+        snapshot = self._it.snapshot if self._it is not None else None
+        if snapshot is not None and self._snapshot_section is not None:
+            snapshot.mark_dirty(self._snapshot_section)
+
+    def mark_changed(self, name: str):
+        self._invalidate(name)
+        if self._batch_depth:
+            # dict keeps the order properties were first changed in
+            self._changed[name] = None
+            return
+        if self._flush_interval:
+            self._changed[name] = None
+            self._schedule_flush()
+            return
+        self._emit_changed({name: self.dbus_value(name)})
+
+    def dbus_value(self, name: str) -> Any:
+        return getattr(self._properties, name)
+
+    def begin_batch(self):
+        self._batch_depth += 1
+
+    def end_batch(self):
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            if self._flush_interval:
+                self._schedule_flush()
+            else:
+                self.flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None or not self._changed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # nothing will run the timer outside of the event loop
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self._flush_interval, self.flush)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._changed:
+            return
+        changed, self._changed = self._changed, dict()
+        self._emit_changed({name: self.dbus_value(name) for name in changed})
+
+    def _emit_changed(self, changed: Dict[str, Any]):
+        self.emit_properties_changed(changed)
+        if self._count_signal('PropertiesChanged'):
+            self._it.metrics.inc_each('properties_changed_total', changed)
+
+    def _count_signal(self, member: str) -> bool:
+        """
+        Count a signal this interface emitted, while metrics are enabled and the player is connected.
+        Returns whether it was counted, i.e. sent.
+        """
+        it = self._it
+        if it is not None and it.metrics is not None and it.dbus is not None and it.dbus.connected \
+                and self in it._exported:
+            it.metrics.inc('signals_total', member)
+            return True
+        return False
+
+
+class MprisPlayerServiceInterface(MprisBaseServiceInterface):
+    _uncached_properties = frozenset({PlaybackPropertyName.Position.value})
+    _snapshot_section = 'playback'
+
+    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None, flush_interval: Optional[float] = None,
+                 properties: Any = None, scrub_window: Optional[float] = None):
+        if properties is None:
+            properties = property_models()[1]()
+        super().__init__(bus_name, properties, it, flush_interval)
+        self._metadata_map: Optional[dict] = None
+        self._clock = PlaybackClock()
+        self._scrubber: Optional[ScrubCoalescer] = None
+        if scrub_window:
+            self._scrubber = ScrubCoalescer(it.dispatcher, scrub_window, self._deliver_scrub)
+        # while a merged seek is in the handler, which announces the outcome with one Seeked
+        self._delivering_scrub = False
 
     def set_property(self, name: str, value: Any):
         setattr(self._properties, name, value)
         if name == PlaybackPropertyName.Position:
+            self._clock.seek(value)
             return
-        if isinstance(value, PlaybackProperties.MetadataBean):
-            value = DBusBeanMapper.metadata(value)
-        self.emit_properties_changed({name: value})
+        if name == PlaybackPropertyName.PlaybackStatus:
+            self._clock.set_playing(value == PlaybackStatus.Playing)
+        elif name == PlaybackPropertyName.Rate:
+            self._clock.set_rate(value)
+        if name == PlaybackPropertyName.Metadata:
+            self._metadata_map = None
+        if name == PlaybackPropertyName.Metadata or name == PlaybackPropertyName.Duration:
+            self._clock.duration = self._properties.Duration or self._properties.Metadata.duration
+        self.mark_changed(name)
+
+    def get_property(self, key):
+        if key == PlaybackPropertyName.Position:
+            return self._clock.position
+        return getattr(self._properties, key)
+
+    def dbus_value(self, name: str) -> Any:
+        if name == PlaybackPropertyName.Metadata:
+            return self._mapped_metadata()
+        return getattr(self._properties, name)
+
+    def _mapped_metadata(self) -> dict:
+        # Mapped once per MetadataBean, a new bean must be set through set_property
+        # for changes to be picked up.
+        if self._metadata_map is None:
+            self._metadata_map = DBusBeanMapper.metadata(self._properties.Metadata)
+        return self._metadata_map
 
     @dbus_property(access=PropertyAccess.READ, name=PlaybackPropertyName.PlaybackStatus.value)
     def playback_status(self) -> 's':
@@ -54,8 +470,9 @@ class MprisPlayerServiceInterface(ServiceInterface):
     @loop_status.setter
     async def loop_status(self, value: 's'):
         if self._properties.CanControl:
-            await self._it.on_loop_status(LoopStatus(value))
+            await self._it._dispatch('on_loop_status', LoopStatus(value))
             self._properties.LoopStatus = LoopStatus(value)
+            self._invalidate(PlaybackPropertyName.LoopStatus.value)
 
     @dbus_property(access=PropertyAccess.READWRITE, name=PlaybackPropertyName.Rate.value)
     def rate(self) -> 'd':
@@ -63,8 +480,10 @@ class MprisPlayerServiceInterface(ServiceInterface):
 
     @rate.setter
     async def rate(self, value: 'd'):
-        await self._it.on_rate(value)
+        await self._it._dispatch('on_rate', value)
         self._properties.Rate = value
+        self._invalidate(PlaybackPropertyName.Rate.value)
+        self._clock.set_rate(value)
 
     @dbus_property(access=PropertyAccess.READWRITE, name=PlaybackPropertyName.Shuffle.value)
     def shuffle(self) -> 'b':
@@ -73,13 +492,13 @@ class MprisPlayerServiceInterface(ServiceInterface):
     @shuffle.setter
     async def shuffle(self, value: 'b'):
         if self._properties.CanControl:
-            await self._it.on_shuffle(value)
+            await self._it._dispatch('on_shuffle', value)
             self._properties.Shuffle = value
+            self._invalidate(PlaybackPropertyName.Shuffle.value)
 
     @dbus_property(access=PropertyAccess.READ, name=PlaybackPropertyName.Metadata.value)
     def metadata(self) -> 'a{sv}':
-        metadata = self._properties.Metadata
-        return DBusBeanMapper.metadata(metadata)
+        return self._mapped_metadata()
 
     @dbus_property(access=PropertyAccess.READWRITE, name=PlaybackPropertyName.Volume.value)
     def volume(self) -> 'd':
@@ -88,12 +507,13 @@ class MprisPlayerServiceInterface(ServiceInterface):
     @volume.setter
     async def volume(self, value: 'd'):
         if self._properties.CanControl:
-            await self._it.on_volume(value)
+            await self._it._dispatch('on_volume', value)
             self._properties.Volume = value
+            self._invalidate(PlaybackPropertyName.Volume.value)
 
     @dbus_property(access=PropertyAccess.READ, name=PlaybackPropertyName.Position.value)
     def position(self) -> 'x':
-        return self._properties.Position
+        return self._clock.position
 
     @dbus_property(access=PropertyAccess.READ, name=PlaybackPropertyName.MinimumRate.value)
     def minimum_rate(self) -> 'd':
@@ -127,63 +547,96 @@ class MprisPlayerServiceInterface(ServiceInterface):
     def can_control(self) -> 'b':
         return self._properties.CanControl
 
+    def _is_current_track(self, track_id: str) -> bool:
+        # SetPosition for another track than the current one is to be ignored
+        current = self._properties.Metadata.id_
+        return not current or track_id == current
+
+    async def _deliver_scrub(self, track_id: Optional[str], position: Optional[int], offset: int):
+        if position is None:
+            target = self._clock.position + offset
+            command = self._it._dispatch('on_seek', offset)
+        else:
+            if not self._is_current_track(track_id):
+                return
+            target = position + offset
+            command = self._it._dispatch('on_set_position', track_id, target)
+        duration = self._clock.duration
+        self.set_property(PlaybackPropertyName.Position.value, max(0, min(target, duration) if duration else target))
+        self._delivering_scrub = True
+        try:
+            await command
+        finally:
+            self._delivering_scrub = False
+        # the handler may have corrected the position, also with seeked(), which doesn't signal meanwhile
+        self.seeked(self._clock.position)
+        self._count_signal('Seeked')
+
     @signal(name='Seeked')
-    async def seeked(self, position: int) -> 'x':
+    def seeked(self, position: int) -> 'x':
         return position
 
     @method(name="Next")
     async def next(self):
         if self._properties.CanGoNext:
-            await self._it.on_next()
+            await self._it._dispatch('on_next')
 
     @method(name="Previous")
     async def previous(self):
         if self._properties.CanGoPrevious:
-            await self._it.on_previous()
+            await self._it._dispatch('on_previous')
 
     @method(name="Pause")
     async def pause(self):
         if self._properties.CanPause:
-            await self._it.on_pause()
+            await self._it._dispatch('on_pause')
 
     @method(name="PlayPause")
     async def play_pause(self):
         if self._properties.CanPause:
-            await self._it.on_play_pause()
+            await self._it._dispatch('on_play_pause')
 
     @method(name="Stop")
     async def stop(self):
         if self._properties.CanControl:
-            await self._it.on_stop()
+            await self._it._dispatch('on_stop')
 
     @method(name="Play")
     async def play(self):
         if self._properties.CanPlay:
-            await self._it.on_play()
+            await self._it._dispatch('on_play')
 
     @method(name="Seek")
     async def seek(self, offset: 'x'):
-        if self._properties.CanSeek:
-            await self._it.on_seek(offset)
+        if not self._properties.CanSeek:
+            return
+        if self._scrubber is not None:
+            self._scrubber.seek(offset)
+            return
+        await self._it._dispatch('on_seek', offset)
 
     @method(name="OpenUri")
     async def open_uri(self, uri: 's'):
-        await self._it.on_open_uri(uri)
+        await self._it._dispatch('on_open_uri', uri)
 
     @method(name="SetPosition")
     async def set_position(self, track_id: 'o', position: 'x'):
-        if self._properties.CanSeek:
-            await self._it.on_set_position(track_id, position)
+        if not self._properties.CanSeek or not self._is_current_track(track_id):
+            return
+        if self._scrubber is not None:
+            self._scrubber.set_position(track_id, position)
+            return
+        await self._it._dispatch('on_set_position', track_id, position)
 
-    def get_property(self, key):
-        return getattr(self._properties, key)
 
+class MprisServiceInterface(MprisBaseServiceInterface):
+    _snapshot_section = 'player'
 
-class MprisServiceInterface(ServiceInterface):
-    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None):
-        super().__init__(bus_name)
-        self._properties = PlayerProperties()
-        self._it = it
+    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None, flush_interval: Optional[float] = None,
+                 properties: Any = None):
+        if properties is None:
+            properties = property_models()[0]()
+        super().__init__(bus_name, properties, it, flush_interval)
 
     @dbus_property(access=PropertyAccess.READWRITE, name=PropertyName.Fullscreen.value)
     def fullscreen(self) -> 'b':
@@ -192,8 +645,9 @@ class MprisServiceInterface(ServiceInterface):
     @fullscreen.setter
     async def fullscreen(self, value: 'b'):
         if self._properties.CanSetFullscreen:
-            await self._it.on_fullscreen(value)
+            await self._it._dispatch('on_fullscreen', value)
             self._properties.Fullscreen = value
+            self._invalidate(PropertyName.Fullscreen.value)
 
     @dbus_property(access=PropertyAccess.READ, name=PropertyName.CanQuit.value)
     def can_quit(self) -> 'b':
@@ -230,29 +684,90 @@ class MprisServiceInterface(ServiceInterface):
     @method(name='Raise')
     async def raise_(self):
         if self._properties.CanRaise:
-            await self._it.on_raise()
+            await self._it._dispatch('on_raise')
 
     @method(name='Quit')
     async def quit(self):
         if self._properties.CanQuit:
-            await self._it.on_quit()
+            await self._it._dispatch('on_quit')
 
-    def set_property(self, name: str, value: Any):
-        setattr(self._properties, name, value)
-        self.emit_properties_changed({name: value})
 
-    def get_property(self, key):
-        return getattr(self._properties, key)
+class MprisTracklistServiceInterface(MprisBaseServiceInterface):
+    """
+    org.mpris.MediaPlayer2.TrackList, backed by a :class:`TrackStore`.
+    Edits are announced with the TrackAdded/TrackRemoved/TrackMetadataChanged signals
+    rather than by resending the Tracks property.
+    """
+    _snapshot_section = 'tracklist'
 
+    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None, flush_interval: Optional[float] = None,
+                 properties: Any = None):
+        if properties is None:
+            properties = property_models()[2]()
+        super().__init__(bus_name, properties, it, flush_interval)
+        self._tracks = TrackStore()
+        self._mapped: Dict[str, dict] = dict()
 
-class MprisTracklistServiceInterface(ServiceInterface):
-    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None):
-        super().__init__(bus_name)
-        self._properties = TrackListProperties()
-        self._it = it
+    def get_property(self, key):
+        if key == TrackListPropertyName.Tracks:
+            return self._tracks.ids()
+        return getattr(self._properties, key)
 
-    def set_property(self, name: str, value: Any):
-        setattr(self._properties, name, value)
+    def _invalidate(self, name: str):
+        super()._invalidate(name)
+        if name == TrackListPropertyName.Tracks:
+            self._tracks_changed()
+
+    def _tracks_changed(self):
+        snapshot = self._it.snapshot if self._it is not None else None
+        if snapshot is not None:
+            snapshot.mark_dirty('tracks')
+
+    def load_tracks(self, track_ids: List[str], encoded: List[Any], decode: Callable[[Any], Any]):
+        """Replace the tracks like :meth:`replace_tracks`, decoding their metadata when first read."""
+        self._tracks.load(track_ids, encoded, decode)
+        self._mapped.clear()
+        self._invalidate(TrackListPropertyName.Tracks.value)
+        self.track_list_replaced(self._tracks.ids(), NO_TRACK)
+        self._count_signal('TrackListReplaced')
+
+    def replace_tracks(self, tracks: Iterable[Any], current_track: str):
+        self._tracks.replace(tracks)
+        self._mapped.clear()
+        self._invalidate(TrackListPropertyName.Tracks.value)
+        self.track_list_replaced(self._tracks.ids(), current_track)
+        self._count_signal('TrackListReplaced')
+
+    def insert_track(self, metadata: Any, after_track: Optional[str]):
+        if after_track == metadata.id_ and after_track in self._tracks:
+            # stays in place, TrackAdded would tell clients it was added after itself
+            self.update_track(metadata)
+            return
+        self._tracks.insert(metadata, after_track)
+        self._mapped.pop(metadata.id_, None)
+        self._invalidate(TrackListPropertyName.Tracks.value)
+        self.track_added(self._mapped_track(metadata), after_track or NO_TRACK)
+        self._count_signal('TrackAdded')
+
+    def update_track(self, metadata: Any):
+        self._tracks.update(metadata)
+        self._mapped.pop(metadata.id_, None)
+        self._tracks_changed()
+        self.track_metadata_changed(metadata.id_, self._mapped_track(metadata))
+        self._count_signal('TrackMetadataChanged')
+
+    def delete_track(self, track_id: str):
+        self._tracks.remove(track_id)
+        self._mapped.pop(track_id, None)
+        self._invalidate(TrackListPropertyName.Tracks.value)
+        self.track_removed(track_id)
+        self._count_signal('TrackRemoved')
+
+    def _mapped_track(self, metadata: Any) -> dict:
+        mapped = self._mapped.get(metadata.id_)
+        if mapped is None:
+            mapped = self._mapped[metadata.id_] = DBusBeanMapper.metadata(metadata)
+        return mapped
 
     @dbus_property(access=PropertyAccess.READ, name=TrackListPropertyName.CanEditTracks.value)
     def can_edit_tracks(self) -> 'b':
@@ -260,34 +775,291 @@ class MprisTracklistServiceInterface(ServiceInterface):
 
     @dbus_property(access=PropertyAccess.READ, name=TrackListPropertyName.Tracks.value)
     def tracks(self) -> 'ao':
-        return self._properties.Tracks
+        return self._tracks.ids()
+
+    @method(name='GetTracksMetadata')
+    def get_tracks_metadata(self, track_ids: 'ao') -> 'aa{sv}':
+        return [self._mapped_track(metadata) for metadata in self._tracks.get_many(track_ids)]
+
+    @method(name='AddTrack')
+    async def add_track(self, uri: 's', after_track: 'o', set_as_current: 'b'):
+        if self._properties.CanEditTracks:
+            await self._it._dispatch('on_add_track', uri, after_track, set_as_current)
+
+    @method(name='RemoveTrack')
+    async def remove_track(self, track_id: 'o'):
+        if self._properties.CanEditTracks and track_id in self._tracks:
+            await self._it._dispatch('on_remove_track', track_id)
+
+    @method(name='GoTo')
+    async def go_to(self, track_id: 'o'):
+        if track_id in self._tracks:
+            await self._it._dispatch('on_go_to', track_id)
+
+    @signal(name='TrackListReplaced')
+    def track_list_replaced(self, tracks: List[str], current_track: str) -> 'aoo':
+        return [tracks, current_track]
+
+    @signal(name='TrackAdded')
+    def track_added(self, metadata: dict, after_track: str) -> 'a{sv}o':
+        return [metadata, after_track]
+
+    @signal(name='TrackRemoved')
+    def track_removed(self, track_id: str) -> 'o':
+        return track_id
+
+    @signal(name='TrackMetadataChanged')
+    def track_metadata_changed(self, track_id: str, metadata: dict) -> 'oa{sv}':
+        return [track_id, metadata]
+
+
+class MprisPlaylistsServiceInterface(MprisBaseServiceInterface):
+    """
+    org.mpris.MediaPlayer2.Playlists, backed by a :class:`PlaylistStore` so GetPlaylists
+    pages are slices of pre-sorted indexes.
+    """
+
+    def __init__(self, bus_name: str, it: 'Mpris2Interface' = None, flush_interval: Optional[float] = None):
+        super().__init__(bus_name, None, it, flush_interval)
+        self._playlists = PlaylistStore()
+        self._active: Optional[str] = None
 
     def get_property(self, key):
-        return getattr(self._properties, key)
+        return self.dbus_value(key)
+
+    def dbus_value(self, name: str) -> Any:
+        if name == 'PlaylistCount':
+            return len(self._playlists)
+        if name == 'Orderings':
+            return [ordering.value for ordering in self._playlists.orderings]
+        if name == 'ActivePlaylist':
+            playlist = self._playlists.get(self._active) if self._active is not None else None
+            if playlist is None:
+                return [False, ['/', '', '']]
+            return [True, self._dbus_playlist(playlist)]
+        raise AttributeError(name)
+
+    def replace_playlists(self, playlists: Iterable[Playlist], orderings: Optional[Iterable[PlaylistOrdering]]):
+        if orderings is not None:
+            self._playlists = PlaylistStore(list(orderings))
+            self.mark_changed('Orderings')
+        self._playlists.replace(playlists)
+        self.mark_changed('PlaylistCount')
+        self.mark_changed('ActivePlaylist')
+
+    def put_playlist(self, playlist: Playlist):
+        previous = self._playlists.put(playlist)
+        if previous is None:
+            self.mark_changed('PlaylistCount')
+        elif previous.name != playlist.name or previous.icon != playlist.icon:
+            self.playlist_changed(self._dbus_playlist(playlist))
+            self._count_signal('PlaylistChanged')
+            if playlist.id_ == self._active:
+                self.mark_changed('ActivePlaylist')
+
+    def delete_playlist(self, playlist_id: str):
+        self._playlists.remove(playlist_id)
+        self.mark_changed('PlaylistCount')
+        if playlist_id == self._active:
+            self.mark_changed('ActivePlaylist')
+
+    def set_active(self, playlist_id: Optional[str]):
+        self._active = playlist_id
+        self.mark_changed('ActivePlaylist')
+
+    @staticmethod
+    def _dbus_playlist(playlist: Playlist) -> list:
+        return [playlist.id_, playlist.name, playlist.icon]
+
+    @dbus_property(access=PropertyAccess.READ, name='PlaylistCount')
+    def playlist_count(self) -> 'u':
+        return len(self._playlists)
+
+    @dbus_property(access=PropertyAccess.READ, name='Orderings')
+    def orderings(self) -> 'as':
+        return self.dbus_value('Orderings')
+
+    @dbus_property(access=PropertyAccess.READ, name='ActivePlaylist')
+    def active_playlist(self) -> '(b(oss))':
+        return self.dbus_value('ActivePlaylist')
+
+    @method(name='ActivatePlaylist')
+    async def activate_playlist(self, playlist_id: 'o'):
+        if playlist_id in self._playlists:
+            await self._it._dispatch('on_activate_playlist', playlist_id)
+
+    @method(name='GetPlaylists')
+    def get_playlists(self, index: 'u', max_count: 'u', order: 's', reverse_order: 'b') -> 'a(oss)':
+        try:
+            ordering = PlaylistOrdering(order)
+        except ValueError:
+            raise DBusError(ErrorType.INVALID_ARGS, f'unknown playlist ordering "{order}"')
+        if ordering not in self._playlists.orderings:
+            raise DBusError(ErrorType.INVALID_ARGS, f'playlist ordering "{order}" is not supported')
+        return [self._dbus_playlist(playlist)
+                for playlist in self._playlists.page(index, max_count, ordering, reverse_order)]
+
+    @signal(name='PlaylistChanged')
+    def playlist_changed(self, playlist: list) -> '(oss)':
+        return playlist
 
 
 class Mpris2Interface(BaseInterface):
-    def __init__(self, name: str):
+    # Seconds to wait before reconnecting after the bus connection was lost, doubled per failed attempt.
+    reconnect_delay = 0.05
+    reconnect_max_delay = 5.0
+
+    def __init__(self, name: str, flush_interval: Optional[float] = None, compact: bool = False,
+                 bus_address: Optional[str] = None, scrub_window: Optional[float] = None, reconnect: bool = False,
+                 playlists: bool = False):
+        """
+        :param name: Player name, the bus name will be ``org.mpris.MediaPlayer2.{name}``.
+        :type name: str
+        :param flush_interval: If set, coalesce property changes and emit PropertiesChanged
+            at most once per this many seconds (e.g. 0.016 - 0.1), latest value wins.
+            Use :meth:`flush` to push pending changes out right away.
+        :type flush_interval: float
+        :param compact: Keep state in the ``__slots__`` classes of :mod:`aionowplaying.interface.compact`
+            instead of pydantic models.
+        :type compact: bool
+        :param bus_address: Connect to this D-Bus address instead of the session bus.
+        :type bus_address: str
+        :param scrub_window: If set, merge the Seek/SetPosition calls a client sends while the user drags
+            a progress bar: offsets are summed, the latest position wins, and the result is passed to
+            :meth:`on_seek`/:meth:`on_set_position` at most once per this many seconds (e.g. 0.1),
+            followed by a single Seeked signal; :meth:`seeked` called by those handlers sends none of its own.
+        :type scrub_window: float
+        :param reconnect: Make :meth:`start` reconnect when the bus connection is lost, e.g. when the
+            session bus restarts, instead of returning.
+        :type reconnect: bool
+        :param playlists: Export the Playlists interface from the start. Otherwise it is exported once
+            playlists are set, see :meth:`set_playlists`.
+        :type playlists: bool
+        """
         super().__init__(name)
         self.dbus = None
+        self._bus_address = bus_address
         self._bus_name = f'org.mpris.MediaPlayer2.{name}'
         self._entry_name = 'org.mpris.MediaPlayer2'
         self._player_entry_name = 'org.mpris.MediaPlayer2.Player'
         self._player_tracklist_name = 'org.mpris.MediaPlayer2.TrackList'
+        self._playlists_name = 'org.mpris.MediaPlayer2.Playlists'
         self._object_path = '/org/mpris/MediaPlayer2'
-        self._bus = MprisServiceInterface(self._entry_name, it=self)
-        self._player_bus = MprisPlayerServiceInterface(self._player_entry_name, it=self)
-        self._tracklist_bus = MprisTracklistServiceInterface(self._player_tracklist_name, it=self)
+        player_model, playback_model, tracklist_model = property_models(compact)
+        self._bus = MprisServiceInterface(self._entry_name, it=self, flush_interval=flush_interval,
+                                          properties=player_model())
+        self._player_bus = MprisPlayerServiceInterface(self._player_entry_name, it=self,
+                                                       flush_interval=flush_interval, properties=playback_model(),
+                                                       scrub_window=scrub_window)
+        self._tracklist_bus = MprisTracklistServiceInterface(self._player_tracklist_name, it=self,
+                                                             flush_interval=flush_interval,
+                                                             properties=tracklist_model())
+        self._playlists_bus = MprisPlaylistsServiceInterface(self._playlists_name, it=self,
+                                                             flush_interval=flush_interval)
+        self._service_buses = (self._bus, self._player_bus, self._tracklist_bus, self._playlists_bus)
+        # interfaces exported on the current connection, see _sync_exports()
+        self._exported: Set[MprisBaseServiceInterface] = set()
+        self._has_playlists = playlists
+        self._trace_handler = None
+        self._ready: Optional[asyncio.Event] = None
+        self._watcher: Optional[asyncio.Future] = None
+        self._answer_handler = None
+        self._reconnect = reconnect
+        self._stopping: Optional[asyncio.Event] = None
+        self.reconnects = 0
 
     def set_property(self, name: PropertyName, value: Any):
+        if self._queued((PropertyName, name), self.set_property, name, value):
+            return
         self._bus.set_property(name.value, value)
+        if name == PropertyName.HasTrackList:
+            self._sync_exports()
 
     def set_playback_property(self, name: PlaybackPropertyName, value: Any):
+        if self._queued((PlaybackPropertyName, name), self.set_playback_property, name, value):
+            return
         self._player_bus.set_property(name.value, value)
 
     def set_tracklist_property(self, name: TrackListPropertyName, value: Any):
+        if self._queued((TrackListPropertyName, name), self.set_tracklist_property, name, value):
+            return
+        if name == TrackListPropertyName.Tracks:
+            # plain track ids, metadata can be filled in later with update_track()
+            metadata_bean = type(self._player_bus.get_property(PlaybackPropertyName.Metadata))
+            self.set_tracks([metadata_bean(id_=track_id) for track_id in value])
+            return
         self._tracklist_bus.set_property(name.value, value)
 
+    def set_tracks(self, tracks: Iterable[Any], current_track: str = NO_TRACK):
+        if self._queued(None, self.set_tracks, tracks, current_track):
+            return
+        self._tracklist_bus.replace_tracks(tracks, current_track)
+
+    def add_track(self, metadata: Any, after_track: Optional[str] = None):
+        if self._queued(None, self.add_track, metadata, after_track):
+            return
+        self._tracklist_bus.insert_track(metadata, after_track)
+
+    def update_track(self, metadata: Any):
+        if self._queued(None, self.update_track, metadata):
+            return
+        self._tracklist_bus.update_track(metadata)
+
+    def remove_track(self, track_id: str):
+        if self._queued(None, self.remove_track, track_id):
+            return
+        self._tracklist_bus.delete_track(track_id)
+
+    def _snapshot_tracks(self) -> TrackStore:
+        return self._tracklist_bus._tracks
+
+    def _restore_tracks(self, track_ids: List[str], encoded: List[Any], decode: Callable[[Any], Any]):
+        self._tracklist_bus.load_tracks(track_ids, encoded, decode)
+
+    def _offer_playlists(self):
+        if not self._has_playlists:
+            self._has_playlists = True
+            self._sync_exports()
+
+    def set_playlists(self, playlists: Iterable[Playlist], orderings: Optional[Iterable[PlaylistOrdering]] = None):
+        if self._queued(None, self.set_playlists, playlists, orderings):
+            return
+        self._playlists_bus.replace_playlists(playlists, orderings)
+        self._offer_playlists()
+
+    def update_playlist(self, playlist: Playlist):
+        if self._queued(None, self.update_playlist, playlist):
+            return
+        self._playlists_bus.put_playlist(playlist)
+        self._offer_playlists()
+
+    def remove_playlist(self, playlist_id: str):
+        if self._queued(None, self.remove_playlist, playlist_id):
+            return
+        self._playlists_bus.delete_playlist(playlist_id)
+
+    def set_active_playlist(self, playlist_id: Optional[str]):
+        if self._queued(None, self.set_active_playlist, playlist_id):
+            return
+        self._playlists_bus.set_active(playlist_id)
+        self._offer_playlists()
+
+    def _begin_batch(self):
+        thread = self._service_thread
+        if thread is not None and thread.foreign():
+            thread.hold()
+            return
+        for bus in self._service_buses:
+            bus.begin_batch()
+
+    def _end_batch(self):
+        thread = self._service_thread
+        if thread is not None and thread.foreign():
+            thread.release()
+            return
+        for bus in self._service_buses:
+            bus.end_batch()
+
     def get_property(self, name: PropertyName) -> Any:
         return self._bus.get_property(name.value)
 
@@ -297,20 +1069,219 @@ class Mpris2Interface(BaseInterface):
     def get_tracklist_property(self, name: TrackListPropertyName) -> Any:
         return self._tracklist_bus.get_property(name.value)
 
+    async def flush(self):
+        for bus in self._service_buses:
+            bus.flush()
+
     async def seeked(self, position: int):
-        await self._player_bus.seeked(position)
+        self._player_bus.set_property(PlaybackPropertyName.Position.value, position)
+        if self._player_bus._delivering_scrub:
+            return  # the merged seek being handled sends Seeked once the handler returns
+        self._player_bus.seeked(position)
+        self._player_bus._count_signal('Seeked')
+
+    @property
+    def ready(self) -> asyncio.Event:
+        """Set while the player owns its bus name, e.g. ``await player.ready.wait()`` after starting :meth:`start`."""
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        return self._ready
+
+    async def connect(self):
+        """
+        Connect to the bus, export the MPRIS interfaces and request the bus name, then return once
+        the name is owned, with :attr:`ready` set. The property values are read before the name
+        is requested, so the first clients don't wait for them.
+        A background task clears :attr:`ready` when the connection closes, see :meth:`wait_closed`.
+        With snapshots enabled, the first call restores the saved state before anything else.
+        :meth:`start` does the same and then waits until the connection is closed.
+        :raises NameTakenError: If another connection owns the bus name.
+        """
+        if self.snapshot is not None and not self.snapshot.restored:
+            self.snapshot.restore()
+        self.dbus = dbus = await _MeteredMessageBus(bus_address=self._bus_address).connect()
+        try:
+            self._trace_handler = None
+            if self.metrics is not None:
+                self._install_metrics()
+            if self.tracer is not None:
+                self._install_tracing()
+            self._exported = set()
+            self._sync_exports()
+            self._warm_up()
+            reply = await dbus.request_name(self._bus_name, NameFlag.DO_NOT_QUEUE)
+            if reply not in (RequestNameReply.PRIMARY_OWNER, RequestNameReply.ALREADY_OWNER):
+                raise NameTakenError(f'{self._bus_name} is owned by another connection')
+        except BaseException:
+            dbus.disconnect()
+            self.dbus = None
+            raise
+        self._watcher = asyncio.ensure_future(dbus.wait_for_disconnect())
+        self._watcher.add_done_callback(self._disconnected)
+        self.ready.set()
+
+    def _disconnected(self, watcher: asyncio.Future):
+        self.ready.clear()
+        if not watcher.cancelled():
+            watcher.exception()  # raised by wait_closed(), don't report it as never retrieved
+
+    async def wait_closed(self):
+        """Wait until the connection made by :meth:`connect` is closed, raises if it broke."""
+        if self._watcher is not None:
+            await asyncio.shield(self._watcher)
+
+    def _wants_export(self, bus: MprisBaseServiceInterface) -> bool:
+        if bus is self._tracklist_bus:
+            return bool(self._bus.get_property(PropertyName.HasTrackList.value))
+        if bus is self._playlists_bus:
+            return self._has_playlists
+        return True
+
+    def _sync_exports(self):
+        """
+        Export the interfaces the player offers, TrackList only while HasTrackList is True and
+        Playlists once it has playlists, and unexport those it stopped offering.
+        """
+        if self.dbus is None or not self.dbus.connected:
+            return
+        for bus in self._service_buses:
+            wanted = self._wants_export(bus)
+            if wanted and bus not in self._exported:
+                self.dbus.export(self._object_path, bus)
+                self._exported.add(bus)
+            elif not wanted and bus in self._exported:
+                self.dbus.unexport(self._object_path, bus)
+                self._exported.discard(bus)
+
+    def _warm_up(self):
+        """
+        Answer GetAll with the ready-made values of :meth:`MprisBaseServiceInterface.get_all`, filled
+        before the name is requested, instead of dbus_next calling every property getter.
+        """
+        path = self._object_path
+        buses = {bus.name: bus for bus in self._service_buses}
+        exported = self._exported
+        for bus in exported:
+            bus.get_all()
+
+        def answer(message: Message):
+            if message.path != path or message.message_type != MessageType.METHOD_CALL:
+                return
+            if message.member == 'GetAll' and message.interface == 'org.freedesktop.DBus.Properties' \
+                    and message.signature == 's':
+                bus = buses.get(message.body[0])
+                # unknown and unexported interfaces are left to dbus_next, which replies with the error
+                if bus is not None and bus in exported:
+                    if message.flags & MessageFlag.NO_REPLY_EXPECTED:
+                        return True
+                    return Message.new_method_return(message, 'a{sv}', [bus.get_all()])
+
+        self._answer_handler = answer
+        self.dbus.add_message_handler(answer)
+
+    def _install_metrics(self):
+        # Signals are counted where the service interfaces emit them, sent messages and their bytes by the
+        # connection and incoming calls by a message handler on it; gauges replace one registered under
+        # the same name and label.
+        metrics = self.metrics
+        metrics.gauge('queue_depth', 'pending_changes', lambda: sum(len(bus._changed) for bus in self._service_buses))
+        if self.dbus is None:
+            return  # hooked up by connect()
+        self.dbus.metrics = metrics
+
+        def count_method_call(message: Message):
+            if message.message_type == MessageType.METHOD_CALL:
+                metrics.inc('method_calls_total', message.member)
+
+        self.dbus.add_message_handler(count_method_call)
+
+    def _install_tracing(self):
+        for bus in self._service_buses:
+            bus.trace(self.tracer)
+        if self.dbus is None or self._trace_handler is not None:
+            return  # hooked up by connect()
+        tracer = self.tracer
+        path = self._object_path
+
+        def note_received(message: Message):
+            # runs before dbus_next looks the method up, the traced method takes the time when it starts
+            if message.message_type != MessageType.METHOD_CALL or message.path != path:
+                return
+            key = (message.sender, message.serial)
+            if message.interface == 'org.freedesktop.DBus.Properties' and message.member == 'Set' \
+                    and message.signature == 'ssv':
+                tracer.received(f'{message.body[0]}.{message.body[1]}', key)
+            else:
+                tracer.received(f'{message.interface}.{message.member}', key)
+
+        self._trace_handler = note_received
+        self.dbus.add_message_handler(note_received)
+        self.dbus.tracer = tracer
+
+    def _uninstall_tracing(self):
+        for bus in self._service_buses:
+            bus.untrace()
+        if self._trace_handler is not None:
+            self.dbus.remove_message_handler(self._trace_handler)
+            self.dbus.tracer = None
+            self._trace_handler = None
 
     async def start(self):
-        self.dbus = await MessageBus().connect()
-        self.dbus.export(self._object_path, self._bus)
-        self.dbus.export(self._object_path, self._player_bus)
-        await self.dbus.request_name(self._bus_name)
-        await self.dbus.wait_for_disconnect()
+        """
+        Connect, then wait until the connection is closed. With ``reconnect`` set, a lost connection is
+        made again until :meth:`stop` is called, see :meth:`_supervise`.
+        """
+        self._stopping = asyncio.Event()
+        if self._reconnect:
+            await self._supervise()
+            return
+        await self.connect()
+        await self.wait_closed()
+
+    async def _supervise(self):
+        """
+        Keep the player on the bus: after the connection was lost, or while connecting fails, try again
+        after :attr:`reconnect_delay` seconds, doubled up to :attr:`reconnect_max_delay` for every failed
+        attempt. Once back, every interface announces its properties in one PropertiesChanged, so
+        clients that saw the player vanish catch up.
+        """
+        stopping = self._stopping
+        delay = self.reconnect_delay
+        connected_before = False
+        while not stopping.is_set():
+            try:
+                await self.connect()
+            except Exception as e:
+                logger.debug('connecting %s failed: %r', self._bus_name, e)
+                try:
+                    await asyncio.wait_for(stopping.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(delay * 2, self.reconnect_max_delay)
+                continue
+            delay = self.reconnect_delay
+            if connected_before:
+                self.reconnects += 1
+                for bus in self._service_buses:
+                    bus.republish()
+            connected_before = True
+            try:
+                await self.wait_closed()
+            except Exception as e:
+                if not stopping.is_set():
+                    logger.warning('lost the bus connection of %s, reconnecting: %r', self._bus_name, e)
 
     async def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+        if self.snapshot is not None:
+            await self.snapshot.close()
         if self.dbus is None:
             return
+        await self.flush()
         self.dbus.disconnect()
+        if self._watcher is not None:
+            await asyncio.gather(self._watcher, return_exceptions=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,96 @@
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from aionowplaying.interface.enums import PlaylistOrdering
+
+
+class Playlist(NamedTuple):
+    id_: str  # playlist object path
+    name: str
+    icon: str = ''  # icon uri
+    created: float = 0  # timestamps, used for the date orderings
+    modified: float = 0
+    played: float = 0
+
+
+def _sort_key(ordering: PlaylistOrdering, playlist: Playlist, position: int):
+    if ordering == PlaylistOrdering.Alphabetical:
+        return playlist.name.casefold()
+    if ordering == PlaylistOrdering.CreationDate:
+        return playlist.created
+    if ordering == PlaylistOrdering.ModifiedDate:
+        return playlist.modified
+    if ordering == PlaylistOrdering.LastPlayDate:
+        return playlist.played
+    return position
+
+
+class PlaylistStore:
+    """
+    Playlists with one pre-sorted index per ordering, kept up to date on every change,
+    so a page of :meth:`page` is a slice of an index rather than a sort of the whole collection.
+    ``UserDefined`` is the order playlists were first added in.
+    """
+
+    def __init__(self, orderings: Sequence[PlaylistOrdering] = tuple(PlaylistOrdering)):
+        self.orderings = list(orderings)
+        self._playlists: Dict[str, Playlist] = dict()
+        self._positions: Dict[str, int] = dict()
+        self._counter = count()
+        self._indexes: Dict[PlaylistOrdering, List[Tuple]] = {ordering: [] for ordering in self.orderings}
+
+    def __len__(self) -> int:
+        return len(self._playlists)
+
+    def __contains__(self, playlist_id: str) -> bool:
+        return playlist_id in self._playlists
+
+    def get(self, playlist_id: str) -> Optional[Playlist]:
+        return self._playlists.get(playlist_id)
+
+    def replace(self, playlists: Iterable[Playlist]):
+        self._playlists.clear()
+        self._positions.clear()
+        for playlist in playlists:
+            self._playlists[playlist.id_] = playlist
+            self._positions[playlist.id_] = next(self._counter)
+        for ordering in self.orderings:
+            self._indexes[ordering] = sorted(self._index_entry(ordering, playlist)
+                                             for playlist in self._playlists.values())
+
+    def put(self, playlist: Playlist) -> Optional[Playlist]:
+        """Add or update a playlist, return the previous version if there was one."""
+        previous = self._playlists.get(playlist.id_)
+        if previous is not None:
+            self._unindex(previous)
+        else:
+            self._positions[playlist.id_] = next(self._counter)
+        self._playlists[playlist.id_] = playlist
+        for ordering in self.orderings:
+            insort(self._indexes[ordering], self._index_entry(ordering, playlist))
+        return previous
+
+    def remove(self, playlist_id: str) -> Playlist:
+        playlist = self._playlists.pop(playlist_id)
+        self._unindex(playlist)
+        del self._positions[playlist_id]
+        return playlist
+
+    def page(self, index: int, max_count: int, ordering: PlaylistOrdering, reverse: bool = False) -> List[Playlist]:
+        entries = self._indexes[ordering]
+        if reverse:
+            end = len(entries) - index
+            entries = entries[max(0, end - max_count):max(0, end)][::-1]
+        else:
+            entries = entries[index:index + max_count]
+        return [self._playlists[entry[-1]] for entry in entries]
+
+    def _index_entry(self, ordering: PlaylistOrdering, playlist: Playlist) -> Tuple:
+        # the id breaks ties, so entries are unique and can be found again by bisection
+        return _sort_key(ordering, playlist, self._positions[playlist.id_]), playlist.id_
+
+    def _unindex(self, playlist: Playlist):
+        for ordering in self.orderings:
+            entries = self._indexes[ordering]
+            del entries[bisect_left(entries, self._index_entry(ordering, playlist))]
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Dict, Iterable, Iterator, List, Type
+
+from aionowplaying.interface.mpris2 import Mpris2Interface
+
+
+class PlayerPool:
+    """
+    Hosts many MPRIS players in one process, e.g. one per zone of a multi-room daemon.
+
+    Every player has its own bus connection and the instance-suffixed bus name
+    ``org.mpris.MediaPlayer2.{name}.instance{key}``. Players are connected concurrently
+    on the running event loop and can be added and removed at any time. The D-Bus member
+    tables and introspection data are shared between all players of a class.
+
+    ::
+
+        pool = PlayerPool('myplayer', bus_address=address)
+        kitchen, bedroom = await pool.add_many(['kitchen', 'bedroom'])
+        kitchen.set_playback_property(PlaybackPropertyName.Volume, 0.5)
+        await pool.remove('bedroom')
+    """
+
+    def __init__(self, name: str, player_class: Type[Mpris2Interface] = Mpris2Interface, **player_kwargs):
+        self.name = name
+        self._player_class = player_class
+        self._player_kwargs = player_kwargs
+        self._players: Dict[str, Mpris2Interface] = dict()
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._players
+
+    def __getitem__(self, key: str) -> Mpris2Interface:
+        return self._players[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._players)
+
+    async def add(self, key: str) -> Mpris2Interface:
+        return (await self.add_many([key]))[0]
+
+    async def add_many(self, keys: Iterable[str]) -> List[Mpris2Interface]:
+        """
+        Create and connect a player for each key concurrently.
+        Players that connected stay in the pool if another one fails, the first error is raised.
+        """
+        keys = [str(key) for key in keys]
+        for key in keys:
+            if key in self._players:
+                raise KeyError(f'player {key!r} is already in the pool')
+        players = [self._player_class(f'{self.name}.instance{key}', **self._player_kwargs) for key in keys]
+        results = await asyncio.gather(*(player.connect() for player in players), return_exceptions=True)
+        error = None
+        for key, player, result in zip(keys, players, results):
+            if isinstance(result, BaseException):
+                error = error or result
+                await player.stop()
+                continue
+            self._players[key] = player
+        if error is not None:
+            raise error
+        return players
+
+    async def remove(self, key: str):
+        player = self._players.pop(key)
+        await player.stop()
+
+    async def close(self):
+        players, self._players = self._players, dict()
+        await asyncio.gather(*(player.stop() for player in players.values()))
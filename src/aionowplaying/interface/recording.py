@@ -0,0 +1,255 @@
+"""
+Recording of what an application does with a player, and replaying it into another one.
+
+:class:`Recorder` wraps a :class:`BaseInterface` instance and appends every property set, tracklist edit,
+batch boundary and incoming command (the ``on_*`` handler calls made through the dispatcher) to a file,
+with :func:`time.monotonic` offsets from the start of the recording. :class:`Replayer` drives a backend
+from such a file at the recorded pace, faster, or as fast as possible, and reports throughput and
+command latency, e.g. to compare coalescing and caching changes on a real session.
+
+The file is a header followed by one :mod:`marshal` encoded tuple per call, enums are stored by value
+and track metadata as a tuple of its field values, as in snapshots.
+"""
+import asyncio
+import inspect
+import marshal
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from aionowplaying.interface.enums import PropertyName, PlaybackPropertyName, TrackListPropertyName, \
+    PlaybackStatus, LoopStatus
+from aionowplaying.interface.snapshot import decode_metadata, encode_metadata, metadata_fields
+
+if TYPE_CHECKING:
+    from aionowplaying.interface.base import BaseInterface
+
+MAGIC = 'aionowplaying-recording'
+VERSION = 1
+
+# record kinds
+SET, SET_PLAYBACK, SET_TRACKLIST, COMMAND, BEGIN_BATCH, END_BATCH, SET_TRACKS, ADD_TRACK, UPDATE_TRACK, \
+    REMOVE_TRACK = range(10)
+_SETTERS = {SET: ('set_property', PropertyName), SET_PLAYBACK: ('set_playback_property', PlaybackPropertyName),
+            SET_TRACKLIST: ('set_tracklist_property', TrackListPropertyName)}
+_TRACK_EDITS = {SET_TRACKS: 'set_tracks', ADD_TRACK: 'add_track', UPDATE_TRACK: 'update_track',
+                REMOVE_TRACK: 'remove_track'}
+# property or handler -> enum its recorded value is converted back to
+_ENUMS = {PlaybackPropertyName.PlaybackStatus.value: PlaybackStatus, PlaybackPropertyName.LoopStatus.value: LoopStatus,
+          'on_loop_status': LoopStatus}
+
+
+class Recorder:
+    """
+    Records the calls made on ``player`` to the file ``path`` until :meth:`close`, appending if it exists.
+    Calls made from another thread while the player runs in a :class:`ServiceThread` are recorded when
+    they run on it, after merging.
+    """
+
+    def __init__(self, player: 'BaseInterface', path: str):
+        self.player = player
+        self.path = path
+        self.records = 0
+        # nesting of recorded calls, per thread as setters may run in several
+        self._local = threading.local()
+        self._file: Optional[BinaryIO] = open(path, 'ab')
+        self._start = time.monotonic()
+        self._fields = metadata_fields(type(player.get_playback_property(PlaybackPropertyName.Metadata)))
+        marshal.dump((MAGIC, VERSION, self._fields, time.time()), self._file)
+        self._install()
+
+    def __enter__(self) -> 'Recorder':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _install(self):
+        player = self.player
+        for kind, (name, _) in _SETTERS.items():
+            self._wrap(name, kind, lambda key, value: (key.value, self._plain(value)))
+        for kind, name in _TRACK_EDITS.items():
+            if kind == SET_TRACKS:
+                # tracks may be an iterator, the backend gets them as a list
+                self._wrap(name, kind, lambda tracks, *args: ([self._plain(track) for track in tracks], *args),
+                           lambda tracks, *args: (list(tracks), *args))
+            else:
+                self._wrap(name, kind, lambda *args: tuple(self._plain(arg) for arg in args))
+        self._wrap('_begin_batch', BEGIN_BATCH, lambda: None)
+        self._wrap('_end_batch', END_BATCH, lambda: None)
+        dispatch = player._dispatch
+
+        def recorded_dispatch(handler: str, *args) -> asyncio.Future:
+            self._write(COMMAND, (handler, tuple(self._plain(arg) for arg in args)))
+            return dispatch(handler, *args)
+
+        player._dispatch = recorded_dispatch
+
+    def _wrap(self, name: str, kind: int, encode: Callable[..., Any], prepare: Optional[Callable[..., tuple]] = None):
+        player = self.player
+        original = getattr(player, name)
+        signature = inspect.signature(original)
+        local = self._local
+
+        def recorded(*args, **kwargs):
+            if kwargs:
+                # recorded and replayed by position
+                args = signature.bind(*args, **kwargs).args
+            if prepare is not None:
+                args = prepare(*args)
+            thread = player._service_thread
+            depth = getattr(local, 'depth', 0)
+            # calls the backend makes from within a recorded call, e.g. set_tracks() for the Tracks property,
+            # are replayed by that call
+            if not depth and (thread is None or not thread.foreign()):
+                self._write(kind, encode(*args))
+            local.depth = depth + 1
+            try:
+                return original(*args)
+            finally:
+                local.depth = depth
+
+        setattr(player, name, recorded)
+
+    def _plain(self, value: Any) -> Any:
+        if hasattr(value, 'id_'):
+            # track metadata, the only tuple in a record
+            return encode_metadata(value, self._fields)
+        return getattr(value, 'value', value)
+
+    def _write(self, kind: int, data: Any):
+        if self._file is None:
+            return
+        marshal.dump((time.monotonic() - self._start, kind, data), self._file)
+        self.records += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """Stop recording, the player's methods are no longer wrapped."""
+        if self._file is None:
+            return
+        for name in [name for name, _ in _SETTERS.values()] + list(_TRACK_EDITS.values()) + \
+                ['_begin_batch', '_end_batch', '_dispatch']:
+            vars(self.player).pop(name, None)
+        self._file.close()
+        self._file = None
+
+
+def read_recording(path: str) -> Tuple[Tuple[str, ...], List[Tuple[float, int, Any]]]:
+    """The metadata field names and the records of a recording, of the last part if it was appended to."""
+    fields: Tuple[str, ...] = ()
+    records = []
+    with open(path, 'rb') as file:
+        for record in _load_all(file):
+            if record[0] == MAGIC:
+                if record[1] != VERSION:
+                    raise ValueError(f'{path} is a version {record[1]} recording, expected {VERSION}')
+                fields, records = tuple(record[2]), []
+            else:
+                records.append(record)
+    return fields, records
+
+
+def _load_all(file: BinaryIO) -> Iterator[tuple]:
+    while True:
+        try:
+            yield marshal.load(file)
+        except EOFError:
+            return
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+class Replayer:
+    """
+    Replays a recording into a player: property sets and tracklist edits are made through the player's
+    setters, commands are dispatched to its ``on_*`` handlers as the backend would. What the recorded
+    application's handlers set in response is part of the recording, replay into handlers that don't.
+
+    :param speed: How many times faster than recorded to replay, None for as fast as possible.
+    """
+
+    # as fast as possible, yield to the event loop after this many records so timers still run
+    yield_every = 64
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        self.path = path
+        self.speed = speed
+        self._fields, self._records = read_recording(path)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def replay(self, player: 'BaseInterface') -> Dict[str, Any]:
+        """
+        Replay into ``player`` and return a report: ``records`` and ``commands`` replayed, the wall-clock
+        ``seconds`` it took and ``records_per_second``, command latency (until the handler returned)
+        percentiles in microseconds, and for paced replays how late records were applied.
+        """
+        bean_class = type(player.get_playback_property(PlaybackPropertyName.Metadata))
+        fields = self._fields
+
+        def value(plain: Any) -> Any:
+            return decode_metadata(dict(zip(fields, plain)), bean_class) if type(plain) is tuple else plain
+
+        latencies: List[float] = []
+        lateness: List[float] = []
+        pending: List[asyncio.Future] = []
+        loop = asyncio.get_running_loop()
+        speed = self.speed
+        start = loop.time()
+        for index, (offset, kind, data) in enumerate(self._records):
+            if speed is not None:
+                due = start + offset / speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lateness.append(max(0.0, loop.time() - due))
+            elif index % self.yield_every == 0:
+                await asyncio.sleep(0)
+            if kind == COMMAND:
+                handler, args = data
+                enum = _ENUMS.get(handler)
+                args = tuple(enum(arg) if enum is not None else value(arg) for arg in args)
+                pending.append(self._timed(player._dispatch(handler, *args), latencies))
+            elif kind in _SETTERS:
+                setter, names = _SETTERS[kind]
+                name, plain = data
+                enum = _ENUMS.get(name)
+                getattr(player, setter)(names(name), enum(plain) if enum is not None else value(plain))
+            elif kind == SET_TRACKS:
+                tracks, *current = data
+                player.set_tracks([value(track) for track in tracks], *current)
+            elif kind in _TRACK_EDITS:
+                getattr(player, _TRACK_EDITS[kind])(*(value(arg) for arg in data))
+            elif kind == BEGIN_BATCH:
+                player._begin_batch()
+            elif kind == END_BATCH:
+                player._end_batch()
+        await asyncio.gather(*pending, return_exceptions=True)
+        seconds = loop.time() - start
+        latencies.sort()
+        lateness.sort()
+        report = {
+            'records': len(self._records),
+            'commands': len(latencies),
+            'seconds': round(seconds, 6),
+            'records_per_second': round(len(self._records) / seconds) if seconds else None,
+            'command_p50_us': round(_percentile(latencies, 0.5) * 1e6, 1),
+            'command_p99_us': round(_percentile(latencies, 0.99) * 1e6, 1),
+            'command_max_us': round((latencies[-1] if latencies else 0.0) * 1e6, 1),
+        }
+        if speed is not None:
+            report['late_p99_us'] = round(_percentile(lateness, 0.99) * 1e6, 1)
+        return report
+
+    @staticmethod
+    def _timed(future: asyncio.Future, latencies: List[float]) -> asyncio.Future:
+        started = time.perf_counter()
+        future.add_done_callback(lambda done: latencies.append(time.perf_counter() - started))
+        return future
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Coroutine, Dict, Hashable, Optional, Union
+
+from aionowplaying.interface.base import BaseInterface
+
+
+class ServiceThread:
+    """
+    Runs a backend on its own event loop in a daemon thread, for applications whose
+    state changes come from GUI, decoder or other non-asyncio threads.
+
+    While it runs, the backend's setters may be called from any thread. Calls from other threads
+    only store the change and wake the service loop once, repeated writes to the same property
+    are merged and only the latest value is published. Everything queued at the time the loop
+    gets to it is applied as one batch. Once the thread has stopped, setters run right away in the
+    calling thread.
+
+    ``on_*`` handlers run on the service loop unless ``callback_executor`` is given,
+    see :meth:`BaseInterface._call_handler`.
+
+    ::
+
+        player = MyPlayer('myplayer')
+        service = ServiceThread(player, callback_executor=gui_executor)
+        service.start()
+        player.set_playback_property(PlaybackPropertyName.Volume, 0.5)  # from any thread
+        service.stop()
+    """
+
+    def __init__(self, player: BaseInterface,
+                 callback_executor: Union[Executor, asyncio.AbstractEventLoop, None] = None):
+        self.player = player
+        if callback_executor is not None:
+            player.callback_executor = callback_executor
+        player._service_thread = self
+        self.exception: Optional[BaseException] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ident: Optional[int] = None
+        self._ready = threading.Event()
+        self._stopping: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self._pending: Dict[Hashable, tuple] = dict()
+        self._scheduled = True  # nothing to wake before the loop runs, it drains once started
+        self._closed = False  # set under _lock once the loop stops draining, see _main()
+        self._local = threading.local()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    def foreign(self) -> bool:
+        """Whether the calling thread is not the service thread, so calls must be queued."""
+        return threading.get_ident() != self._ident
+
+    def enqueue(self, key: Optional[Hashable], function: Callable, *args) -> bool:
+        """
+        Run ``function(*args)`` on the service loop. A later call with the same ``key`` replaces
+        this one if it has not run yet, calls with a None key are never merged.
+        Returns False without queueing once the service loop has stopped, the caller runs it instead.
+        """
+        if key is None:
+            key = object()
+        batch = getattr(self._local, 'batch', None)
+        if batch is not None:
+            batch.pop(key, None)
+            batch[key] = (function, args)
+            return True
+        with self._lock:
+            if self._closed:
+                return False
+            # re-inserted so queued calls keep the order of their latest write
+            self._pending.pop(key, None)
+            self._pending[key] = (function, args)
+            if not self._scheduled:
+                self._scheduled = True
+                # under the lock, so the loop can't close in between, see _main()
+                self._loop.call_soon_threadsafe(self._drain)
+        return True
+
+    def hold(self):
+        """Collect this thread's calls until the matching :meth:`release`, then queue them together."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.batch = dict()
+        self._local.depth = depth + 1
+
+    def release(self):
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        batch, self._local.batch = self._local.batch, None
+        if not batch:
+            return
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                for key, call in batch.items():
+                    self._pending.pop(key, None)
+                    self._pending[key] = call
+                if not self._scheduled:
+                    self._scheduled = True
+                    self._loop.call_soon_threadsafe(self._drain)
+        if closed:
+            for function, args in batch.values():
+                function(*args)
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """Run a coroutine on the service loop, e.g. ``service.submit(player.flush())``."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def start(self, timeout: Optional[float] = None):
+        """Start the thread and return once its event loop is running and the backend is starting."""
+        if self._thread is not None:
+            raise RuntimeError('service thread already started')
+        self._thread = threading.Thread(target=self._run, name=f'aionowplaying-{type(self.player).__name__}',
+                                        daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError('service thread did not start in time')
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the backend and the loop, wait for the thread to finish."""
+        if self._thread is None:
+            return
+        if not self.foreign():
+            raise RuntimeError('stop() would wait for its own thread')
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        finally:
+            self._ready.set()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._ident = threading.get_ident()
+        self._stopping = asyncio.Event()
+        self._drain()
+        running = asyncio.ensure_future(self.player.start())
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        self._ready.set()
+        await asyncio.wait({running, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        if running.done() and not running.cancelled():
+            self.exception = running.exception()
+        self._drain()
+        await self.player.stop()
+        for task in (running, stopping):
+            task.cancel()
+        await asyncio.gather(running, stopping, return_exceptions=True)
+        with self._lock:
+            self._closed = True
+        # whatever was queued before closing, later calls run in their own thread
+        self._drain()
+        self.player._service_thread = None
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, dict()
+            self._scheduled = False
+        if not pending:
+            return
+        self.player._begin_batch()
+        try:
+            for function, args in pending.values():
+                try:
+                    function(*args)
+                except Exception as e:
+                    self._loop.call_exception_handler({
+                        'message': f'queued call {getattr(function, "__name__", function)!r} failed',
+                        'exception': e,
+                    })
+        finally:
+            self.player._end_batch()
+
+    def __repr__(self) -> str:
+        return f'ServiceThread({self.player!r}, running={self._thread is not None and self._thread.is_alive()})'
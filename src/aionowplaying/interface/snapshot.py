@@ -0,0 +1,308 @@
+"""
+The player's state saved to a compact binary file, enabled with :meth:`BaseInterface.enable_snapshots`,
+so a restarted player answers with its last known state before the application has rebuilt it.
+
+The file holds one :mod:`marshal` encoded section each for the player, playback and tracklist
+properties and the tracks. Only sections the backend marked dirty are encoded again, the file is
+replaced atomically and written at most once per interval, off the event loop. Tracks are stored
+as one encoded row each and decoded when first read after a restore, so a large tracklist is back
+in milliseconds.
+"""
+import asyncio
+import logging
+import marshal
+import os
+import struct
+import tempfile
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Set, Tuple, TYPE_CHECKING
+
+from aionowplaying.interface.compact import SlotsModel
+from aionowplaying.interface.enums import PropertyName, PlaybackPropertyName, TrackListPropertyName, \
+    PlaybackStatus, LoopStatus, MediaType
+
+if TYPE_CHECKING:
+    from aionowplaying.interface.base import BaseInterface
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'ANPS'
+VERSION = 1
+_HEADER = struct.Struct('<4sH')
+
+SECTIONS = ('player', 'playback', 'tracklist', 'tracks')
+# property -> enum its stored value is converted back to
+_ENUMS = {PlaybackPropertyName.PlaybackStatus.value: PlaybackStatus,
+          PlaybackPropertyName.LoopStatus.value: LoopStatus,
+          'media_type': MediaType}
+
+_class_fields: Dict[type, Tuple[str, ...]] = dict()
+
+
+def metadata_fields(bean_class: type) -> Tuple[str, ...]:
+    """Field names of a metadata class, compact or pydantic, in declaration order."""
+    fields = _class_fields.get(bean_class)
+    if fields is None:
+        if issubclass(bean_class, SlotsModel):
+            fields = tuple(bean_class._defaults)
+        else:
+            fields = tuple(bean_class.model_fields)
+        _class_fields[bean_class] = fields
+    return fields
+
+
+def _plain(value: Any) -> Any:
+    # marshal only takes the exact builtin types, enums are stored by value
+    return value.value if isinstance(value, Enum) else value
+
+
+def encode_metadata(metadata: Any, fields: Tuple[str, ...]) -> tuple:
+    return tuple(_plain(getattr(metadata, name)) for name in fields)
+
+
+def decode_metadata(values: Dict[str, Any], bean_class: type) -> Any:
+    """Build a ``bean_class`` from stored values, fields the class doesn't have are dropped."""
+    known = metadata_fields(bean_class)
+    # list fields of frozen metadata are stored as tuples, mutable beans get lists
+    values = {name: list(value) if type(value) is tuple else value for name, value in values.items() if name in known}
+    if 'media_type' in values:
+        values['media_type'] = MediaType(values['media_type'])
+    return bean_class(**values)
+
+
+def _known(enum: type, values: Dict[str, Any]) -> Dict[Enum, Any]:
+    members = enum._value2member_map_
+    return {members[name]: value for name, value in values.items() if name in members}
+
+
+def write_atomically(path: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.snapshot')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class StateSnapshot:
+    """
+    Snapshot file of one player. Backends call :meth:`mark_dirty` with the section a change belongs to,
+    a write follows ``interval`` seconds after the first change since the last one. Position moves without
+    changes being marked, the playback section is read again for every write.
+    """
+
+    def __init__(self, player: 'BaseInterface', path: str, interval: float = 1.0):
+        self.player = player
+        self.path = path
+        self.interval = interval
+        self.restored = False
+        self.writes = 0
+        self._sections: Dict[str, bytes] = dict()
+        self._dirty: Set[str] = set(SECTIONS)
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Future] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # track id -> (metadata, its encoded row) as of the last write
+        self._rows: Dict[str, Tuple[Any, bytes]] = dict()
+        self._readers: Dict[str, Callable[[], Any]] = {
+            'player': self._read_player,
+            'playback': self._read_playback,
+            'tracklist': self._read_tracklist,
+            'tracks': self._read_tracks,
+        }
+
+    def mark_dirty(self, section: str):
+        self._dirty.add(section)
+        if self._handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # written with the next change made on the event loop, or by save()
+        self._handle = loop.call_later(self.interval, self._save_later)
+
+    def _save_later(self):
+        self._handle = None
+        self._task = asyncio.ensure_future(self._autosave())
+
+    async def _autosave(self):
+        try:
+            await self.save()
+        except Exception:
+            logger.exception('writing the snapshot %s failed', self.path)
+
+    async def save(self):
+        """Write the file now, if anything changed since the last write."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._dirty:
+                return
+            collected = self._collect()
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._write, collected)
+            except BaseException:
+                self._dirty.update(collected)
+                raise
+            self.writes += 1
+
+    def _write(self, collected: Dict[str, Any]):
+        write_atomically(self.path, self._assemble(collected))
+
+    def encode(self) -> bytes:
+        """The file content, encoding the dirty sections again."""
+        return self._assemble(self._collect())
+
+    def _collect(self) -> Dict[str, Any]:
+        # Read on the event loop. Encoding, the expensive part with many new tracks, is left to _assemble(),
+        # which save() runs in an executor.
+        self._dirty.add('playback')
+        collected = {section: self._readers[section]() for section in self._dirty}
+        self._dirty.clear()
+        return collected
+
+    def _assemble(self, collected: Dict[str, Any]) -> bytes:
+        for section, value in collected.items():
+            if section == 'tracks':
+                value = self._encode_tracks(*value)
+            self._sections[section] = marshal.dumps(value)
+        return _HEADER.pack(MAGIC, VERSION) + marshal.dumps(self._sections)
+
+    def _read_player(self) -> dict:
+        player = self.player
+        return {name.value: _plain(player.get_property(name)) for name in PropertyName}
+
+    def _read_playback(self) -> dict:
+        player = self.player
+        values = dict()
+        for name in PlaybackPropertyName:
+            value = player.get_playback_property(name)
+            if name == PlaybackPropertyName.Metadata:
+                fields = metadata_fields(type(value))
+                value = dict(zip(fields, encode_metadata(value, fields)))
+            values[name.value] = _plain(value)
+        return values
+
+    def _read_tracklist(self) -> dict:
+        name = TrackListPropertyName.CanEditTracks
+        return {name.value: self.player.get_tracklist_property(name)}
+
+    def _read_tracks(self) -> tuple:
+        # (fields, track ids, encoded rows or the metadata still to encode)
+        store = self.player._snapshot_tracks()
+        fields = metadata_fields(self._bean_class())
+        if store is None:
+            return fields, [], []
+        track_ids, items, previous = [], [], self._rows
+        for track_id in store:
+            item = store.encoded(track_id)
+            if item is None:
+                item = store.get(track_id)
+                cached = previous.get(track_id)
+                if cached is not None and cached[0] is item:
+                    item = cached[1]
+            track_ids.append(track_id)
+            items.append(item)
+        return fields, track_ids, items
+
+    def _encode_tracks(self, fields: Tuple[str, ...], track_ids: list, items: list) -> tuple:
+        rows, cache, previous = [], dict(), self._rows
+        for track_id, item in zip(track_ids, items):
+            if type(item) is bytes:
+                row = item
+                cached = previous.get(track_id)
+                if cached is not None and cached[1] is row:
+                    cache[track_id] = cached
+            else:
+                row = marshal.dumps(encode_metadata(item, fields))
+                cache[track_id] = (item, row)
+            rows.append(row)
+        self._rows = cache
+        return fields, track_ids, rows
+
+    def _bean_class(self) -> type:
+        return type(self.player.get_playback_property(PlaybackPropertyName.Metadata))
+
+    def load(self) -> Optional[Dict[str, bytes]]:
+        """The encoded sections of the file, None if there is no file or it can't be read."""
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning('reading the snapshot %s failed: %r', self.path, e)
+            return None
+        if len(data) < _HEADER.size or _HEADER.unpack_from(data) != (MAGIC, VERSION):
+            logger.warning('ignoring %s, not a version %d snapshot', self.path, VERSION)
+            return None
+        try:
+            sections = marshal.loads(memoryview(data)[_HEADER.size:])
+        except (EOFError, ValueError, TypeError) as e:
+            logger.warning('ignoring the damaged snapshot %s: %r', self.path, e)
+            return None
+        return {section: sections[section] for section in SECTIONS if section in sections}
+
+    def restore(self) -> bool:
+        """
+        Set the player's properties and tracks to those in the file. Returns False if there was no
+        usable file. Tracks are decoded when first read. A player saved while playing comes back
+        paused at the saved position, nothing is playing until the application says so.
+        """
+        self.restored = True
+        sections = self.load()
+        if sections is None:
+            return False
+        player = self.player
+        bean_class = self._bean_class()
+        if 'player' in sections:
+            player.set_properties(_known(PropertyName, marshal.loads(sections['player'])))
+        if 'playback' in sections:
+            values = marshal.loads(sections['playback'])
+            for name, value in values.items():
+                if name == PlaybackPropertyName.Metadata:
+                    values[name] = decode_metadata(value, bean_class)
+                elif name in _ENUMS:
+                    values[name] = _ENUMS[name](value)
+            if values.get(PlaybackPropertyName.PlaybackStatus.value) is PlaybackStatus.Playing:
+                # playing would run the clock on from the restore, past where playback stopped
+                values[PlaybackPropertyName.PlaybackStatus.value] = PlaybackStatus.Paused
+            player.set_playback_properties(_known(PlaybackPropertyName, values))
+        if 'tracklist' in sections:
+            for name, value in _known(TrackListPropertyName, marshal.loads(sections['tracklist'])).items():
+                player.set_tracklist_property(name, value)
+        dirty = set()
+        if 'tracks' in sections:
+            fields, track_ids, rows = marshal.loads(sections['tracks'])
+
+            def decode(row: bytes) -> Any:
+                return decode_metadata(dict(zip(fields, marshal.loads(row))), bean_class)
+
+            if tuple(fields) == metadata_fields(bean_class):
+                player._restore_tracks(track_ids, rows, decode)
+            else:
+                # stored by a different metadata class, the rows are encoded again on the next write
+                player.set_tracks([decode(row) for row in rows])
+                dirty.add('tracks')
+        # what was just restored is what the file holds
+        self._sections.update(sections)
+        self._dirty = dirty | (set(SECTIONS) - set(sections))
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        return True
+
+    async def close(self):
+        """Write pending changes and stop writing."""
+        await self.save()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,146 @@
+"""
+Per-call timing of incoming commands, enabled with :meth:`BaseInterface.enable_tracing`.
+
+A traced call records when each stage was reached, with :func:`time.perf_counter`:
+the transport received the request, the backend's method started, it handed the command to the
+:class:`~aionowplaying.interface.dispatch.CommandDispatcher`, the ``on_*`` handler started and
+finished, and the method returned. Calls slower than a threshold are logged with the breakdown
+and kept in a ring buffer.
+"""
+import contextvars
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The call being traced in the current task, read by the dispatcher when a command is queued.
+current_trace: contextvars.ContextVar[Optional['CallTrace']] = contextvars.ContextVar('current_trace', default=None)
+
+
+class CallTrace:
+    """
+    Timestamps of one call. Stages that were not reached are None, e.g. ``dispatched`` if the
+    method returned without running a handler; ``received`` if the transport does not report it.
+    """
+    __slots__ = ('member', 'received', 'entered', 'dispatched', 'handler', 'handler_started',
+                 'handler_finished', 'returned')
+
+    def __init__(self, member: str, received: Optional[float] = None):
+        self.member = member
+        self.received = received
+        self.entered = time.perf_counter()
+        self.dispatched: Optional[float] = None
+        self.handler: Optional[str] = None
+        self.handler_started: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+        self.returned: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        end = self.returned if self.returned is not None else time.perf_counter()
+        return end - (self.received if self.received is not None else self.entered)
+
+    def stages(self) -> Dict[str, float]:
+        """
+        Seconds spent in each stage: ``transport`` from receiving the request to entering the method,
+        ``method`` in the method itself, ``queue`` waiting in the dispatcher, ``handler`` in the
+        ``on_*`` handler, and the ``total``.
+        """
+        end = self.returned if self.returned is not None else time.perf_counter()
+        stages = {'transport': self.entered - self.received if self.received is not None else 0.0}
+        method = end - self.entered
+        if self.dispatched is not None and self.handler_started is not None:
+            stages['queue'] = self.handler_started - self.dispatched
+            method -= stages['queue']
+            if self.handler_finished is not None:
+                stages['handler'] = self.handler_finished - self.handler_started
+                method -= stages['handler']
+        stages['method'] = method
+        stages['total'] = self.duration
+        return stages
+
+    def __repr__(self):
+        breakdown = ' '.join(f'{stage}={seconds * 1000:.3f}ms' for stage, seconds in self.stages().items())
+        handler = f' -> {self.handler}' if self.handler else ''
+        return f'<CallTrace {self.member}{handler} {breakdown}>'
+
+
+class Tracer:
+    """
+    Collects :class:`CallTrace` objects from a backend. Every finished trace is passed to the hooks,
+    traces taking ``slow_threshold`` seconds or longer are logged at WARNING level and the last
+    ``capacity`` of them are kept for :meth:`slow_calls`.
+    """
+
+    def __init__(self, slow_threshold: float = 0.05, capacity: int = 64,
+                 hook: Optional[Callable[[CallTrace], None]] = None):
+        self.slow_threshold = slow_threshold
+        self.hooks: List[Callable[[CallTrace], None]] = [hook] if hook is not None else []
+        self._slow: Deque[CallTrace] = deque(maxlen=capacity)
+        # member -> when the transport received requests whose method has not started yet, and their keys
+        self._received: Dict[str, Deque[Tuple[float, Optional[Hashable]]]] = dict()
+        # key -> member of those requests, see rejected()
+        self._keys: Dict[Hashable, str] = dict()
+
+    def add_hook(self, hook: Callable[[CallTrace], None]):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[CallTrace], None]):
+        self.hooks.remove(hook)
+
+    def slow_calls(self) -> List[CallTrace]:
+        """The slow calls kept, oldest first."""
+        return list(self._slow)
+
+    def expect(self, member: str) -> Deque[Tuple[float, Optional[Hashable]]]:
+        """The queue the transport appends receive times of ``member`` to, see :meth:`received`."""
+        received = self._received.get(member)
+        if received is None:
+            # bounded, a request that never reaches its method must not pile up
+            received = self._received[member] = deque(maxlen=64)
+        return received
+
+    def received(self, member: str, key: Optional[Hashable] = None):
+        """
+        Note that a request for ``member`` arrived, its method starts later. ``key`` identifies the
+        request if the transport can tell when it is answered without its method, see :meth:`rejected`.
+        """
+        received = self._received.get(member)
+        if received is None:
+            return
+        if len(received) == received.maxlen:
+            self._keys.pop(received[0][1], None)
+        received.append((time.perf_counter(), key))
+        if key is not None:
+            self._keys[key] = member
+
+    def rejected(self, key: Hashable):
+        """Forget a request that was answered with an error before its method started, e.g. for a bad signature."""
+        member = self._keys.pop(key, None)
+        if member is None:
+            return
+        received = self._received[member]
+        for entry in received:
+            if entry[1] == key:
+                received.remove(entry)
+                break
+
+    def begin(self, member: str) -> CallTrace:
+        """Start the trace of a call, the caller makes it the :data:`current_trace` while the call runs."""
+        received = self._received.get(member)
+        if not received:
+            return CallTrace(member)
+        at, key = received.popleft()
+        if key is not None:
+            self._keys.pop(key, None)
+        return CallTrace(member, at)
+
+    def end(self, trace: CallTrace):
+        trace.returned = time.perf_counter()
+        for hook in self.hooks:
+            hook(trace)
+        if trace.duration >= self.slow_threshold:
+            self._slow.append(trace)
+            logger.warning('slow call %r', trace)
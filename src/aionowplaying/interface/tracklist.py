@@ -0,0 +1,189 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+NO_TRACK = '/org/mpris/MediaPlayer2/TrackList/NoTrack'
+
+
+class TrackStore:
+    """
+    Ordered collection of track metadata keyed by track id (the track object path).
+
+    Lookups by id are dict lookups. The order is kept as sorted integer keys spread
+    over a list of bounded blocks, so inserting or removing a track bisects the
+    block maxima and touches a single block instead of shifting the whole queue.
+    Tracks put in with :meth:`load` keep their encoded metadata until it is first read.
+    """
+
+    _GAP = 1 << 20
+    _LOAD = 512
+
+    def __init__(self, tracks: Iterable[Any] = ()):
+        self._metadata: Dict[str, Any] = dict()
+        self._keys: Dict[str, int] = dict()
+        self._blocks: List[List[int]] = []
+        self._block_ids: List[List[str]] = []
+        self._maxes: List[int] = []
+        # track id -> encoded metadata not decoded yet, see load()
+        self._encoded: Dict[str, Any] = dict()
+        self._decode: Optional[Callable[[Any], Any]] = None
+        self.replace(tracks)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        for ids in self._block_ids:
+            yield from ids
+
+    def ids(self) -> List[str]:
+        return [track_id for ids in self._block_ids for track_id in ids]
+
+    def get(self, track_id: str) -> Optional[Any]:
+        metadata = self._metadata.get(track_id)
+        if metadata is None and self._encoded:
+            return self._decoded(track_id)
+        return metadata
+
+    def get_many(self, track_ids: Iterable[str]) -> List[Any]:
+        """Metadata of the given tracks in the given order, unknown ids are skipped."""
+        if self._encoded:
+            return [self.get(track_id) for track_id in track_ids if track_id in self._keys]
+        metadata = self._metadata
+        return [metadata[track_id] for track_id in track_ids if track_id in metadata]
+
+    def encoded(self, track_id: str) -> Optional[Any]:
+        """The encoded metadata of a track put in with :meth:`load` that was not read since, else None."""
+        return self._encoded.get(track_id)
+
+    def replace(self, tracks: Iterable[Any]):
+        metadata = dict()
+        for track in tracks:
+            # a repeated id moves the track, as insert() does
+            metadata.pop(track.id_, None)
+            metadata[track.id_] = track
+        self._metadata = metadata
+        self._encoded = dict()
+        self._build(list(metadata))
+
+    def load(self, track_ids: List[str], encoded: List[Any], decode: Callable[[Any], Any]):
+        """
+        Replace all tracks with ``track_ids`` in order, the metadata of each is ``decode(encoded[i])``.
+        Decoding is deferred to the first read of a track, so a large tracklist is in place at once.
+        """
+        self._metadata = dict()
+        self._encoded = dict(zip(track_ids, encoded))
+        self._decode = decode
+        self._build(list(self._encoded))
+
+    def _decoded(self, track_id: str) -> Optional[Any]:
+        encoded = self._encoded.pop(track_id, None)
+        if encoded is None:
+            return None
+        metadata = self._metadata[track_id] = self._decode(encoded)
+        return metadata
+
+    def insert(self, metadata: Any, after: Optional[str] = None):
+        """
+        Insert a track after the track ``after``, at the start if it is ``None`` or :data:`NO_TRACK`.
+        An existing track with the same id is moved; inserted after itself it stays and only takes the new metadata.
+        Raises KeyError if ``after`` is not in the store, leaving the store as it was.
+        """
+        track_id = metadata.id_
+        if after == track_id and track_id in self._keys:
+            self.update(metadata)
+            return
+        if after is None or after == NO_TRACK:
+            first = self._blocks[0][0] if self._blocks else 2 * self._GAP
+            key = first - self._GAP
+        else:
+            # before removing a moved track, an unknown ``after`` must not lose it; the key falls
+            # strictly between two neighbours, so it stays valid once the track is out
+            key = self._key_after(after)
+        if track_id in self._keys:
+            self.remove(track_id)
+        self._metadata[track_id] = metadata
+        self._keys[track_id] = key
+        self._insert_key(key, track_id)
+
+    def append(self, metadata: Any):
+        self.insert(metadata, after=self._last_id())
+
+    def update(self, metadata: Any):
+        if metadata.id_ not in self._keys:
+            raise KeyError(metadata.id_)
+        self._encoded.pop(metadata.id_, None)
+        self._metadata[metadata.id_] = metadata
+
+    def remove(self, track_id: str) -> Any:
+        key = self._keys.pop(track_id)
+        metadata = self._metadata.pop(track_id, None)
+        if metadata is None:
+            metadata = self._decode(self._encoded.pop(track_id))
+        block = bisect_left(self._maxes, key)
+        index = bisect_left(self._blocks[block], key)
+        del self._blocks[block][index]
+        del self._block_ids[block][index]
+        if not self._blocks[block]:
+            del self._blocks[block], self._block_ids[block], self._maxes[block]
+        else:
+            self._maxes[block] = self._blocks[block][-1]
+        return metadata
+
+    def _build(self, track_ids: List[str]):
+        # keys spread evenly, in blocks of _LOAD tracks
+        gap, load = self._GAP, self._LOAD
+        self._keys = dict(zip(track_ids, range(gap, (len(track_ids) + 1) * gap, gap)))
+        keys = list(self._keys.values())
+        self._blocks = [keys[start:start + load] for start in range(0, len(keys), load)]
+        self._block_ids = [track_ids[start:start + load] for start in range(0, len(track_ids), load)]
+        self._maxes = [block[-1] for block in self._blocks]
+
+    def _last_id(self) -> Optional[str]:
+        return self._block_ids[-1][-1] if self._blocks else None
+
+    def _key_after(self, track_id: str) -> int:
+        key = self._keys[track_id]
+        block = bisect_left(self._maxes, key)
+        index = bisect_right(self._blocks[block], key)
+        if index < len(self._blocks[block]):
+            following = self._blocks[block][index]
+        elif block + 1 < len(self._blocks):
+            following = self._blocks[block + 1][0]
+        else:
+            return key + self._GAP
+        if following - key < 2:
+            self._renumber()
+            return self._key_after(track_id)
+        return (key + following) // 2
+
+    def _insert_key(self, key: int, track_id: str):
+        if not self._blocks:
+            self._blocks.append([key])
+            self._block_ids.append([track_id])
+            self._maxes.append(key)
+            return
+        block = min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+        keys = self._blocks[block]
+        index = bisect_left(keys, key)
+        keys.insert(index, key)
+        self._block_ids[block].insert(index, track_id)
+        self._maxes[block] = keys[-1]
+        if len(keys) > 2 * self._LOAD:
+            self._blocks.insert(block + 1, keys[self._LOAD:])
+            self._block_ids.insert(block + 1, self._block_ids[block][self._LOAD:])
+            del keys[self._LOAD:], self._block_ids[block][self._LOAD:]
+            self._maxes[block] = keys[-1]
+            self._maxes.insert(block + 1, self._blocks[block + 1][-1])
+
+    def _renumber(self):
+        # Out of room between two neighbours, spread all keys out again (rare, O(n)).
+        key = 0
+        for keys, ids in zip(self._blocks, self._block_ids):
+            for index, track_id in enumerate(ids):
+                key += self._GAP
+                keys[index] = key
+                self._keys[track_id] = key
+        self._maxes = [keys[-1] for keys in self._blocks]
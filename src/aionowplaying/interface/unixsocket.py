@@ -0,0 +1,449 @@
+"""
+Backend publishing the player's state on a Unix domain socket, for consumers on the same machine
+that don't speak D-Bus, e.g. an LED matrix or a web UI proxy.
+
+The protocol is newline delimited JSON. A subscriber first receives the whole state::
+
+    {"type": "snapshot", "player": {...}, "playback": {...}, "tracklist": {"CanEditTracks": false},
+     "tracks": [{"id_": "/t/1", "title": ...}, ...]}
+
+followed by only what changed, one message per section and batch, with the changed fields::
+
+    {"type": "changed", "section": "playback", "values": {"Volume": 0.5}}
+    {"type": "seeked", "position": 1000000}
+    {"type": "tracks_replaced", "tracks": [...]}
+    {"type": "track_added", "metadata": {...}, "after": "/t/1"}
+    {"type": "track_changed", "metadata": {...}}
+    {"type": "track_removed", "id": "/t/1"}
+
+Subscribers send commands named after the MPRIS methods and writable properties, which are
+dispatched to the ``on_*`` handlers; with an ``id`` the outcome is reported back::
+
+    {"command": "Volume", "args": [0.5], "id": 1}
+    {"type": "result", "id": 1}  or  {"type": "error", "id": 1, "error": "..."}
+
+A subscriber that reads slower than the player changes does not hold it up: once more than
+``buffer_size`` bytes wait to be sent to it, further updates for it are dropped and it gets a
+fresh snapshot as soon as its buffer has drained.
+"""
+import asyncio
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from aionowplaying.interface.base import BaseInterface, PropertyName, PlaybackPropertyName, TrackListPropertyName, \
+    LoopStatus, PlaybackStatus, property_models
+from aionowplaying.interface.clock import PlaybackClock
+from aionowplaying.interface.snapshot import metadata_fields
+from aionowplaying.interface.tracklist import NO_TRACK, TrackStore
+
+logger = logging.getLogger(__name__)
+
+# command -> (handler, argument types, the property that must be true for it to be handled)
+COMMANDS: Dict[str, Tuple[str, tuple, Optional[Any]]] = {
+    'Raise': ('on_raise', (), PropertyName.CanRaise),
+    'Quit': ('on_quit', (), PropertyName.CanQuit),
+    'Fullscreen': ('on_fullscreen', (bool,), PropertyName.CanSetFullscreen),
+    'Next': ('on_next', (), PlaybackPropertyName.CanGoNext),
+    'Previous': ('on_previous', (), PlaybackPropertyName.CanGoPrevious),
+    'Pause': ('on_pause', (), PlaybackPropertyName.CanPause),
+    'PlayPause': ('on_play_pause', (), PlaybackPropertyName.CanPause),
+    'Stop': ('on_stop', (), PlaybackPropertyName.CanControl),
+    'Play': ('on_play', (), PlaybackPropertyName.CanPlay),
+    'Seek': ('on_seek', (int,), PlaybackPropertyName.CanSeek),
+    'SetPosition': ('on_set_position', (str, int), PlaybackPropertyName.CanSeek),
+    'OpenUri': ('on_open_uri', (str,), None),
+    'LoopStatus': ('on_loop_status', (LoopStatus,), PlaybackPropertyName.CanControl),
+    'Rate': ('on_rate', (float,), None),
+    'Shuffle': ('on_shuffle', (bool,), PlaybackPropertyName.CanControl),
+    'Volume': ('on_volume', (float,), PlaybackPropertyName.CanControl),
+    'AddTrack': ('on_add_track', (str, str, bool), TrackListPropertyName.CanEditTracks),
+    'RemoveTrack': ('on_remove_track', (str,), TrackListPropertyName.CanEditTracks),
+    'GoTo': ('on_go_to', (str,), None),
+    'ActivatePlaylist': ('on_activate_playlist', (str,), None),
+}
+# Commands that write a property, the value is set once the handler returned, as the MPRIS backend does.
+_WRITES = {'Fullscreen': PropertyName.Fullscreen, 'LoopStatus': PlaybackPropertyName.LoopStatus,
+           'Rate': PlaybackPropertyName.Rate, 'Shuffle': PlaybackPropertyName.Shuffle,
+           'Volume': PlaybackPropertyName.Volume}
+
+
+def _argument(expected: type, value: Any) -> Any:
+    # JSON values are checked, not converted: bool('false') would be True
+    if expected is float:
+        valid = type(value) in (int, float)
+    elif expected is LoopStatus:
+        valid = type(value) is str
+    else:
+        valid = type(value) is expected
+    if not valid:
+        raise TypeError(f'expected {expected.__name__}, got {type(value).__name__} {value!r}')
+    return expected(value)
+
+
+def remove_stale_socket(path: str):
+    """
+    Remove a socket left at ``path`` by a server that is gone, so a new one can listen there.
+    Raises if ``path`` is something else than a socket or a server still accepts connections on it.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, 'not a socket, refusing to replace it', path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise OSError(errno.EADDRINUSE, 'a server is listening on it', path)
+
+
+def _jsonable(value: Any) -> Any:
+    # track metadata, enums are str subclasses and encoded by json itself
+    return {name: getattr(value, name) for name in metadata_fields(type(value))}
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), default=_jsonable)
+
+
+def encode_line(message: dict) -> bytes:
+    return _encoder.encode(message).encode() + b'\n'
+
+
+class _Subscriber(asyncio.Protocol):
+    # longest command line accepted, longer ones close the connection
+    max_line = 65536
+
+    def __init__(self, it: 'UnixSocketInterface'):
+        self._it = it
+        self.transport: Optional[asyncio.WriteTransport] = None
+        self.lagging = False
+        self.dropped = 0
+        self.resyncs = 0
+        self._buffer = b''
+
+    def connection_made(self, transport: asyncio.WriteTransport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=self._it.buffer_size)
+        self._it._subscribers.add(self)
+        self.send(self._it._snapshot_line())
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self._it._subscribers.discard(self)
+
+    def pause_writing(self):
+        # more than buffer_size bytes wait, skip updates until they are written
+        self.lagging = True
+
+    def resume_writing(self):
+        self.lagging = False
+        self.resyncs += 1
+        self.send(self._it._snapshot_line())
+
+    def send(self, line: bytes):
+        if self.lagging or self.transport.is_closing():
+            self.dropped += 1
+            return
+        self.transport.write(line)
+
+    def data_received(self, data: bytes):
+        *lines, self._buffer = (self._buffer + data).split(b'\n')
+        if len(self._buffer) > self.max_line:
+            logger.warning('closing a subscriber of %s, command longer than %d bytes', self._it.path, self.max_line)
+            self.transport.close()
+            return
+        for line in lines:
+            if line.strip():
+                self._it._command(self, line)
+
+
+class UnixSocketInterface(BaseInterface):
+    """
+    Serves the player's state on a Unix domain socket, see the module documentation for the protocol.
+    Property changes are sent right away, or when the outermost :meth:`batch` exits.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None, compact: bool = False, buffer_size: int = 1 << 20):
+        """
+        :param name: Player name.
+        :type name: str
+        :param path: The socket path, defaults to ``aionowplaying-{name}.sock`` in ``$XDG_RUNTIME_DIR``,
+            or the temporary directory if that is not set.
+        :type path: str
+        :param compact: Keep state in the ``__slots__`` classes of :mod:`aionowplaying.interface.compact`
+            instead of pydantic models.
+        :type compact: bool
+        :param buffer_size: Bytes that may wait to be sent to a subscriber before it is sent a snapshot
+            instead of the updates it missed.
+        :type buffer_size: int
+        """
+        super().__init__(name)
+        if path is None:
+            path = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+                                f'aionowplaying-{name}.sock')
+        self.path = path
+        self.buffer_size = buffer_size
+        player_model, playback_model, tracklist_model = property_models(compact)
+        self._properties = {'player': player_model(), 'playback': playback_model(), 'tracklist': tracklist_model()}
+        self._tracks = TrackStore()
+        self._clock = PlaybackClock()
+        self._subscribers: Set[_Subscriber] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._closed: Optional[asyncio.Event] = None
+        self._batch_depth = 0
+        # section -> names of the properties changed in the open batch, in the order they changed
+        self._changed: Dict[str, Dict[str, None]] = dict()
+        self._tracks_json: Optional[bytes] = None
+
+    @property
+    def subscribers(self) -> List[_Subscriber]:
+        return list(self._subscribers)
+
+    async def serve(self):
+        """
+        Listen on :attr:`path`, restoring the state from :attr:`snapshot` first if enabled.
+        A socket left there by a server that is gone is replaced, see :func:`remove_stale_socket`.
+        :raises NotImplementedError: On Windows, which asyncio has no Unix socket servers for.
+        :raises OSError: If :attr:`path` is not a socket or another server listens on it.
+        """
+        if self._server is not None:
+            return
+        if sys.platform == 'win32':
+            raise NotImplementedError('UnixSocketInterface needs Unix domain sockets, not available on Windows')
+        if self.snapshot is not None and not self.snapshot.restored:
+            self.snapshot.restore()
+        remove_stale_socket(self.path)
+        self._closed = asyncio.Event()
+        self._server = await asyncio.get_running_loop().create_unix_server(lambda: _Subscriber(self), self.path)
+
+    async def start(self):
+        """Serve the socket until :meth:`stop` is called."""
+        await self.serve()
+        await self._closed.wait()
+
+    async def stop(self):
+        if self.snapshot is not None:
+            await self.snapshot.close()
+        if self._server is None:
+            return
+        self._server.close()
+        for subscriber in list(self._subscribers):
+            subscriber.transport.close()
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._closed.set()
+
+    def set_property(self, name: PropertyName, value: Any):
+        if self._queued((PropertyName, name), self.set_property, name, value):
+            return
+        self._set('player', name.value, value)
+
+    def set_playback_property(self, name: PlaybackPropertyName, value: Any):
+        if self._queued((PlaybackPropertyName, name), self.set_playback_property, name, value):
+            return
+        clock = self._clock
+        if name == PlaybackPropertyName.Position:
+            clock.seek(value)
+        elif name == PlaybackPropertyName.PlaybackStatus:
+            clock.set_playing(value == PlaybackStatus.Playing)
+        elif name == PlaybackPropertyName.Rate:
+            clock.set_rate(value)
+        self._set('playback', name.value, value)
+        if name == PlaybackPropertyName.Metadata or name == PlaybackPropertyName.Duration:
+            playback = self._properties['playback']
+            clock.duration = playback.Duration or playback.Metadata.duration
+
+    def set_tracklist_property(self, name: TrackListPropertyName, value: Any):
+        if self._queued((TrackListPropertyName, name), self.set_tracklist_property, name, value):
+            return
+        if name == TrackListPropertyName.Tracks:
+            # plain track ids, metadata can be filled in later with update_track()
+            metadata_bean = type(self._properties['playback'].Metadata)
+            self.set_tracks([metadata_bean(id_=track_id) for track_id in value])
+            return
+        self._set('tracklist', name.value, value)
+
+    def get_property(self, name: PropertyName) -> Any:
+        return getattr(self._properties['player'], name.value)
+
+    def get_playback_property(self, name: PlaybackPropertyName) -> Any:
+        if name == PlaybackPropertyName.Position:
+            return self._clock.position
+        return getattr(self._properties['playback'], name.value)
+
+    def get_tracklist_property(self, name: TrackListPropertyName) -> Any:
+        if name == TrackListPropertyName.Tracks:
+            return self._tracks.ids()
+        return getattr(self._properties['tracklist'], name.value)
+
+    def _set(self, section: str, name: str, value: Any):
+        setattr(self._properties[section], name, value)
+        if self.snapshot is not None:
+            self.snapshot.mark_dirty(section)
+        if self._batch_depth:
+            self._changed.setdefault(section, dict())[name] = None
+            return
+        self._publish_changed(section, (name,))
+
+    def _publish_changed(self, section: str, names: Iterable[str]):
+        if not self._subscribers:
+            return
+        properties = self._properties[section]
+        if section == 'playback':
+            values = {name: self._clock.position if name == PlaybackPropertyName.Position else getattr(properties, name)
+                      for name in names}
+        else:
+            values = {name: getattr(properties, name) for name in names}
+        self._broadcast({'type': 'changed', 'section': section, 'values': values})
+
+    def _begin_batch(self):
+        thread = self._service_thread
+        if thread is not None and thread.foreign():
+            thread.hold()
+            return
+        self._batch_depth += 1
+
+    def _end_batch(self):
+        thread = self._service_thread
+        if thread is not None and thread.foreign():
+            thread.release()
+            return
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._changed:
+            changed, self._changed = self._changed, dict()
+            for section, names in changed.items():
+                self._publish_changed(section, names)
+
+    async def seeked(self, position: int):
+        self.set_playback_property(PlaybackPropertyName.Position, position)
+        self._broadcast({'type': 'seeked', 'position': position})
+
+    def set_tracks(self, tracks: Iterable[Any], current_track: str = NO_TRACK):
+        if self._queued(None, self.set_tracks, tracks, current_track):
+            return
+        self._tracks.replace(tracks)
+        self._tracks_changed()
+        if self._subscribers:
+            self._broadcast({'type': 'tracks_replaced', 'tracks': self._tracks.get_many(self._tracks)})
+
+    def add_track(self, metadata: Any, after_track: Optional[str] = None):
+        if self._queued(None, self.add_track, metadata, after_track):
+            return
+        self._tracks.insert(metadata, after_track)
+        self._tracks_changed()
+        self._broadcast({'type': 'track_added', 'metadata': metadata, 'after': after_track or NO_TRACK})
+
+    def update_track(self, metadata: Any):
+        if self._queued(None, self.update_track, metadata):
+            return
+        self._tracks.update(metadata)
+        self._tracks_changed()
+        self._broadcast({'type': 'track_changed', 'metadata': metadata})
+
+    def remove_track(self, track_id: str):
+        if self._queued(None, self.remove_track, track_id):
+            return
+        self._tracks.remove(track_id)
+        self._tracks_changed()
+        self._broadcast({'type': 'track_removed', 'id': track_id})
+
+    def _tracks_changed(self):
+        self._tracks_json = None
+        if self.snapshot is not None:
+            self.snapshot.mark_dirty('tracks')
+
+    def _snapshot_tracks(self) -> TrackStore:
+        return self._tracks
+
+    def _restore_tracks(self, track_ids: List[str], encoded: List[Any], decode: Callable[[Any], Any]):
+        self._tracks.load(track_ids, encoded, decode)
+        self._tracks_changed()
+
+    def _snapshot_line(self) -> bytes:
+        values = {section: properties.model_dump() for section, properties in self._properties.items()}
+        values['playback']['Position'] = self._clock.position
+        del values['tracklist']['Tracks']
+        # the tracks are encoded once per change of the tracklist, they are most of a snapshot
+        tracks = self._tracks_json
+        if tracks is None:
+            tracks = self._tracks_json = _encoder.encode(self._tracks.get_many(self._tracks)).encode()
+        head = _encoder.encode({'type': 'snapshot', **values}).encode()
+        return head[:-1] + b',"tracks":' + tracks + b'}\n'
+
+    def _broadcast(self, message: dict):
+        if not self._subscribers:
+            return
+        line = encode_line(message)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.inc('messages_sent_total', amount=len(self._subscribers))
+            metrics.inc('bytes_sent_total', amount=len(line) * len(self._subscribers))
+        for subscriber in self._subscribers:
+            subscriber.send(line)
+
+    def _command(self, subscriber: _Subscriber, line: bytes):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            command = request['command']
+            if self.metrics is not None:
+                self.metrics.inc('method_calls_total', command)
+            handler, types, gate = COMMANDS[command]
+            args = request.get('args', [])
+            if len(args) != len(types):
+                raise ValueError(f'{command} takes {len(types)} arguments, got {len(args)}')
+            args = tuple(_argument(expected, arg) for expected, arg in zip(types, args))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._reply(subscriber, request_id, f'invalid command: {e!r}')
+            return
+        if gate is not None and not self._allowed(gate):
+            self._reply(subscriber, request_id, f'{command} is not enabled')
+            return
+        future = self._dispatch(handler, *args)
+        future.add_done_callback(lambda done: self._handled(subscriber, request_id, command, args, done))
+
+    def _handled(self, subscriber: _Subscriber, request_id: Any, command: str, args: tuple, future: asyncio.Future):
+        if future.cancelled():
+            # e.g. the player stopped before the handler ran, the write is not applied
+            self._reply(subscriber, request_id, f'{command} was cancelled')
+            return
+        error = future.exception()
+        if error is None and command in _WRITES:
+            name = _WRITES[command]
+            if isinstance(name, PropertyName):
+                self.set_property(name, args[0])
+            else:
+                self.set_playback_property(name, args[0])
+        elif error is not None:
+            logger.warning('%s handler of %s failed: %r', command, self.path, error)
+        self._reply(subscriber, request_id, None if error is None else repr(error))
+
+    def _reply(self, subscriber: _Subscriber, request_id: Any, error: Optional[str]):
+        if request_id is None:
+            if error is not None:
+                logger.debug('subscriber of %s: %s', self.path, error)
+            return
+        if error is None:
+            subscriber.send(encode_line({'type': 'result', 'id': request_id}))
+        else:
+            subscriber.send(encode_line({'type': 'error', 'id': request_id, 'error': error}))
+
+    def _allowed(self, gate: Any) -> bool:
+        if isinstance(gate, PropertyName):
+            return bool(self.get_property(gate))
+        if isinstance(gate, PlaybackPropertyName):
+            return bool(self.get_playback_property(gate))
+        return bool(self.get_tracklist_property(gate))
@@ -16,7 +16,7 @@ from winrt.windows.storage.streams import RandomAccessStreamReference
 
 from aionowplaying import BaseInterface, PropertyName, PlaybackPropertyName
 from aionowplaying.interface.base import TrackListPropertyName, PlaybackStatus, PlaybackProperties, LoopStatus, \
-    MediaType
+    MediaType, property_models
 
 
 def TimeSpan(x_microsec):
@@ -24,11 +24,11 @@ def TimeSpan(x_microsec):
 
 
 class WindowsInterface(BaseInterface):
-    def __init__(self, name):
+    def __init__(self, name, compact: bool = False):
         super(WindowsInterface, self).__init__(name)
         self._loop = asyncio.get_event_loop()
         self._running = True
-        self._playback_properties = PlaybackProperties()
+        self._playback_properties = property_models(compact)[1]()
         self._player = MediaPlayer()
         self._controls: SystemMediaTransportControls = self._player.system_media_transport_controls
         self._updater: SystemMediaTransportControlsDisplayUpdater = self._controls.display_updater
@@ -42,72 +42,41 @@ class WindowsInterface(BaseInterface):
 
     def shuffle_change_requested(self, _, args: ShuffleEnabledChangeRequestedEventArgs):
         shuffle_enabled: bool = args.requested_shuffle_enabled
-        if asyncio.iscoroutinefunction(self.on_shuffle):
-            self._run_task(self.on_shuffle(shuffle_enabled))
-        else:
-            self.on_shuffle(shuffle_enabled)
+        self._run_command('on_shuffle', shuffle_enabled)
 
     def property_changed(self, _, args: SystemMediaTransportControlsPropertyChangedEventArgs):
         property_: SystemMediaTransportControlsProperty = args.property
         if property_ == SystemMediaTransportControlsProperty.SOUND_LEVEL:
-            if asyncio.iscoroutinefunction(self.on_volume):
-                self._run_task(self.on_volume(self._controls.sound_level))
-            else:
-                self.on_volume(self._controls.sound_level)
+            self._run_command('on_volume', self._controls.sound_level)
 
     def playback_rate_change_requested(self, _, args: PlaybackRateChangeRequestedEventArgs):
         rate: float = args.requested_playback_rate
-        if asyncio.iscoroutinefunction(self.on_rate):
-            self._run_task(self.on_rate(rate))
-        else:
-            self.on_rate(rate)
+        self._run_command('on_rate', rate)
 
     def playback_position_change_requested(self, _, args: PlaybackPositionChangeRequestedEventArgs):
         position = args.requested_playback_position
         position = position.seconds * 1000 * 1000 + position.microseconds
 
         if self._playback_properties.CanSeek:
-            if asyncio.iscoroutinefunction(self.on_set_position):
-                self._run_task(self.on_set_position(self._playback_properties.Metadata.id_, position))
-            else:
-                self.on_set_position(self._playback_properties.Metadata.id_, position)
-
-            if asyncio.iscoroutinefunction(self.on_seek):
-                self._run_task(self.on_seek(position))
-            else:
-                self.on_seek(position)
+            self._run_command('on_set_position', self._playback_properties.Metadata.id_, position)
+            self._run_command('on_seek', position)
 
     def button_pressed(self, _, args: SystemMediaTransportControlsButtonPressedEventArgs):
         button: SystemMediaTransportControlsButton = args.button
         if button == SystemMediaTransportControlsButton.PLAY and self._playback_properties.CanPlay:
-            if asyncio.iscoroutinefunction(self.on_play):
-                self._run_task(self.on_play())
-            else:
-                self.on_play()
+            self._run_command('on_play')
             self._controls.playback_status = MediaPlaybackStatus.PLAYING
             self._playback_properties.PlaybackStatus = PlaybackStatus.Playing
         if button == SystemMediaTransportControlsButton.PAUSE and self._playback_properties.CanPause:
-            if asyncio.iscoroutinefunction(self.on_pause):
-                self._run_task(self.on_pause())
-            else:
-                self.on_pause()
+            self._run_command('on_pause')
             self._controls.playback_status = MediaPlaybackStatus.PAUSED
             self._playback_properties.PlaybackStatus = PlaybackStatus.Paused
         if button == SystemMediaTransportControlsButton.NEXT and self._playback_properties.CanGoNext:
-            if asyncio.iscoroutinefunction(self.on_next):
-                self._run_task(self.on_next())
-            else:
-                self.on_next()
+            self._run_command('on_next')
         if button == SystemMediaTransportControlsButton.PREVIOUS and self._playback_properties.CanGoPrevious:
-            if asyncio.iscoroutinefunction(self.on_previous):
-                self._run_task(self.on_previous())
-            else:
-                self.on_previous()
+            self._run_command('on_previous')
         if button == SystemMediaTransportControlsButton.STOP and self._playback_properties.CanControl:
-            if asyncio.iscoroutinefunction(self.on_stop):
-                self._run_task(self.on_stop())
-            else:
-                self.on_stop()
+            self._run_command('on_stop')
 
     def auto_repeat_mode_change_requested(self, _, args: AutoRepeatModeChangeRequestedEventArgs):
         value = LoopStatus.None_
@@ -116,16 +85,15 @@ class WindowsInterface(BaseInterface):
             value = LoopStatus.Playlist
         elif mode == MediaPlaybackAutoRepeatMode.TRACK:
             value = LoopStatus.Track
-        if asyncio.iscoroutinefunction(self.on_loop_status):
-            self._run_task(self.on_loop_status(value))
-        else:
-            self.on_loop_status(value)
+        self._run_command('on_loop_status', value)
         self._playback_properties.LoopStatus = value
 
     def set_property(self, name: PropertyName, value: Any):
         pass
 
     def set_playback_property(self, name: PlaybackPropertyName, value: Any):
+        if self._queued((PlaybackPropertyName, name), self.set_playback_property, name, value):
+            return
         if name == PlaybackPropertyName.CanControl:
             self._controls.is_stop_enabled = value
             self._playback_properties.CanControl = value
@@ -216,10 +184,10 @@ class WindowsInterface(BaseInterface):
     async def stop(self):
         self._running = False
 
-    def _run_task(self, task):
+    def _run_command(self, handler: str, *args):
         # Windows callbacks may be invoked in non-main thread, besides,
         # they may run in different threads.
         if threading.current_thread() is not threading.main_thread():
-            asyncio.run_coroutine_threadsafe(task, self._loop)
+            self._loop.call_soon_threadsafe(self._dispatch, handler, *args)
         else:
-            asyncio.create_task(task)
+            self._dispatch(handler, *args)
@@ -0,0 +1,289 @@
+"""
+Load generator for the MPRIS backend: many players and many clients on a private dbus-daemon.
+
+Players change tracks, report positions and drag the volume; clients subscribe to PropertiesChanged
+and keep calling GetAll, Play and Seek on random players. Players and clients can be spread over
+several processes. The report, printed as JSON, has the PropertiesChanged signals sent and received per
+second, method call latency percentiles, the CPU used by the bus daemon and by every worker process, and their RSS.
+
+    python -m aionowplaying.loadgen [--players 10] [--clients 10] [--processes 1] [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+from aionowplaying.interface.enums import PlaybackPropertyName, PlaybackStatus
+from aionowplaying.testing import PrivateBus, wait_for_name
+
+OBJECT_PATH = '/org/mpris/MediaPlayer2'
+PLAYER_INTERFACE = 'org.mpris.MediaPlayer2.Player'
+METHODS = ('GetAll', 'Play', 'Seek')
+
+
+def player_name(index: int) -> str:
+    return f'loadgen_{index}'
+
+
+def read_cpu_seconds(pid: int) -> float:
+    """User plus system CPU time of a process, from /proc."""
+    with open(f'/proc/{pid}/stat') as file:
+        # the command name may contain spaces, the fields after it don't
+        fields = file.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def read_rss_kib(pid='self') -> int:
+    with open(f'/proc/{pid}/status') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+    return {
+        'count': len(samples),
+        'p50_us': round(samples[len(samples) // 2] * 1e6, 1),
+        'p99_us': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6, 1),
+        'max_us': round(samples[-1] * 1e6, 1),
+    }
+
+
+async def _drive_player(player, rng: random.Random, tick: float, stopping: asyncio.Event):
+    # every tick a volume drag step, every second a position report, a track change every few seconds
+    ticks_per_second = max(1, round(1 / tick))
+    track, step = 0, 0
+    while not stopping.is_set():
+        step += 1
+        player.set_playback_property(PlaybackPropertyName.Volume, (step % 20) / 20)
+        if step % ticks_per_second == 0:
+            position = player.get_playback_property(PlaybackPropertyName.Position)
+            await player.seeked(position)
+        if rng.random() < tick / 5:
+            track += 1
+            bean = type(player.get_playback_property(PlaybackPropertyName.Metadata))
+            player.set_playback_properties({
+                PlaybackPropertyName.Metadata: bean(id_=f'/loadgen/{track}', title=f'Track {track}',
+                                                    artist=['Load Generator'], duration=200_000_000),
+                PlaybackPropertyName.PlaybackStatus: PlaybackStatus.Playing,
+                PlaybackPropertyName.Position: 0,
+            })
+        try:
+            await asyncio.wait_for(stopping.wait(), tick)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _drive_client(bus, names: List[str], rng: random.Random, interval: float, stopping: asyncio.Event,
+                        samples: Dict[str, List[float]], errors: List[int]):
+    from dbus_next import Message, MessageType
+
+    calls = {
+        'GetAll': dict(interface='org.freedesktop.DBus.Properties', member='GetAll', signature='s',
+                       body=[PLAYER_INTERFACE]),
+        'Play': dict(interface=PLAYER_INTERFACE, member='Play'),
+        'Seek': dict(interface=PLAYER_INTERFACE, member='Seek', signature='x', body=[1_000_000]),
+    }
+    turn = 0
+    while not stopping.is_set():
+        method = METHODS[turn % len(METHODS)]
+        turn += 1
+        start = time.perf_counter()
+        try:
+            reply = await bus.call(Message(destination=rng.choice(names), path=OBJECT_PATH, **calls[method]))
+        except Exception:
+            errors[0] += 1
+            break  # the connection is gone
+        if reply.message_type == MessageType.ERROR:
+            errors[0] += 1
+        else:
+            samples[method].append(time.perf_counter() - start)
+        if interval:
+            try:
+                await asyncio.wait_for(stopping.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def run_worker(address: str, process: int, processes: int, players: int, clients: int, duration: float,
+                     tick: float = 0.05, call_interval: float = 0.05, seed: int = 0) -> dict:
+    """
+    Run this process's share of the players and clients for ``duration`` seconds: player and client
+    ``i`` run in process ``i % processes``. Clients call players of all processes.
+    """
+    from dbus_next import Message, MessageType
+    from dbus_next.aio import MessageBus
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    class LoadPlayer(Mpris2Interface):
+        async def on_play(self):
+            self.set_playback_property(PlaybackPropertyName.PlaybackStatus, PlaybackStatus.Playing)
+
+        async def on_seek(self, offset: int):
+            await self.seeked(self.get_playback_property(PlaybackPropertyName.Position) + offset)
+
+    rng = random.Random(seed * 1000 + process)
+    local_players = [LoadPlayer(player_name(index), bus_address=address, compact=True)
+                     for index in range(process, players, processes)]
+    for player in local_players:
+        player.enable_metrics()
+        player.set_playback_properties({PlaybackPropertyName.CanPlay: True, PlaybackPropertyName.CanSeek: True,
+                                        PlaybackPropertyName.CanControl: True})
+    await asyncio.gather(*(player.connect() for player in local_players))
+    buses = [await MessageBus(bus_address=address).connect() for _ in range(process, clients, processes)]
+    names = [f'org.mpris.MediaPlayer2.{player_name(index)}' for index in range(players)]
+    received = [0]
+
+    def count_signal(message: Message):
+        if message.message_type == MessageType.SIGNAL and message.member == 'PropertiesChanged':
+            received[0] += 1
+
+    for bus in buses:
+        for name in names:
+            await wait_for_name(bus, name, timeout=30)
+        bus.add_message_handler(count_signal)
+        await bus.call(Message(destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+                               interface='org.freedesktop.DBus', member='AddMatch', signature='s',
+                               body=[f"type='signal',interface='org.freedesktop.DBus.Properties',"
+                                     f"member='PropertiesChanged',path='{OBJECT_PATH}'"]))
+
+    stopping = asyncio.Event()
+    samples: Dict[str, List[float]] = {method: [] for method in METHODS}
+    errors = [0]
+    started = time.time()
+    cpu_started = read_cpu_seconds(os.getpid())
+    tasks = [asyncio.ensure_future(_drive_player(player, random.Random(rng.random()), tick, stopping))
+             for player in local_players]
+    tasks += [asyncio.ensure_future(_drive_client(bus, names, random.Random(rng.random()), call_interval, stopping,
+                                                  samples, errors))
+              for bus in buses]
+    await asyncio.sleep(duration)
+    stopping.set()
+    await asyncio.gather(*tasks)
+    finished = time.time()
+    cpu = read_cpu_seconds(os.getpid()) - cpu_started
+    # only the signal clients subscribe to, every client receives each one sent
+    emitted = sum(player.metrics.counters['signals_total']['PropertiesChanged'] for player in local_players)
+    lost = sum(player.dbus is None or not player.dbus.connected for player in local_players) + \
+        sum(not bus.connected for bus in buses)
+    for bus in buses:
+        bus.disconnect()
+    for player in local_players:
+        await player.stop()
+    return {
+        'process': process,
+        'pid': os.getpid(),
+        'players': len(local_players),
+        'clients': len(buses),
+        'started': started,
+        'finished': finished,
+        'signals_sent': emitted,
+        'signals_received': received[0],
+        'calls': samples,
+        'errors': errors[0],
+        'connections_lost': lost,
+        'cpu_percent': round(cpu / (finished - started) * 100, 1),
+        'rss_kib': read_rss_kib(),
+    }
+
+
+def _worker_process(*args) -> dict:
+    return asyncio.run(run_worker(*args))
+
+
+async def _sample_cpu(pid: int, samples: List[Tuple[float, float]], interval: float = 0.25):
+    while True:
+        samples.append((time.time(), read_cpu_seconds(pid)))
+        await asyncio.sleep(interval)
+
+
+def _cpu_between(samples: List[Tuple[float, float]], start: float, end: float) -> float:
+    # CPU seconds between the samples closest to the measured window
+    before = max((sample for sample in samples if sample[0] <= start), default=samples[0])
+    after = min((sample for sample in samples if sample[0] >= end), default=samples[-1])
+    return after[1] - before[1]
+
+
+async def run(players: int = 10, clients: int = 10, processes: int = 1, duration: float = 10,
+              tick: float = 0.05, call_interval: float = 0.05, seed: int = 0) -> dict:
+    """Start a private bus, run the workers and return the report."""
+    async with PrivateBus() as bus:
+        cpu: List[Tuple[float, float]] = []
+        sampler = asyncio.ensure_future(_sample_cpu(bus.pid, cpu))
+        try:
+            args = (bus.address, players, clients, duration, tick, call_interval, seed)
+            if processes == 1:
+                workers = [await run_worker(bus.address, 0, 1, *args[1:])]
+            else:
+                loop = asyncio.get_running_loop()
+                with ProcessPoolExecutor(processes, mp_context=get_context('spawn')) as pool:
+                    workers = await asyncio.gather(*(
+                        loop.run_in_executor(pool, _worker_process, bus.address, process, processes, *args[1:])
+                        for process in range(processes)))
+            cpu.append((time.time(), read_cpu_seconds(bus.pid)))
+            daemon_rss = read_rss_kib(bus.pid)
+        finally:
+            sampler.cancel()
+    # the window all workers were running in
+    start = max(worker['started'] for worker in workers)
+    end = min(worker['finished'] for worker in workers)
+    window = max(end - start, 1e-9)
+    seconds = [worker['finished'] - worker['started'] for worker in workers]
+    calls = {method: [sample for worker in workers for sample in worker['calls'][method]] for method in METHODS}
+    return {
+        'players': players,
+        'clients': clients,
+        'processes': processes,
+        'duration': duration,
+        'signals_sent_per_second': round(sum(worker['signals_sent'] / s for worker, s in zip(workers, seconds))),
+        'signals_received_per_second': round(sum(worker['signals_received'] / s
+                                                 for worker, s in zip(workers, seconds))),
+        'calls_per_second': round(sum(sum(len(v) for v in worker['calls'].values()) / s
+                                      for worker, s in zip(workers, seconds))),
+        'latency': dict({'all': percentiles([sample for samples in calls.values() for sample in samples])},
+                        **{method: percentiles(samples) for method, samples in calls.items()}),
+        'errors': sum(worker['errors'] for worker in workers),
+        'connections_lost': sum(worker['connections_lost'] for worker in workers),
+        'daemon_cpu_percent': round(_cpu_between(cpu, start, end) / window * 100, 1),
+        # a worker near 100% is the bottleneck, not the players or the daemon: add processes
+        'worker_cpu_percent': {f'worker_{worker["process"]}': worker['cpu_percent'] for worker in workers},
+        'rss_kib': dict({'daemon': daemon_rss}, **{f'worker_{worker["process"]}': worker['rss_kib']
+                                                   for worker in workers}),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog='python -m aionowplaying.loadgen',
+                                     description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--processes', type=int, default=1,
+                        help=f'spread players and clients over this many processes, up to {os.cpu_count()} cores')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run once everything is connected')
+    parser.add_argument('--tick', type=float, default=0.05, help='seconds between volume steps of a player')
+    parser.add_argument('--call-interval', type=float, default=0.05,
+                        help='seconds a client waits between calls, 0 to call back to back')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the report to this file')
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args.players, args.clients, args.processes, args.duration, args.tick,
+                             args.call_interval, args.seed))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
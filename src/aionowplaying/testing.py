@@ -0,0 +1,90 @@
+"""
+Helpers for running the D-Bus backend against a private bus, used by the tests,
+the benchmarks and the load generator.
+"""
+import asyncio
+import os
+import shutil
+import signal
+import tempfile
+import time
+from typing import Optional
+
+
+class PrivateBus:
+    """
+    A private ``dbus-daemon --session`` listening on a socket in a temporary directory,
+    so nothing touches the user's session bus.
+    The socket path stays the same across :meth:`restart`, clients can reconnect to :attr:`address`.
+
+    ::
+
+        async with PrivateBus() as bus:
+            player = Mpris2Interface('test', bus_address=bus.address)
+    """
+
+    def __init__(self, executable: str = 'dbus-daemon'):
+        self._executable = executable
+        self._directory: Optional[str] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self.address: Optional[str] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    async def start(self) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='aionowplaying-')
+        path = os.path.join(self._directory, 'bus')
+        if os.path.exists(path):
+            os.unlink(path)
+        self._process = await asyncio.create_subprocess_exec(
+            self._executable, '--session', '--nofork', '--print-address', f'--address=unix:path={path}',
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        # the address is printed once the daemon accepts connections
+        if not await self._process.stdout.readline():
+            await self._process.wait()
+            raise RuntimeError(f'{self._executable} exited with status {self._process.returncode}')
+        self.address = f'unix:path={path}'
+        return self.address
+
+    async def stop(self, sig: int = signal.SIGTERM):
+        """Stop the daemon, pass ``signal.SIGKILL`` to simulate a crash."""
+        if self._process is None or self._process.returncode is not None:
+            return
+        self._process.send_signal(sig)
+        await self._process.wait()
+
+    async def restart(self, sig: int = signal.SIGTERM) -> str:
+        await self.stop(sig)
+        return await self.start()
+
+    async def close(self):
+        await self.stop()
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    async def __aenter__(self) -> 'PrivateBus':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def wait_for_name(bus, name: str, timeout: float = 5):
+    """Poll the bus until ``name`` has an owner, raise :class:`TimeoutError` after ``timeout`` seconds."""
+    from dbus_next import Message
+
+    deadline = time.monotonic() + timeout
+    while True:
+        reply = await bus.call(Message(destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+                                        interface='org.freedesktop.DBus', member='NameHasOwner',
+                                        signature='s', body=[name]))
+        if reply.body[0]:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'{name} did not appear on the bus')
+        await asyncio.sleep(0.01)
@@ -0,0 +1,15 @@
+import shutil
+
+import pytest
+
+
+@pytest.fixture()
+async def private_bus():
+    """A private dbus-daemon, for tests that need a bus without touching the session bus."""
+    if shutil.which('dbus-daemon') is None:
+        pytest.skip('dbus-daemon is not available')
+    pytest.importorskip('dbus_next')
+    from aionowplaying.testing import PrivateBus
+
+    async with PrivateBus() as bus:
+        yield bus
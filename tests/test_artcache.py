@@ -0,0 +1,76 @@
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+
+from aionowplaying.interface.artcache import CoverArtCache
+from aionowplaying.interface.base import BaseInterface, PlaybackPropertyName
+from aionowplaying.interface.compact import CompactMetadataBean
+from aionowplaying.interface.headless import HeadlessInterface
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 96
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x01' * 92
+
+
+def url_path(url: str) -> Path:
+    assert url.startswith('file://')
+    return Path(urlparse(url).path)
+
+
+async def test_identical_images_stored_once(tmp_path):
+    cache = CoverArtCache(tmp_path)
+    first = await cache.store(JPEG)
+    source = tmp_path / 'cover.jpg'
+    source.write_bytes(JPEG)
+    assert await cache.store(source) == first
+    assert url_path(first).read_bytes() == JPEG
+    assert url_path(first).suffix == '.jpg'
+    assert url_path(await cache.store(PNG)).suffix == '.png'
+    assert cache.size == len(JPEG) + len(PNG)
+
+
+def test_evicts_least_recently_stored(tmp_path):
+    cache = CoverArtCache(tmp_path, max_bytes=250)
+    first = cache.store_sync(JPEG)
+    second = cache.store_sync(PNG)
+    cache.store_sync(JPEG)  # used again, PNG is now the oldest
+    third = cache.store_sync(b'GIF89a' + b'\x02' * 94)
+    assert url_path(first).exists() and url_path(third).exists()
+    assert not url_path(second).exists()
+    assert cache.size == 200
+    # a new instance picks up what is on disk
+    assert CoverArtCache(tmp_path, max_bytes=250).size == 200
+
+
+async def test_set_cover_art(tmp_path):
+    player = HeadlessInterface('test', compact=True)
+    player.cover_art_cache = CoverArtCache(tmp_path)
+    player.set_playback_property(PlaybackPropertyName.Metadata, CompactMetadataBean(title='Song'))
+    url = await player.set_cover_art(JPEG)
+    metadata = player.get_playback_property(PlaybackPropertyName.Metadata)
+    assert metadata.cover == url and metadata.title == 'Song'
+
+
+async def test_set_cover_art_of_another_track(tmp_path):
+    pytest.importorskip('dbus_next')
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    player = Mpris2Interface('test', compact=True)
+    player.cover_art_cache = CoverArtCache(tmp_path)
+    current, other = CompactMetadataBean(id_='/t/1', title='One'), CompactMetadataBean(id_='/t/2', title='Two')
+    player.set_playback_property(PlaybackPropertyName.Metadata, current)
+    player.set_tracks([current, other])
+    url = await player.set_cover_art(PNG, other)
+    assert player.get_playback_property(PlaybackPropertyName.Metadata) is current
+    assert player._tracklist_bus._tracks.get('/t/2').cover == url
+
+
+async def test_set_cover_art_without_metadata(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    player = BaseInterface('test')
+    with pytest.raises(ValueError):
+        await player.set_cover_art(JPEG)
+    first, second = HeadlessInterface('first'), HeadlessInterface('second')
+    await first.set_cover_art(JPEG)
+    assert first.cover_art_cache is not None
+    assert second.cover_art_cache is None and BaseInterface.cover_art_cache is None
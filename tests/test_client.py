@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('dbus_next')
+
+from aionowplaying.client import MprisClient  # noqa: E402
+from aionowplaying.interface.base import PlaybackPropertyName as PlayProp, PlaybackStatus, PropertyName  # noqa: E402
+from aionowplaying.interface.compact import CompactMetadataBean  # noqa: E402
+from aionowplaying.interface.mpris2 import DBusBeanMapper, Mpris2Interface  # noqa: E402
+
+
+async def eventually(predicate, timeout: float = 5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, 'condition not met in time'
+        await asyncio.sleep(0.01)
+
+
+def test_parse_metadata_round_trip():
+    bean = CompactMetadataBean(id_='/track/1', title='Song', artist=['A', 'B'], duration=5_000_000,
+                               trackNumber=3)
+    assert DBusBeanMapper.parse_metadata(DBusBeanMapper.metadata(bean), CompactMetadataBean) == bean
+
+
+def test_parse_metadata_is_lenient():
+    from dbus_next import Variant
+
+    bean = DBusBeanMapper.parse_metadata({'xesam:artist': Variant('s', 'Solo'),
+                                          'mpris:length': Variant('t', 7),
+                                          'xesam:trackNumber': Variant('s', 'n/a'),
+                                          'vendor:extra': Variant('s', 'x')}, CompactMetadataBean)
+    assert bean.artist == ['Solo'] and bean.duration == 7 and bean.trackNumber == 0
+
+
+async def test_client_mirrors_players(private_bus):
+    first = Mpris2Interface('first', bus_address=private_bus.address)
+    first.set_property(PropertyName.Identity, 'First')
+    first.set_playback_property(PlayProp.Metadata, CompactMetadataBean(id_='/t/1', title='One'))
+    await first.connect()
+
+    client = MprisClient(bus_address=private_bus.address, compact=True)
+    added = []
+    client.on_player_added = added.append
+    await client.connect()
+    mirrored = client['org.mpris.MediaPlayer2.first']
+    assert mirrored.get_property(PropertyName.Identity) == 'First'
+    assert mirrored.get_playback_property(PlayProp.Metadata).title == 'One'
+    assert added == [mirrored]
+
+    first.set_playback_property(PlayProp.Volume, 0.5)
+    first.set_playback_property(PlayProp.PlaybackStatus, PlaybackStatus.Playing)
+    await eventually(lambda: mirrored.get_playback_property(PlayProp.PlaybackStatus) == PlaybackStatus.Playing)
+    assert mirrored.get_playback_property(PlayProp.Volume) == 0.5
+
+    await first.seeked(60_000_000)
+    await eventually(lambda: mirrored.position >= 60_000_000)
+
+    second = Mpris2Interface('second', bus_address=private_bus.address)
+    await second.connect()
+    await eventually(lambda: 'org.mpris.MediaPlayer2.second' in client and len(added) == 2)
+
+    await first.stop()
+    await eventually(lambda: 'org.mpris.MediaPlayer2.first' not in client)
+    assert list(client) == ['org.mpris.MediaPlayer2.second']
+    await second.stop()
+    await client.close()
+
+
+async def test_close_waits_for_updates(caplog):
+    client = MprisClient()
+
+    async def failing():
+        raise RuntimeError('player went away')
+
+    client._spawn(asyncio.Event().wait())
+    waiting = next(iter(client._tasks))
+    client._spawn(failing())
+    await eventually(lambda: 'player went away' in caplog.text)
+    await client.close()
+    assert waiting.cancelled() and not client._tasks
+
+
+async def test_silent_player_does_not_block_connect(private_bus):
+    from dbus_next import MessageType
+    from dbus_next.aio import MessageBus
+
+    silent = await MessageBus(bus_address=private_bus.address).connect()
+    # owns its name but leaves every call unanswered
+    silent.add_message_handler(lambda message: message.message_type == MessageType.METHOD_CALL or None)
+    await silent.request_name('org.mpris.MediaPlayer2.silent')
+    player = Mpris2Interface('answering', bus_address=private_bus.address)
+    player.set_property(PropertyName.Identity, 'Answering')
+    await player.connect()
+
+    client = MprisClient(bus_address=private_bus.address, call_timeout=0.2)
+    await asyncio.wait_for(client.connect(), 5)
+    assert client['org.mpris.MediaPlayer2.answering'].get_property(PropertyName.Identity) == 'Answering'
+    assert client['org.mpris.MediaPlayer2.silent'].ready
+    assert client['org.mpris.MediaPlayer2.silent'].owner == silent.unique_name
+    await client.close()
+    await player.stop()
+    silent.disconnect()
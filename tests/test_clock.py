@@ -0,0 +1,41 @@
+from aionowplaying.interface.clock import PlaybackClock
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_position_frozen_until_playing():
+    now = FakeTime()
+    clock = PlaybackClock(now)
+    clock.seek(5_000_000)
+    now.now += 10
+    assert clock.position == 5_000_000
+
+
+def test_position_extrapolated_with_rate():
+    now = FakeTime()
+    clock = PlaybackClock(now)
+    clock.set_playing(True)
+    now.now += 2
+    assert clock.position == 2_000_000
+    clock.set_rate(2.0)
+    now.now += 1
+    assert clock.position == 4_000_000
+    clock.set_playing(False)
+    now.now += 5
+    assert clock.position == 4_000_000
+
+
+def test_position_clamped_to_duration():
+    now = FakeTime()
+    clock = PlaybackClock(now)
+    clock.duration = 3_000_000
+    clock.seek(1_000_000)
+    clock.set_playing(True)
+    now.now += 10
+    assert clock.position == 3_000_000
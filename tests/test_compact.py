@@ -0,0 +1,96 @@
+import pickle
+
+import pytest
+
+from aionowplaying.interface.base import property_models
+from aionowplaying.interface.compact import CompactPlaybackProperties, CompactMetadataBean, FrozenMetadataBean
+from aionowplaying.interface.enums import PlaybackStatus, PlaybackPropertyName, PropertyName
+from aionowplaying.interface.headless import HeadlessInterface
+
+
+@pytest.mark.parametrize('compact_model, model', list(zip(property_models(True), property_models(False))))
+def test_compact_models_mirror_pydantic_models(compact_model, model):
+    assert compact_model().model_dump() == model().model_dump()
+    assert compact_model.from_model(model()) == compact_model()
+
+
+def test_compact_defaults_are_not_shared():
+    first, second = CompactPlaybackProperties(), CompactPlaybackProperties()
+    first.Metadata.artist.append('Artist')
+    assert second.Metadata.artist == []
+    assert not hasattr(first, '__dict__')
+
+
+def test_validate_is_explicit():
+    properties = CompactPlaybackProperties(PlaybackStatus='Playing')
+    assert properties.PlaybackStatus == 'Playing'
+    assert properties.validate().PlaybackStatus is PlaybackStatus.Playing
+    properties.Metadata = CompactMetadataBean(duration='not a number')
+    with pytest.raises(ValueError):
+        properties.validate()
+
+
+def test_backend_with_compact_store():
+    player = HeadlessInterface('test', compact=True)
+    player.set_playback_property(PlaybackPropertyName.Metadata, CompactMetadataBean(title='Title'))
+    assert player.get_playback_property(PlaybackPropertyName.Metadata).title == 'Title'
+
+
+def test_frozen_metadata_shares_strings_and_tuples():
+    from aionowplaying.interface.models import PlaybackProperties
+    first = FrozenMetadataBean(id_='/t/1', album=''.join(['Al', 'bum']), artist=['Artist ' + str(1)], genre=['Rock'])
+    second = FrozenMetadataBean.freeze(PlaybackProperties.MetadataBean(
+        id_='/t/2', album=''.join(['Al', 'bum']), artist=['Artist ' + str(1)], genre=['Rock']))
+    assert second.artist == ('Artist 1',) and second.artist is first.artist
+    assert second.album is first.album
+    assert FrozenMetadataBean.freeze(second) is second
+    assert not hasattr(first, '__dict__')
+    with pytest.raises(AttributeError):
+        first.title = 'Changed'
+    changed = first.model_copy(update={'title': 'Changed'})
+    assert changed.title == 'Changed' and changed.artist is first.artist
+    assert hash(first) == hash(first.model_copy()) and first == first.model_copy()
+    assert pickle.loads(pickle.dumps(first)) == first
+    with pytest.raises(TypeError):
+        FrozenMetadataBean(artist='Artist')
+    assert FrozenMetadataBean.interner.strings(['Artist ' + str(1)]) is first.artist
+
+
+def test_frozen_metadata_converts_back():
+    from aionowplaying.interface.models import PlaybackProperties
+    frozen = FrozenMetadataBean(id_='/t/1', title='Title', artist=['A', 'B'], duration=5)
+    model = frozen.to_model()
+    assert isinstance(model, PlaybackProperties.MetadataBean) and model.artist == ['A', 'B']
+    assert FrozenMetadataBean.from_model(model) == frozen
+    thawed = frozen.thaw()
+    assert isinstance(thawed, CompactMetadataBean) and thawed.artist == ['A', 'B']
+    thawed.artist.append('C')
+    assert frozen.artist == ('A', 'B')
+    assert FrozenMetadataBean().model_dump() == {name: tuple(value) if type(value) is list else value
+                                                 for name, value in CompactMetadataBean().model_dump().items()}
+
+
+async def test_frozen_tracks_served_over_dbus(private_bus):
+    from dbus_next import Message
+    from dbus_next.aio import MessageBus
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    player = Mpris2Interface('frozen', bus_address=private_bus.address, compact=True)
+    track = FrozenMetadataBean(id_='/org/aionowplaying/Track/1', title='Title', artist=['Artist'])
+    player.set_playback_property(PlaybackPropertyName.Metadata, track)
+    player.set_tracks([track])
+    player.set_property(PropertyName.HasTrackList, True)
+    await player.connect()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    reply = await client.call(Message(
+        destination='org.mpris.MediaPlayer2.frozen', path='/org/mpris/MediaPlayer2',
+        interface='org.mpris.MediaPlayer2.TrackList', member='GetTracksMetadata', signature='ao',
+        body=[[track.id_]]))
+    assert reply.body[0][0]['xesam:artist'].value == ['Artist']
+    reply = await client.call(Message(
+        destination='org.mpris.MediaPlayer2.frozen', path='/org/mpris/MediaPlayer2',
+        interface='org.freedesktop.DBus.Properties', member='Get', signature='ss',
+        body=['org.mpris.MediaPlayer2.Player', 'Metadata']))
+    assert reply.body[0].value['xesam:title'].value == 'Title'
+    client.disconnect()
+    await player.stop()
@@ -0,0 +1,71 @@
+import asyncio
+
+from aionowplaying.interface.dispatch import CommandDispatcher
+from aionowplaying.interface.headless import HeadlessInterface
+
+
+class RecordingPlayer(HeadlessInterface):
+    def __init__(self):
+        super().__init__('test', compact=True)
+        self.calls = []
+
+    async def record(self, *call):
+        self.calls.append(call)
+        await asyncio.sleep(0.01)
+
+    async def on_volume(self, volume: float):
+        await self.record('volume', volume)
+
+    async def on_next(self):
+        await self.record('next')
+
+    async def on_play(self):
+        await self.record('play')
+
+    async def on_pause(self):
+        await self.record('pause')
+
+    def on_stop(self):
+        self.calls.append(('stop',))
+
+
+async def test_latest_volume_wins():
+    player = RecordingPlayer()
+    first = player._dispatch('on_volume', 0.0)
+    await asyncio.sleep(0)
+    futures = [player._dispatch('on_volume', step / 10) for step in range(1, 10)]
+    await asyncio.gather(first, *futures)
+    # the first one was already running, everything after it but the latest was superseded
+    assert player.calls == [('volume', 0.0), ('volume', 0.9)]
+    assert player.dispatcher.stats()['collapsed_by_handler'] == {'on_volume': 8}
+
+
+async def test_transport_keeps_order_and_merges_repeats():
+    player = RecordingPlayer()
+    commands = ['on_play', 'on_pause', 'on_pause', 'on_pause', 'on_play', 'on_stop', 'on_stop']
+    await asyncio.gather(*(player._dispatch(command) for command in commands))
+    assert player.calls == [('play',), ('pause',), ('play',), ('stop',)]
+    assert player.dispatcher.stats() == {'received': 7, 'handled': 4, 'collapsed': 3,
+                                         'collapsed_by_handler': {'on_pause': 2, 'on_stop': 1}}
+
+
+async def test_pending_skips_are_capped():
+    player = RecordingPlayer()
+    player._dispatcher = CommandDispatcher(player, max_pending_skips=2)
+    first = player._dispatch('on_next')
+    await asyncio.sleep(0)
+    await asyncio.gather(first, *(player._dispatch('on_next') for _ in range(9)))
+    assert player.calls == [('next',)] * 3
+    assert player.dispatcher.collapsed['on_next'] == 7
+
+
+async def test_handler_errors_reach_every_merged_command():
+    player = RecordingPlayer()
+
+    async def on_volume(volume):
+        raise ValueError(volume)
+
+    player.on_volume = on_volume
+    results = await asyncio.gather(player._dispatch('on_volume', 0.1), player._dispatch('on_volume', 0.2),
+                                   return_exceptions=True)
+    assert [result.args for result in results] == [(0.2,), (0.2,)]
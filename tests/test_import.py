@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+
+def _loaded_after(code: str) -> set:
+    check = f'{code}\nimport sys\nprint(" ".join(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', check], check=True, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))).stdout
+    return set(output.split())
+
+
+def test_package_import_is_lazy():
+    modules = _loaded_after('import aionowplaying\nfrom aionowplaying import PlaybackStatus, PlaybackPropertyName')
+    assert 'aionowplaying.interface.enums' in modules
+    for heavy in ('pydantic', 'dbus_next', 'winrt', 'MediaPlayer', 'aionowplaying.interface.base'):
+        assert heavy not in modules
+
+
+def test_models_import_without_backend():
+    modules = _loaded_after('from aionowplaying import PlaybackProperties')
+    assert 'pydantic' in modules
+    assert 'dbus_next' not in modules
+
+
+def test_unknown_platform_falls_back_to_headless():
+    from aionowplaying.interface import select_interface
+    from aionowplaying.interface.headless import HeadlessInterface
+    from aionowplaying.interface.enums import PlaybackPropertyName
+
+    cls = select_interface('plan9')
+    assert cls is HeadlessInterface
+    assert select_interface('plan9') is cls
+    player = cls('test')
+    player.set_playback_property(PlaybackPropertyName.Volume, 0.5)
+    assert player.get_playback_property(PlaybackPropertyName.Volume) == 0.5
@@ -0,0 +1,32 @@
+import json
+import shutil
+
+import pytest
+
+from aionowplaying import loadgen
+
+
+async def test_worker_counts_signals_and_calls(private_bus):
+    result = await loadgen.run_worker(private_bus.address, 0, 1, players=2, clients=2, duration=0.3, tick=0.02,
+                                      call_interval=0)
+    assert result['players'] == 2 and result['clients'] == 2
+    assert result['signals_sent'] > 0 and result['signals_received'] > 0
+    assert result['signals_received'] <= result['signals_sent'] * result['clients']
+    assert all(result['calls'][method] for method in loadgen.METHODS)
+    assert result['errors'] == 0 and result['connections_lost'] == 0
+    assert result['rss_kib'] > 0
+
+
+def test_report_over_processes(tmp_path):
+    if shutil.which('dbus-daemon') is None:
+        pytest.skip('dbus-daemon is not available')
+    pytest.importorskip('dbus_next')
+    output = tmp_path / 'report.json'
+    loadgen.main(['--players', '2', '--clients', '2', '--processes', '2', '--duration', '0.3',
+                  '--output', str(output)])
+    report = json.loads(output.read_text())
+    assert report['signals_received_per_second'] > 0
+    assert report['latency']['all']['count'] > 0 and report['latency']['all']['p99_us'] > 0
+    assert report['daemon_cpu_percent'] >= 0
+    assert set(report['rss_kib']) == {'daemon', 'worker_0', 'worker_1'}
+    assert set(report['worker_cpu_percent']) == {'worker_0', 'worker_1'}
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from aionowplaying.interface.headless import HeadlessInterface
+from aionowplaying.interface.metrics import Metrics
+
+
+def test_prometheus_exposition():
+    metrics = Metrics(labels={'player': 'test'})
+    metrics.inc_each('properties_changed_total', ['Volume', 'Volume', 'Rate'])
+    metrics.observe('handler_seconds', 0.003, 'on_next')
+    metrics.gauge('queue_depth', 'dispatcher', lambda: 2)
+    text = metrics.prometheus()
+    assert '# TYPE aionowplaying_properties_changed_total counter' in text
+    assert 'aionowplaying_properties_changed_total{player="test",property="Volume"} 2' in text
+    assert 'aionowplaying_handler_seconds_bucket{player="test",handler="on_next",le="0.0025"} 0' in text
+    assert 'aionowplaying_handler_seconds_bucket{player="test",handler="on_next",le="0.005"} 1' in text
+    assert 'aionowplaying_handler_seconds_count{player="test",handler="on_next"} 1' in text
+    assert 'aionowplaying_queue_depth{player="test",queue="dispatcher"} 2' in text
+
+
+async def test_handler_latency_and_stats():
+    player = HeadlessInterface('test')
+    assert player.get_stats() == {'dispatcher': {'received': 0, 'handled': 0, 'collapsed': 0,
+                                                 'collapsed_by_handler': {}}}
+    player.enable_metrics()
+    await player._dispatch('on_next')
+    stats = player.get_stats()
+    assert stats['dispatcher']['handled'] == 1
+    assert stats['histograms']['handler_seconds']['on_next']['count'] == 1
+    assert stats['gauges']['queue_depth']['dispatcher'] == 0
+
+
+async def test_bus_metrics_and_unix_socket(private_bus, tmp_path):
+    from dbus_next import Message
+    from dbus_next.aio import MessageBus
+    from aionowplaying.interface.base import PlaybackPropertyName
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    player = Mpris2Interface('metrics', bus_address=private_bus.address)
+    metrics = player.enable_metrics()
+    player.set_playback_property(PlaybackPropertyName.Rate, 2.0)  # not connected, nothing is sent
+    await player.connect()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    await client.call(Message(destination='org.mpris.MediaPlayer2.metrics', path='/org/mpris/MediaPlayer2',
+                              interface='org.freedesktop.DBus.Properties', member='GetAll', signature='s',
+                              body=['org.mpris.MediaPlayer2.Player']))
+    player.set_playback_property(PlaybackPropertyName.Volume, 0.5)
+    await player.seeked(1000)
+    await client.call(Message(destination='org.mpris.MediaPlayer2.metrics', path='/org/mpris/MediaPlayer2',
+                              interface='org.freedesktop.DBus.Peer', member='Ping'))
+    assert metrics.counters['method_calls_total']['GetAll'] == 1
+    assert metrics.counters['properties_changed_total']['Volume'] == 1
+    assert 'Rate' not in metrics.counters['properties_changed_total']
+    # the GetAll and Ping replies and the two signals at least
+    assert metrics.counters['messages_sent_total'][''] >= 4
+    assert metrics.counters['bytes_sent_total'][''] > 100
+    assert metrics.counters['signals_total']['PropertiesChanged'] == 1
+    assert metrics.counters['signals_total']['Seeked'] == 1
+    assert set(metrics.snapshot()['gauges']['queue_depth']) == {'dispatcher', 'service_thread', 'pending_changes'}
+
+    path = tmp_path / 'metrics.sock'
+    path.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        await metrics.serve_unix(str(path))
+    path.unlink()
+    path = str(path)
+    server = await metrics.serve_unix(path)
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(b'GET /metrics HTTP/1.0\r\n\r\n')
+    response = await reader.read()
+    writer.close()
+    server.close()
+    assert response.startswith(b'HTTP/1.0 200 OK')
+    assert b'aionowplaying_method_calls_total{method="GetAll"} 1' in response
+    client.disconnect()
+    await player.stop()
@@ -58,10 +58,13 @@ class NowPlayingInterface(aionp.NowPlayingInterface):
 @pytest.fixture()
 async def server():
     service = NowPlayingInterface()
-    asyncio.ensure_future(service.start())
+    task = asyncio.ensure_future(service.start())
+    ready = getattr(service, 'ready', None)
+    if ready is not None:
+        await asyncio.wait_for(ready.wait(), 5)
     yield service
-    await asyncio.sleep(3)
     await service.stop()
+    await task
 
 
 async def test_update_song_props(server: NowPlayingInterface):
@@ -0,0 +1,71 @@
+import asyncio
+
+from aionowplaying.interface.enums import PlaylistOrdering
+from aionowplaying.interface.playlists import Playlist, PlaylistStore
+
+
+def playlist(number: int, name: str, **kwargs) -> Playlist:
+    return Playlist(f'/org/mpris/MediaPlayer2/Playlist/{number}', name, **kwargs)
+
+
+def test_pages_follow_each_ordering():
+    store = PlaylistStore()
+    store.replace([playlist(1, 'b', created=30), playlist(2, 'C', created=10), playlist(3, 'a', created=20)])
+    names = lambda page: [p.name for p in page]
+    assert names(store.page(0, 10, PlaylistOrdering.Alphabetical)) == ['a', 'b', 'C']
+    assert names(store.page(0, 2, PlaylistOrdering.CreationDate)) == ['C', 'a']
+    assert names(store.page(1, 2, PlaylistOrdering.CreationDate, reverse=True)) == ['a', 'C']
+    assert names(store.page(0, 10, PlaylistOrdering.UserDefined)) == ['b', 'C', 'a']
+    assert store.page(5, 10, PlaylistOrdering.UserDefined) == []
+
+
+def test_updates_keep_indexes_sorted():
+    store = PlaylistStore()
+    store.replace(playlist(i, f'list {i:04}') for i in range(1000))
+    store.put(playlist(500, 'aaa'))
+    store.remove(playlist(0, '').id_)
+    store.put(playlist(1000, 'zzz', played=5))
+    assert len(store) == 1000
+    assert store.page(0, 1, PlaylistOrdering.Alphabetical)[0].name == 'aaa'
+    assert store.page(0, 1, PlaylistOrdering.Alphabetical, reverse=True)[0].name == 'zzz'
+    assert store.page(0, 1, PlaylistOrdering.LastPlayDate, reverse=True)[0].name == 'zzz'
+    assert store.page(998, 5, PlaylistOrdering.UserDefined)[-1].name == 'zzz'
+
+
+async def test_playlists_on_private_bus(private_bus):
+    from dbus_next import Message
+    from dbus_next.aio import MessageBus
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    class Player(Mpris2Interface):
+        activated = []
+
+        async def on_activate_playlist(self, playlist_id: str):
+            self.activated.append(playlist_id)
+            self.set_active_playlist(playlist_id)
+
+    player = Player('playlists', bus_address=private_bus.address)
+    task = asyncio.ensure_future(player.start())
+    await player.ready.wait()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+
+    def call(interface, member, signature='', body=()):
+        return client.call(Message(destination='org.mpris.MediaPlayer2.playlists', path='/org/mpris/MediaPlayer2',
+                                   interface=interface, member=member, signature=signature, body=list(body)))
+
+    introspect = lambda: call('org.freedesktop.DBus.Introspectable', 'Introspect')
+    assert 'org.mpris.MediaPlayer2.Playlists' not in (await introspect()).body[0]
+    player.set_playlists([playlist(i, f'list {i:04}') for i in range(100)])
+    assert 'org.mpris.MediaPlayer2.Playlists' in (await introspect()).body[0]
+
+    reply = await call('org.mpris.MediaPlayer2.Playlists', 'GetPlaylists', 'uusb', [10, 3, 'Alphabetical', True])
+    assert [name for _, name, _ in reply.body[0]] == ['list 0089', 'list 0088', 'list 0087']
+    await call('org.mpris.MediaPlayer2.Playlists', 'ActivatePlaylist', 'o', [playlist(7, '').id_])
+    assert player.activated == [playlist(7, '').id_]
+    reply = await call('org.freedesktop.DBus.Properties', 'GetAll', 's', ['org.mpris.MediaPlayer2.Playlists'])
+    assert reply.body[0]['PlaylistCount'].value == 100
+    assert reply.body[0]['ActivePlaylist'].value == [True, [playlist(7, '').id_, 'list 0007', '']]
+
+    client.disconnect()
+    await player.stop()
+    await task
@@ -0,0 +1,83 @@
+import asyncio
+
+from aionowplaying.interface.base import LoopStatus, PlaybackPropertyName, PlaybackStatus, PropertyName, \
+    TrackListPropertyName
+from aionowplaying.interface.compact import CompactMetadataBean
+from aionowplaying.interface.recording import Recorder, Replayer, read_recording, BEGIN_BATCH, SET_TRACKS
+from aionowplaying.interface.unixsocket import UnixSocketInterface
+
+PlayProp = PlaybackPropertyName
+
+
+class Player(UnixSocketInterface):
+    def __init__(self, name: str, **kwargs):
+        super().__init__(name, path='/nonexistent.sock', compact=True, **kwargs)
+        self.calls = []
+
+    async def on_volume(self, volume: float):
+        self.calls.append(('volume', volume))
+
+    async def on_loop_status(self, status: LoopStatus):
+        self.calls.append(('loop_status', status))
+
+
+def state(player: Player) -> tuple:
+    return (player.get_property(PropertyName.Identity), player.get_playback_property(PlayProp.PlaybackStatus),
+            player.get_playback_property(PlayProp.Metadata), player.get_playback_property(PlayProp.Volume),
+            player.get_tracklist_property(TrackListPropertyName.Tracks))
+
+
+async def test_record_and_replay(tmp_path):
+    path = str(tmp_path / 'session.rec')
+    player = Player('recorded')
+    with Recorder(player, path) as recorder:
+        player.set_property(PropertyName.Identity, 'Recorded')
+        player.set_playback_properties({
+            PlayProp.PlaybackStatus: PlaybackStatus.Playing,
+            PlayProp.Metadata: CompactMetadataBean(id_='/t/1', title='One', artist=['A']),
+        })
+        player.set_tracks(CompactMetadataBean(id_=f'/t/{number}') for number in range(3))
+        player.add_track(CompactMetadataBean(id_='/t/9', title='Nine'), '/t/0')
+        player.remove_track('/t/1')
+        await player._dispatch('on_volume', 0.3)
+        await player._dispatch('on_loop_status', LoopStatus.Track)
+        player.set_playback_property(PlayProp.Volume, 0.3)
+    assert 'set_property' not in vars(player) and '_dispatch' not in vars(player)
+    fields, records = read_recording(path)
+    assert len(records) == recorder.records == 11
+    assert [kind for _, kind, _ in records].count(BEGIN_BATCH) == 1
+    assert [data for _, kind, data in records if kind == SET_TRACKS][0][0][2][0] == '/t/2'
+
+    replayed = Player('replayed')
+    report = await Replayer(path, speed=None).replay(replayed)
+    assert state(replayed) == state(player)
+    assert replayed.get_tracklist_property(TrackListPropertyName.Tracks) == ['/t/0', '/t/9', '/t/2']
+    assert replayed.calls == player.calls == [('volume', 0.3), ('loop_status', LoopStatus.Track)]
+    assert report['records'] == 11 and report['commands'] == 2
+
+
+async def test_keyword_calls_are_recorded(tmp_path):
+    path = str(tmp_path / 'session.rec')
+    player = Player('recorded')
+    with Recorder(player, path):
+        player.set_tracks(tracks=[CompactMetadataBean(id_='/t/0')], current_track='/t/0')
+        player.add_track(CompactMetadataBean(id_='/t/1'), after_track='/t/0')
+        player.set_playback_property(name=PlayProp.Volume, value=0.5)
+        player.set_property(PropertyName.Identity, value='Keywords')
+    replayed = Player('replayed')
+    await Replayer(path, speed=None).replay(replayed)
+    assert state(replayed) == state(player)
+    assert replayed.get_tracklist_property(TrackListPropertyName.Tracks) == ['/t/0', '/t/1']
+    assert replayed.get_playback_property(PlayProp.Volume) == 0.5
+
+
+async def test_replay_keeps_the_pace(tmp_path):
+    path = str(tmp_path / 'session.rec')
+    player = Player('recorded')
+    with Recorder(player, path):
+        player.set_playback_property(PlayProp.Volume, 0.1)
+        await asyncio.sleep(0.1)
+        player.set_playback_property(PlayProp.Volume, 0.2)
+    report = await Replayer(path, speed=2).replay(Player('replayed'))
+    assert 0.045 <= report['seconds'] < 0.09
+    assert 'late_p99_us' in report
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('dbus_next')
+
+from aionowplaying.interface.base import PlaybackPropertyName as PlayProp  # noqa: E402
+from aionowplaying.interface.mpris2 import Mpris2Interface  # noqa: E402
+from aionowplaying.interface.service_thread import ServiceThread  # noqa: E402
+
+
+class ThreadedPlayer(Mpris2Interface):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.emitted = []
+        self.played_on = None
+        self._player_bus.emit_properties_changed = self.emitted.append
+
+    def on_play(self):
+        self.played_on = threading.current_thread()
+
+
+async def eventually(predicate, timeout: float = 5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, 'condition not met in time'
+        await asyncio.sleep(0.01)
+
+
+async def test_setters_from_other_threads_are_coalesced(private_bus):
+    player = ThreadedPlayer('threaded', bus_address=private_bus.address)
+    service = ServiceThread(player)
+    player.set_playback_property(PlayProp.Volume, 0.1)  # queued until the loop runs
+    assert player.get_playback_property(PlayProp.Volume) == 1.0
+    await asyncio.to_thread(service.start, 5)
+    try:
+        await eventually(lambda: player.get_playback_property(PlayProp.Volume) == 0.1)
+
+        def writer():
+            service.hold()
+            for step in range(100):
+                player.set_playback_property(PlayProp.Volume, step / 100)
+            player.set_playback_property(PlayProp.Rate, 2.0)
+            service.release()
+
+        emitted = len(player.emitted)
+        await asyncio.gather(*(asyncio.to_thread(writer) for _ in range(4)))
+        await asyncio.wrap_future(service.submit(asyncio.sleep(0)))
+        assert player.get_playback_property(PlayProp.Volume) == 0.99
+        assert player.get_playback_property(PlayProp.Rate) == 2.0
+        # each writer's 101 sets are published in at most one PropertiesChanged
+        assert 1 <= len(player.emitted) - emitted <= 4
+        assert player.emitted[-1] == {'Volume': 0.99, 'Rate': 2.0}
+    finally:
+        await asyncio.to_thread(service.stop, 5)
+    assert player._service_thread is None
+
+
+async def test_setters_after_stop_run_in_place(private_bus):
+    player = ThreadedPlayer('closing', bus_address=private_bus.address)
+    service = ServiceThread(player)
+    await asyncio.to_thread(service.start, 5)
+    await asyncio.to_thread(service.stop, 5)
+    assert service.loop.is_closed()
+    player._service_thread = service  # as seen by a setter that got the thread just before it closed
+
+    def writer():
+        player.set_playback_property(PlayProp.Volume, 0.3)
+        service.hold()
+        player.set_playback_property(PlayProp.Rate, 2.0)
+        service.release()
+
+    await asyncio.to_thread(writer)
+    assert player.get_playback_property(PlayProp.Volume) == 0.3
+    assert player.get_playback_property(PlayProp.Rate) == 2.0
+
+
+async def test_handlers_run_on_callback_executor(private_bus):
+    from dbus_next import Message
+    from dbus_next.aio import MessageBus
+    from aionowplaying.testing import wait_for_name
+
+    executor = ThreadPoolExecutor(1, thread_name_prefix='callbacks')
+    player = ThreadedPlayer('callbacks', bus_address=private_bus.address)
+    player.set_playback_property(PlayProp.CanPlay, True)
+    service = ServiceThread(player, callback_executor=executor)
+    await asyncio.to_thread(service.start, 5)
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    try:
+        await wait_for_name(client, 'org.mpris.MediaPlayer2.callbacks')
+        await client.call(Message(destination='org.mpris.MediaPlayer2.callbacks', path='/org/mpris/MediaPlayer2',
+                                  interface='org.mpris.MediaPlayer2.Player', member='Play'))
+        assert player.played_on.name.startswith('callbacks')
+    finally:
+        client.disconnect()
+        await asyncio.to_thread(service.stop, 5)
+        executor.shutdown()
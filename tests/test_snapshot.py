@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+
+import pytest
+
+pytest.importorskip('dbus_next')
+
+from aionowplaying.interface.base import PlaybackPropertyName, PlaybackStatus, LoopStatus, PropertyName, \
+    TrackListPropertyName, property_models
+from aionowplaying.interface.enums import MediaType
+from aionowplaying.interface.mpris2 import Mpris2Interface
+
+PlayProp = PlaybackPropertyName
+
+
+def filled_player(compact: bool = False) -> Mpris2Interface:
+    player = Mpris2Interface('snapshot', compact=compact)
+    bean = type(property_models(compact)[1]().Metadata)
+    player.set_property(PropertyName.Identity, 'Snapshot Player')
+    player.set_property(PropertyName.SupportedMimeTypes, ['audio/flac'])
+    player.set_playback_properties({
+        PlayProp.PlaybackStatus: PlaybackStatus.Paused,
+        PlayProp.LoopStatus: LoopStatus.Playlist,
+        PlayProp.Volume: 0.4,
+        PlayProp.Position: 42_000_000,
+        PlayProp.Metadata: bean(id_='/t/2', title='Two', artist=['B'], duration=180_000_000,
+                                media_type=MediaType.Video),
+    })
+    player.set_tracklist_property(TrackListPropertyName.CanEditTracks, True)
+    player.set_tracks([bean(id_=f'/t/{number}', title=f'Track {number}', trackNumber=number)
+                       for number in range(1, 4)])
+    return player
+
+
+@pytest.mark.parametrize('compact', [False, True])
+async def test_round_trip(tmp_path, compact):
+    path = str(tmp_path / 'player.snapshot')
+    saved = filled_player(compact)
+    await saved.enable_snapshots(path).save()
+
+    player = Mpris2Interface('snapshot', compact=compact)
+    assert player.enable_snapshots(path).restore()
+    assert player.get_property(PropertyName.Identity) == 'Snapshot Player'
+    assert player.get_property(PropertyName.SupportedMimeTypes) == ['audio/flac']
+    assert player.get_playback_property(PlayProp.PlaybackStatus) is PlaybackStatus.Paused
+    assert player.get_playback_property(PlayProp.LoopStatus) is LoopStatus.Playlist
+    assert player.get_playback_property(PlayProp.Volume) == 0.4
+    assert player.get_playback_property(PlayProp.Position) == 42_000_000
+    assert player.get_playback_property(PlayProp.Metadata) == saved.get_playback_property(PlayProp.Metadata)
+    assert player.get_playback_property(PlayProp.Metadata).media_type is MediaType.Video
+    assert player.get_tracklist_property(TrackListPropertyName.CanEditTracks) is True
+    assert player.get_tracklist_property(TrackListPropertyName.Tracks) == ['/t/1', '/t/2', '/t/3']
+    store = player._tracklist_bus._tracks
+    # decoded on first read
+    assert store.encoded('/t/3') is not None
+    assert store.get('/t/3') == saved._tracklist_bus._tracks.get('/t/3')
+    assert store.encoded('/t/3') is None
+    # nothing changed since the restore
+    await player.snapshot.save()
+    assert player.snapshot.writes == 0
+
+
+async def test_playing_is_restored_paused_at_the_saved_position(tmp_path):
+    path = str(tmp_path / 'player.snapshot')
+    saved = filled_player()
+    saved.set_playback_property(PlayProp.PlaybackStatus, PlaybackStatus.Playing)
+    await saved.enable_snapshots(path).save()
+
+    player = Mpris2Interface('snapshot')
+    assert player.enable_snapshots(path).restore()
+    position = player.get_playback_property(PlayProp.Position)
+    await asyncio.sleep(0.05)
+    assert player.get_playback_property(PlayProp.PlaybackStatus) is PlaybackStatus.Paused
+    assert player.get_playback_property(PlayProp.Position) == position
+    assert 42_000_000 <= position < 43_000_000
+
+
+async def test_frozen_tracks_round_trip(tmp_path):
+    from aionowplaying.interface.compact import CompactMetadataBean, FrozenMetadataBean
+    path = str(tmp_path / 'player.snapshot')
+    saved = Mpris2Interface('snapshot', compact=True)
+    saved.set_tracks([FrozenMetadataBean(id_=f'/t/{number}', artist=['A', 'B']) for number in range(1, 3)])
+    await saved.enable_snapshots(path).save()
+
+    thawed = Mpris2Interface('snapshot', compact=True)
+    thawed.enable_snapshots(path).restore()
+    assert thawed._tracklist_bus._tracks.get('/t/1') == CompactMetadataBean(id_='/t/1', artist=['A', 'B'])
+    frozen = Mpris2Interface('snapshot', compact=True)
+    frozen.set_playback_property(PlayProp.Metadata, FrozenMetadataBean())
+    frozen.enable_snapshots(path).restore()
+    track = frozen._tracklist_bus._tracks.get('/t/2')
+    assert type(track) is FrozenMetadataBean and track.artist is saved._tracklist_bus._tracks.get('/t/2').artist
+
+
+async def test_writes_are_rate_limited_and_atomic(tmp_path):
+    path = str(tmp_path / 'player.snapshot')
+    player = filled_player()
+    snapshot = player.enable_snapshots(path, interval=0.05)
+    for volume in range(100):
+        player.set_playback_property(PlayProp.Volume, volume / 100)
+    assert snapshot.writes == 0 and not os.path.exists(path)
+    await asyncio.sleep(0.1)
+    assert snapshot.writes == 1
+    assert os.listdir(tmp_path) == ['player.snapshot']
+
+    # the tracks are encoded again only after they changed
+    rows = dict(snapshot._rows)
+    player.set_property(PropertyName.Identity, 'Renamed')
+    await snapshot.save()
+    assert snapshot._rows == rows
+    player.remove_track('/t/1')
+    await snapshot.save()
+    assert list(snapshot._rows) == ['/t/2', '/t/3'] and snapshot.writes == 3
+
+    restored = Mpris2Interface('snapshot')
+    restored.enable_snapshots(path).restore()
+    assert restored.get_property(PropertyName.Identity) == 'Renamed'
+    assert restored.get_playback_property(PlayProp.Volume) == 0.99
+    assert restored.get_tracklist_property(TrackListPropertyName.Tracks) == ['/t/2', '/t/3']
+
+
+async def test_unreadable_snapshot_is_ignored(tmp_path, caplog):
+    path = tmp_path / 'player.snapshot'
+    player = Mpris2Interface('snapshot')
+    assert not player.enable_snapshots(str(path)).restore()
+    path.write_bytes(b'not a snapshot')
+    with caplog.at_level(logging.WARNING, logger='aionowplaying.interface.snapshot'):
+        assert not player.snapshot.restore()
+    assert 'not a version 1 snapshot' in caplog.text
+
+
+async def test_connect_restores_before_requesting_the_name(tmp_path, private_bus):
+    from dbus_next import Message
+    from dbus_next.aio import MessageBus
+
+    path = str(tmp_path / 'player.snapshot')
+    await filled_player().enable_snapshots(path).save()
+    player = Mpris2Interface('snapshot', bus_address=private_bus.address)
+    player.enable_snapshots(path)
+    await player.connect()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    reply = await client.call(Message(destination='org.mpris.MediaPlayer2.snapshot', path='/org/mpris/MediaPlayer2',
+                                      interface='org.freedesktop.DBus.Properties', member='GetAll',
+                                      signature='s', body=['org.mpris.MediaPlayer2.Player']))
+    values = reply.body[0]
+    assert values['Metadata'].value['xesam:title'].value == 'Two'
+    assert values['PlaybackStatus'].value == 'Paused'
+    client.disconnect()
+    player.set_playback_property(PlayProp.Volume, 0.9)
+    await player.stop()
+    assert player.snapshot.writes == 1
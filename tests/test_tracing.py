@@ -0,0 +1,95 @@
+import asyncio
+import logging
+
+import pytest
+
+from aionowplaying.interface.headless import HeadlessInterface
+from aionowplaying.interface.tracing import current_trace
+
+
+async def test_dispatcher_times_the_current_trace():
+    class Player(HeadlessInterface):
+        async def on_volume(self, volume: float):
+            await asyncio.sleep(0.01)
+
+    player = Player('test')
+    tracer = player.enable_tracing()
+    first, second = tracer.begin('Volume'), tracer.begin('Volume')
+    current_trace.set(first)
+    done = player._dispatch('on_volume', 0.1)
+    current_trace.set(None)
+    await asyncio.sleep(0)
+    player._dispatch('on_volume', 0.2)
+    current_trace.set(second)
+    await player._dispatch('on_volume', 0.3)
+    await done
+    assert first.handler == 'on_volume' and first.handler_finished - first.handler_started >= 0.009
+    # merged into the pending 0.2 command, which waited for the first one
+    assert second.handler_started >= first.handler_finished
+    assert second.handler_started - second.dispatched >= 0.009
+
+
+async def test_slow_calls_are_logged_and_kept(private_bus, caplog):
+    pytest.importorskip('dbus_next')
+    from dbus_next import Message, Variant
+    from dbus_next.aio import MessageBus
+    from dbus_next.service import ServiceInterface
+    from aionowplaying.interface.base import PlaybackPropertyName
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    class SlowPlayer(Mpris2Interface):
+        async def on_next(self):
+            await asyncio.sleep(0.06)
+
+    player = SlowPlayer('tracing', bus_address=private_bus.address)
+    player.set_playback_property(PlaybackPropertyName.CanGoNext, True)
+    player.set_playback_property(PlaybackPropertyName.CanControl, True)
+    traces = []
+    tracer = player.enable_tracing(slow_threshold=0.05, capacity=4, hook=traces.append)
+    await player.connect()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    destination = dict(destination='org.mpris.MediaPlayer2.tracing', path='/org/mpris/MediaPlayer2')
+    with caplog.at_level(logging.WARNING, logger='aionowplaying.interface.tracing'):
+        await client.call(Message(interface='org.mpris.MediaPlayer2.Player', member='Next', **destination))
+        await client.call(Message(interface='org.freedesktop.DBus.Properties', member='Set', signature='ssv',
+                                  body=['org.mpris.MediaPlayer2.Player', 'Volume', Variant('d', 0.5)],
+                                  **destination))
+    assert [trace.member for trace in traces] == ['org.mpris.MediaPlayer2.Player.Next',
+                                                  'org.mpris.MediaPlayer2.Player.Volume']
+    next_, volume = traces
+    assert next_.received is not None and next_.handler == 'on_next'
+    assert next_.stages()['handler'] >= 0.05
+    assert volume.handler == 'on_volume' and volume.duration < 0.05
+    assert tracer.slow_calls() == [next_]
+    assert 'slow call <CallTrace org.mpris.MediaPlayer2.Player.Next -> on_next' in caplog.text
+
+    player.disable_tracing()
+    assert ServiceInterface._get_methods(player._player_bus) is \
+        player._player_bus._class_members[type(player._player_bus)][0]
+    await client.call(Message(interface='org.mpris.MediaPlayer2.Player', member='Next', **destination))
+    assert len(traces) == 2
+    client.disconnect()
+    await player.stop()
+
+
+async def test_rejected_calls_do_not_leave_a_receive_time(private_bus):
+    pytest.importorskip('dbus_next')
+    from dbus_next import Message, MessageType
+    from dbus_next.aio import MessageBus
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    player = Mpris2Interface('rejected', bus_address=private_bus.address)
+    traces = []
+    tracer = player.enable_tracing(hook=traces.append)
+    await player.connect()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    destination = dict(destination='org.mpris.MediaPlayer2.rejected', path='/org/mpris/MediaPlayer2')
+    reply = await client.call(Message(interface='org.mpris.MediaPlayer2.Player', member='Next', signature='s',
+                                      body=['x'], **destination))
+    assert reply.message_type == MessageType.ERROR and traces == []
+    assert not tracer._received['org.mpris.MediaPlayer2.Player.Next'] and not tracer._keys
+    await asyncio.sleep(0.1)
+    await client.call(Message(interface='org.mpris.MediaPlayer2.Player', member='Next', **destination))
+    assert len(traces) == 1 and traces[0].stages()['transport'] < 0.05
+    client.disconnect()
+    await player.stop()
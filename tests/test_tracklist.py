@@ -0,0 +1,113 @@
+import asyncio
+import random
+
+import pytest
+
+from aionowplaying.interface.enums import PropertyName, TrackListPropertyName
+from aionowplaying.interface.models import PlaybackProperties
+from aionowplaying.interface.tracklist import NO_TRACK, TrackStore
+
+MetadataBean = PlaybackProperties.MetadataBean
+
+
+def track(number: int) -> MetadataBean:
+    return MetadataBean(id_=f'/org/mpris/MediaPlayer2/Track/{number}', title=f'Track {number}')
+
+
+def test_store_keeps_order_under_random_edits(monkeypatch):
+    # small blocks and gaps to exercise block splits and renumbering
+    monkeypatch.setattr(TrackStore, '_LOAD', 4)
+    monkeypatch.setattr(TrackStore, '_GAP', 4)
+    rng = random.Random(42)
+    store, expected = TrackStore(), []
+    for number in range(2000):
+        if expected and rng.random() < 0.3:
+            track_id = rng.choice(expected)
+            store.remove(track_id)
+            expected.remove(track_id)
+            continue
+        metadata = track(number)
+        if expected and rng.random() < 0.8:
+            after = rng.choice(expected)
+            store.insert(metadata, after)
+            expected.insert(expected.index(after) + 1, metadata.id_)
+        else:
+            store.insert(metadata, NO_TRACK)
+            expected.insert(0, metadata.id_)
+    assert store.ids() == expected
+    assert len(store) == len(expected)
+
+
+def test_store_lookup():
+    store = TrackStore(track(i) for i in range(10))
+    assert store.get(track(3).id_).title == 'Track 3'
+    assert [m.title for m in store.get_many([track(5).id_, '/unknown', track(1).id_])] == ['Track 5', 'Track 1']
+    store.append(track(3))
+    assert store.ids()[-1] == track(3).id_
+    assert len(store) == 10
+
+
+def test_store_insert_keeps_track_on_bad_after():
+    store = TrackStore(track(i) for i in range(5))
+    order = store.ids()
+    with pytest.raises(KeyError):
+        store.insert(track(2), after='/unknown')
+    assert store.ids() == order and store.get(track(2).id_).title == 'Track 2'
+    store.insert(MetadataBean(id_=track(2).id_, title='Renamed'), after=track(2).id_)
+    assert store.ids() == order and store.get(track(2).id_).title == 'Renamed'
+    store.insert(track(4), after=track(3).id_)
+    store.insert(track(0), after=NO_TRACK)
+    assert store.ids() == order
+
+
+async def test_tracklist_on_private_bus(private_bus):
+    from dbus_next import Message, MessageType
+    from dbus_next.aio import MessageBus
+    from aionowplaying.interface.mpris2 import Mpris2Interface
+
+    class Player(Mpris2Interface):
+        removed = []
+
+        async def on_remove_track(self, track_id: str):
+            self.removed.append(track_id)
+            self.remove_track(track_id)
+
+    player = Player('tracklist', bus_address=private_bus.address)
+    player.set_tracks([track(i) for i in range(1000)])
+    task = asyncio.ensure_future(player.start())
+    await player.ready.wait()
+    client = await MessageBus(bus_address=private_bus.address).connect()
+    introspect = Message(destination='org.mpris.MediaPlayer2.tracklist', path='/org/mpris/MediaPlayer2',
+                         interface='org.freedesktop.DBus.Introspectable', member='Introspect')
+    assert 'org.mpris.MediaPlayer2.TrackList' not in (await client.call(introspect)).body[0]
+    player.set_property(PropertyName.HasTrackList, True)
+    assert 'org.mpris.MediaPlayer2.TrackList' in (await client.call(introspect)).body[0]
+    signals = asyncio.Queue()
+    client.add_message_handler(
+        lambda msg: signals.put_nowait(msg) if msg.message_type == MessageType.SIGNAL else None)
+    await client.call(Message(destination='org.freedesktop.DBus', path='/org/freedesktop/DBus',
+                              interface='org.freedesktop.DBus', member='AddMatch', signature='s',
+                              body=["type='signal',interface='org.mpris.MediaPlayer2.TrackList'"]))
+
+    def call(member, signature, body):
+        return client.call(Message(destination='org.mpris.MediaPlayer2.tracklist', path='/org/mpris/MediaPlayer2',
+                                   interface='org.mpris.MediaPlayer2.TrackList', member=member,
+                                   signature=signature, body=body))
+
+    reply = await call('GetTracksMetadata', 'ao', [[track(7).id_, track(2).id_]])
+    assert [m['xesam:title'].value for m in reply.body[0]] == ['Track 7', 'Track 2']
+
+    player.add_track(track(1000), after_track=track(0).id_)
+    msg = await asyncio.wait_for(signals.get(), 5)
+    assert msg.member == 'TrackAdded'
+    assert msg.body[1] == track(0).id_
+
+    player.set_tracklist_property(TrackListPropertyName.CanEditTracks, True)
+    await call('RemoveTrack', 'o', [track(5).id_])
+    assert player.removed == [track(5).id_]
+    assert track(5).id_ not in player.get_tracklist_property(TrackListPropertyName.Tracks)
+
+    client.disconnect()
+    await player.stop()
+    await task
+
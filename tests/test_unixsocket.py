@@ -0,0 +1,156 @@
+import asyncio
+import json
+import socket
+import sys
+
+import pytest
+
+from aionowplaying.interface.base import PlaybackPropertyName, PlaybackStatus, PropertyName
+from aionowplaying.interface.compact import CompactMetadataBean
+from aionowplaying.interface.unixsocket import UnixSocketInterface
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='Unix domain sockets are not available on Windows')
+
+PlayProp = PlaybackPropertyName
+
+
+class Player(UnixSocketInterface):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    async def on_next(self):
+        self.calls.append('next')
+
+    async def on_volume(self, volume: float):
+        self.calls.append(('volume', volume))
+
+
+@pytest.fixture()
+async def player(tmp_path):
+    player = Player('test', path=str(tmp_path / 'player.sock'), compact=True)
+    await player.serve()
+    yield player
+    await player.stop()
+
+
+async def subscribe(player):
+    reader, writer = await asyncio.open_unix_connection(player.path, limit=1 << 24)
+
+    async def receive() -> dict:
+        return json.loads(await asyncio.wait_for(reader.readline(), 2))
+
+    def send(**request):
+        writer.write(json.dumps(request).encode() + b'\n')
+
+    return receive, send, writer
+
+
+async def test_snapshot_then_deltas(player):
+    player.set_playback_property(PlayProp.Metadata, CompactMetadataBean(id_='/t/1', title='One'))
+    player.add_track(CompactMetadataBean(id_='/t/1', title='One'))
+    receive, send, writer = await subscribe(player)
+    snapshot = await receive()
+    assert snapshot['type'] == 'snapshot'
+    assert snapshot['playback']['Metadata']['title'] == 'One'
+    assert snapshot['playback']['PlaybackStatus'] == 'Stopped'
+    assert [track['id_'] for track in snapshot['tracks']] == ['/t/1']
+
+    player.set_playback_property(PlayProp.Volume, 0.5)
+    assert await receive() == {'type': 'changed', 'section': 'playback', 'values': {'Volume': 0.5}}
+    async with player.batch():
+        player.set_playback_property(PlayProp.PlaybackStatus, PlaybackStatus.Playing)
+        player.set_playback_property(PlayProp.Volume, 0.6)
+        player.set_property(PropertyName.Identity, 'Test')
+    assert await receive() == {'type': 'changed', 'section': 'playback',
+                               'values': {'PlaybackStatus': 'Playing', 'Volume': 0.6}}
+    assert await receive() == {'type': 'changed', 'section': 'player', 'values': {'Identity': 'Test'}}
+    player.add_track(CompactMetadataBean(id_='/t/2', title='Two'), after_track='/t/1')
+    added = await receive()
+    assert added['type'] == 'track_added' and added['metadata']['title'] == 'Two' and added['after'] == '/t/1'
+    writer.close()
+
+
+async def test_commands_reach_the_handlers(player):
+    receive, send, writer = await subscribe(player)
+    await receive()
+    send(command='Next', id=1)
+    assert await receive() == {'type': 'error', 'id': 1, 'error': 'Next is not enabled'}
+    player.set_playback_properties({PlayProp.CanGoNext: True, PlayProp.CanControl: True})
+    await receive()
+    send(command='Next', id=2)
+    assert await receive() == {'type': 'result', 'id': 2}
+    send(command='Volume', args=[0.25], id=3)
+    assert await receive() == {'type': 'changed', 'section': 'playback', 'values': {'Volume': 0.25}}
+    assert await receive() == {'type': 'result', 'id': 3}
+    send(command='Volume', args=['loud'], id=4)
+    assert (await receive())['error'].startswith('invalid command')
+    player.set_playback_property(PlayProp.Shuffle, False)
+    await receive()
+    send(command='Shuffle', args=['false'], id=5)
+    assert (await receive())['error'].startswith('invalid command')
+    assert player.get_playback_property(PlayProp.Shuffle) is False
+    assert player.calls == ['next', ('volume', 0.25)]
+    writer.close()
+
+
+async def test_cancelled_command_is_not_applied(player):
+    sent = []
+    subscriber = type('Subscriber', (), {'send': lambda self, line: sent.append(json.loads(line))})()
+    future = asyncio.get_running_loop().create_future()
+    future.cancel()
+    player._handled(subscriber, 5, 'Volume', (0.25,), future)
+    assert sent == [{'type': 'error', 'id': 5, 'error': 'Volume was cancelled'}]
+    assert player.get_playback_property(PlayProp.Volume) == 1.0
+
+
+async def test_slow_subscriber_is_resynced(tmp_path):
+    player = Player('slow', path=str(tmp_path / 'player.sock'), compact=True, buffer_size=4096)
+    await player.serve()
+    reader, writer = await asyncio.open_unix_connection(player.path, limit=1 << 24)
+    await reader.readline()
+    await asyncio.sleep(0.01)
+    subscriber, = player.subscribers
+    # nothing is read, once the socket buffers are full updates are dropped instead of queued
+    title = 'x' * 20000
+    volume = 0
+    while not subscriber.dropped:
+        volume += 1
+        player.set_playback_property(PlayProp.Metadata, CompactMetadataBean(id_='/t/1', title=title))
+        player.set_playback_property(PlayProp.Volume, volume / 1e6)
+        await asyncio.sleep(0)
+    assert subscriber.transport.get_write_buffer_size() < 4096 + 21000
+    while True:
+        message = json.loads(await asyncio.wait_for(reader.readline(), 2))
+        if message['type'] == 'snapshot':
+            break
+    assert message['playback']['Volume'] == volume / 1e6
+    assert subscriber.resyncs == 1
+    writer.close()
+    await player.stop()
+
+
+def test_selected_by_name():
+    from aionowplaying.interface import select_interface
+    assert select_interface('unix-socket') is UnixSocketInterface
+
+
+async def test_serve_only_replaces_stale_sockets(tmp_path):
+    path = tmp_path / 'player.sock'
+    path.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        await Player('file', path=str(path)).serve()
+    assert path.read_text() == 'not a socket'
+    path.unlink()
+
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()  # left behind, nothing listens on it
+    first = Player('first', path=str(path))
+    await first.serve()
+    with pytest.raises(OSError):
+        await Player('second', path=str(path)).serve()
+    receive, send, writer = await subscribe(first)
+    assert (await receive())['type'] == 'snapshot'
+    writer.close()
+    await first.stop()